@@ -0,0 +1,451 @@
+"""
+Asynchronous checkpointing module for the French-Wolof Translator.
+Writes training checkpoints and uploads them to the Hub without blocking
+the training loop.
+
+At each save the training loop only copies the model and optimizer state
+to CPU memory (a snapshot) and writes the small files (trainer state, RNG
+state, tokenizer, training arguments) into a staging directory. A writer
+thread serializes the snapshot and renames the staging directory to
+``checkpoint-<step>``, so a checkpoint directory only ever appears
+complete. An upload thread pushes the model files of the newest written
+checkpoint to the Hub (or to a LocalHub directory standing in for it),
+retrying failures with exponential backoff; checkpoints superseded while
+an upload runs are skipped. ``flush`` is the barrier run at the end of
+training: it returns once every snapshot is on disk and the last one is
+uploaded.
+"""
+import copy
+import fnmatch
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+import torch
+from transformers import TrainerCallback
+from transformers.trainer import OPTIMIZER_NAME, SCHEDULER_NAME, TRAINER_STATE_NAME, TRAINING_ARGS_NAME
+from transformers.trainer_callback import ExportableState
+from transformers.trainer_utils import PREFIX_CHECKPOINT_DIR
+
+from checkpoint_utils import rotate_checkpoints
+
+# Checkpoint files that resume training but are not part of the published model
+TRAINING_ONLY_PATTERNS = [OPTIMIZER_NAME, SCHEDULER_NAME, "scaler.pt", "rng_state*.pth", TRAINER_STATE_NAME, TRAINING_ARGS_NAME]
+
+
+class LocalHub:
+    """Directory standing in for the Hugging Face Hub (same ``upload_folder`` call as ``HfApi``)."""
+
+    COMMITS_FILE = ".commits.jsonl"
+
+    def __init__(self, root: str, fail_uploads: int = 0):
+        """
+        Initialize the stand-in.
+
+        Args:
+            root: Directory holding one subdirectory per repository
+            fail_uploads: Number of first uploads that raise ConnectionError
+                (to exercise retries)
+        """
+        self.root = root
+        self.fail_uploads = fail_uploads
+        self.upload_calls = 0
+        self._lock = threading.Lock()
+
+    def repo_path(self, repo_id: str) -> str:
+        """Directory of a repository."""
+        return os.path.join(self.root, repo_id)
+
+    def upload_folder(
+        self,
+        repo_id: str,
+        folder_path: str,
+        commit_message: str = "Upload folder",
+        path_in_repo: Optional[str] = None,
+        ignore_patterns: Optional[List[str]] = None,
+        **kwargs
+    ) -> str:
+        """
+        Copy a folder into a repository as one commit.
+
+        Args:
+            repo_id: Repository name (created if missing)
+            folder_path: Local folder to upload
+            commit_message: Commit message recorded in the history
+            path_in_repo: Subdirectory of the repository (root if None)
+            ignore_patterns: Glob patterns of files not to upload
+            **kwargs: Other HfApi.upload_folder arguments (ignored)
+
+        Returns:
+            Commit ID
+
+        Raises:
+            ConnectionError: For the first ``fail_uploads`` calls
+        """
+        with self._lock:
+            self.upload_calls += 1
+            if self.upload_calls <= self.fail_uploads:
+                raise ConnectionError(f"Simulated upload failure {self.upload_calls}/{self.fail_uploads}")
+            target = os.path.join(self.repo_path(repo_id), path_in_repo or "")
+            files = []
+            for directory, _, names in os.walk(folder_path):
+                for name in names:
+                    relative = os.path.relpath(os.path.join(directory, name), folder_path)
+                    if any(fnmatch.fnmatch(relative, pattern) for pattern in ignore_patterns or []):
+                        continue
+                    destination = os.path.join(target, relative)
+                    os.makedirs(os.path.dirname(destination), exist_ok=True)
+                    # Copy then rename, so readers never see a half-written file
+                    shutil.copyfile(os.path.join(directory, name), destination + ".incomplete")
+                    os.replace(destination + ".incomplete", destination)
+                    files.append(relative)
+            commit_id = uuid.uuid4().hex
+            with open(os.path.join(self.repo_path(repo_id), self.COMMITS_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "commit": commit_id, "message": commit_message, "files": sorted(files), "time": time.time()
+                }) + "\n")
+            return commit_id
+
+    def commits(self, repo_id: str) -> List[Dict[str, Any]]:
+        """
+        List the commits of a repository, oldest first.
+
+        Args:
+            repo_id: Repository name
+
+        Returns:
+            Commit records with "commit", "message", "files" and "time"
+        """
+        path = os.path.join(self.repo_path(repo_id), self.COMMITS_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+def _cpu_copy(value: Any, copies: Optional[Dict[Any, torch.Tensor]] = None) -> Any:
+    """
+    Copy tensors (nested in dicts, lists and tuples) to CPU memory.
+
+    Tensors sharing storage (tied weights) share it in the copy too.
+    """
+    copies = {} if copies is None else copies
+    if isinstance(value, torch.Tensor):
+        key = (value.untyped_storage().data_ptr(), value.storage_offset(), tuple(value.shape), value.stride(), value.dtype)
+        if key not in copies:
+            copies[key] = value.detach().to("cpu", copy=True)
+        return copies[key]
+    if isinstance(value, dict):
+        return {name: _cpu_copy(item, copies) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_cpu_copy(item, copies) for item in value)
+    return copy.deepcopy(value)
+
+
+@dataclass
+class _Snapshot:
+    """State of one checkpoint, waiting to be written."""
+    step: int
+    staging_dir: str
+    checkpoint_dir: str
+    run_dir: str
+    model: Any
+    weights: Dict[str, torch.Tensor]
+    optimizer: Optional[Dict[str, Any]]
+    scheduler: Optional[Dict[str, Any]]
+    commit_message: str
+
+
+class AsyncCheckpointer(TrainerCallback):
+    """Background checkpoint writer and Hub uploader, used by CachingSeq2SeqTrainer."""
+
+    def __init__(
+        self,
+        api=None,
+        repo_id: Optional[str] = None,
+        save_total_limit: Optional[int] = None,
+        average_last_checkpoints: int = 1,
+        max_retries: int = 5,
+        retry_seconds: float = 2.0,
+        max_pending: int = 2
+    ):
+        """
+        Initialize the checkpointer and start its threads.
+
+        Args:
+            api: Object with ``upload_folder`` (``huggingface_hub.HfApi`` or
+                LocalHub); no uploads if None
+            repo_id: Repository checkpoints are uploaded to
+            save_total_limit: Checkpoints kept on disk (all if None);
+                checkpoints still being uploaded and the best one are kept
+            average_last_checkpoints: Checkpoints averaged at the end of
+                training; rotation keeps that many ending at the best one
+            max_retries: Upload attempts after the first failure
+            retry_seconds: First retry delay, doubled after every failure
+            max_pending: Snapshots held in memory at once; a save waits for
+                the writer beyond this
+        """
+        self.api = api
+        self.repo_id = repo_id
+        self.save_total_limit = save_total_limit
+        self.average_last_checkpoints = average_last_checkpoints
+        self.max_retries = max_retries
+        self.retry_seconds = retry_seconds
+        self.best_model_checkpoint: Optional[str] = None
+        self._slots = threading.Semaphore(max_pending)
+        self._condition = threading.Condition()
+        self._writes: Deque[_Snapshot] = deque()
+        self._uploads: Deque[_Snapshot] = deque()
+        self._writing: Optional[str] = None
+        self._uploading: Optional[str] = None
+        self._pending_dirs = set()  # Checkpoints written or being written, not yet uploaded
+        self._closed = False
+        self.stats = {
+            "saves": 0, "blocked_seconds": 0.0, "write_seconds": 0.0, "written": 0,
+            "uploads": 0, "upload_retries": 0, "uploads_skipped": 0, "upload_seconds": 0.0,
+        }
+        self.failed_writes: List[Dict[str, str]] = []
+        self.failed_uploads: List[Dict[str, str]] = []
+        self._threads = [
+            threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True),
+            threading.Thread(target=self._upload_loop, name="checkpoint-uploader", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def pending(self, checkpoint_dir: str) -> bool:
+        """Whether a checkpoint is queued or being written (not yet on disk)."""
+        with self._condition:
+            return checkpoint_dir == self._writing or any(job.checkpoint_dir == checkpoint_dir for job in self._writes)
+
+    def in_use(self, checkpoint_dir: str) -> bool:
+        """Whether a checkpoint is queued, being written or not yet uploaded (must not be deleted)."""
+        with self._condition:
+            return checkpoint_dir in self._pending_dirs
+
+    def save(self, trainer, run_dir: str) -> str:
+        """
+        Snapshot the trainer's state and queue the checkpoint for writing.
+
+        Mirrors ``Trainer._save_checkpoint``: model, optimizer, scheduler,
+        scaler, RNG and trainer state. Only the snapshot and the small
+        files are written in the calling thread.
+
+        Args:
+            trainer: Trainer being saved
+            run_dir: Training output directory
+
+        Returns:
+            Directory the checkpoint will have once written
+        """
+        start = time.perf_counter()
+        step = trainer.state.global_step
+        checkpoint_dir = os.path.join(run_dir, f"{PREFIX_CHECKPOINT_DIR}-{step}")
+        staging_dir = checkpoint_dir + ".tmp"
+        # Bounded memory: wait for the writer if too many snapshots are queued
+        self._slots.acquire()
+
+        if trainer.state.best_global_step:
+            best_dir = os.path.join(run_dir, f"{PREFIX_CHECKPOINT_DIR}-{trainer.state.best_global_step}")
+            if os.path.exists(best_dir) or best_dir == checkpoint_dir or self.pending(best_dir):
+                trainer.state.best_model_checkpoint = best_dir
+        self.best_model_checkpoint = trainer.state.best_model_checkpoint
+
+        model = trainer.accelerator.unwrap_model(trainer.model, keep_torch_compile=False)
+        snapshot = _Snapshot(
+            step=step,
+            staging_dir=staging_dir,
+            checkpoint_dir=checkpoint_dir,
+            run_dir=run_dir,
+            model=model,
+            weights=_cpu_copy(model.state_dict()),
+            optimizer=None,
+            scheduler=None,
+            commit_message=f"Training in progress, step {step}",
+        )
+        if not trainer.args.save_only_model:
+            snapshot.optimizer = _cpu_copy(trainer.optimizer.state_dict())
+            if trainer.lr_scheduler is not None:
+                snapshot.scheduler = copy.deepcopy(trainer.lr_scheduler.state_dict())
+
+        if os.path.isdir(staging_dir):
+            shutil.rmtree(staging_dir)
+        os.makedirs(staging_dir)
+        if not trainer.args.save_only_model:
+            trainer._save_scaler(staging_dir)
+            trainer._save_rng_state(staging_dir)
+        for callback in trainer.callback_handler.callbacks + [trainer.control]:
+            if isinstance(callback, ExportableState):
+                name = callback.__class__.__name__
+                if isinstance(trainer.state.stateful_callbacks[name], list):
+                    trainer.state.stateful_callbacks[name].append(callback.state())
+                else:
+                    trainer.state.stateful_callbacks[name] = callback.state()
+        trainer.state.save_to_json(os.path.join(staging_dir, TRAINER_STATE_NAME))
+        if trainer.processing_class is not None:
+            trainer.processing_class.save_pretrained(staging_dir)
+        torch.save(trainer.args, os.path.join(staging_dir, TRAINING_ARGS_NAME))
+
+        with self._condition:
+            self._writes.append(snapshot)
+            self._pending_dirs.add(checkpoint_dir)
+            self.stats["saves"] += 1
+            self.stats["blocked_seconds"] += time.perf_counter() - start
+            self._condition.notify_all()
+        return checkpoint_dir
+
+    def _write_loop(self) -> None:
+        """Serialize queued snapshots (writer thread)."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._writes or self._closed)
+                if not self._writes:
+                    return
+                snapshot = self._writes.popleft()
+                self._writing = snapshot.checkpoint_dir
+            start = time.perf_counter()
+            try:
+                snapshot.model.save_pretrained(snapshot.staging_dir, state_dict=snapshot.weights)
+                if snapshot.optimizer is not None:
+                    torch.save(snapshot.optimizer, os.path.join(snapshot.staging_dir, OPTIMIZER_NAME))
+                if snapshot.scheduler is not None:
+                    torch.save(snapshot.scheduler, os.path.join(snapshot.staging_dir, SCHEDULER_NAME))
+                if os.path.isdir(snapshot.checkpoint_dir):
+                    shutil.rmtree(snapshot.checkpoint_dir)
+                os.replace(snapshot.staging_dir, snapshot.checkpoint_dir)
+                written = True
+            except Exception as error:
+                written = False
+                shutil.rmtree(snapshot.staging_dir, ignore_errors=True)
+                self.failed_writes.append({"checkpoint": snapshot.checkpoint_dir, "error": repr(error)})
+                print(f"Failed to write {snapshot.checkpoint_dir}: {error!r}")
+            # Free the snapshot before taking the next one
+            snapshot.weights = snapshot.optimizer = snapshot.scheduler = None
+            self._slots.release()
+
+            with self._condition:
+                self._writing = None
+                if written:
+                    self.stats["written"] += 1
+                    self.stats["write_seconds"] += time.perf_counter() - start
+                if written and self.api is not None:
+                    self._uploads.append(snapshot)
+                else:
+                    self._pending_dirs.discard(snapshot.checkpoint_dir)
+                self._condition.notify_all()
+            if written:
+                self._rotate(snapshot.run_dir)
+
+    def _upload_loop(self) -> None:
+        """Upload the newest written checkpoint, with retries (upload thread)."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._uploads or (self._closed and not self._writes and self._writing is None))
+                if not self._uploads:
+                    return
+                # Only the newest checkpoint matters on the Hub
+                while len(self._uploads) > 1:
+                    skipped = self._uploads.popleft()
+                    self._pending_dirs.discard(skipped.checkpoint_dir)
+                    self.stats["uploads_skipped"] += 1
+                snapshot = self._uploads.popleft()
+                self._uploading = snapshot.checkpoint_dir
+
+            start = time.perf_counter()
+            delay = self.retry_seconds
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.api.upload_folder(
+                        repo_id=self.repo_id,
+                        folder_path=snapshot.checkpoint_dir,
+                        commit_message=snapshot.commit_message,
+                        ignore_patterns=TRAINING_ONLY_PATTERNS,
+                    )
+                    uploaded = True
+                    break
+                except Exception as error:
+                    uploaded = False
+                    if attempt == self.max_retries:
+                        self.failed_uploads.append({"checkpoint": snapshot.checkpoint_dir, "error": repr(error)})
+                        print(f"Giving up uploading {snapshot.checkpoint_dir}: {error!r}")
+                        break
+                    with self._condition:
+                        self.stats["upload_retries"] += 1
+                    print(f"Upload of {snapshot.checkpoint_dir} failed ({error!r}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    delay *= 2
+
+            with self._condition:
+                self._uploading = None
+                self._pending_dirs.discard(snapshot.checkpoint_dir)
+                if uploaded:
+                    self.stats["uploads"] += 1
+                    self.stats["upload_seconds"] += time.perf_counter() - start
+                self._condition.notify_all()
+            self._rotate(snapshot.run_dir)
+
+    def _rotate(self, run_dir: str) -> None:
+        """Delete old checkpoints beyond the limit, keeping the best ones and those not yet uploaded."""
+        with self._condition:
+            protected = set(self._pending_dirs)
+        rotate_checkpoints(
+            run_dir,
+            self.save_total_limit,
+            best_model_checkpoint=self.best_model_checkpoint,
+            window=self.average_last_checkpoints,
+            protected=protected
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait until every queued checkpoint is written and the last one uploaded.
+
+        Args:
+            timeout: Seconds to wait at most (no limit if None)
+
+        Returns:
+            Counters (saves, seconds the training loop was blocked, writes,
+            uploads, retries, skipped uploads) and failures
+
+        Raises:
+            RuntimeError: If a checkpoint could not be written, or the wait
+                timed out
+        """
+        with self._condition:
+            idle = self._condition.wait_for(
+                lambda: not self._writes and self._writing is None and not self._uploads and self._uploading is None,
+                timeout=timeout
+            )
+        if not idle:
+            raise RuntimeError(f"Checkpoints still pending after {timeout}s.")
+        report = {
+            **{name: round(value, 4) if isinstance(value, float) else value for name, value in self.stats.items()},
+            "failed_writes": list(self.failed_writes),
+            "failed_uploads": list(self.failed_uploads),
+        }
+        if self.failed_writes:
+            raise RuntimeError(f"Checkpoints could not be written: {self.failed_writes}")
+        return report
+
+    def on_train_end(self, args, state, control, **kwargs):
+        """Final barrier: training returns only once checkpoints are on disk and uploaded."""
+        report = self.flush()
+        if report["failed_uploads"]:
+            print(f"Warning: {len(report['failed_uploads'])} checkpoint upload(s) failed: {report['failed_uploads']}")
+
+    def close(self) -> None:
+        """Flush, then stop the threads."""
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+            for thread in self._threads:
+                thread.join()
@@ -0,0 +1,357 @@
+"""
+Autotune module for the French-Wolof Translator.
+Finds the fastest CPU inference settings for this machine and saves them.
+
+Usage:
+    python autotune.py --input data/test.jsonl --output inference_settings.json
+
+Every combination of torch intra-op threads, inter-op threads and worker
+processes runs in fresh processes (inter-op threads can only be set once
+per process); each worker loads its own translator and translates its
+share of a sample drawn from the input text, once per batch size.
+FrenchWolofTranslator runs in a single process, so the settings file holds
+the thread counts and batch size of the fastest single-worker combination,
+which it loads at startup through InferenceConfig. The worker count is
+that of the fastest combination overall and is used by multi-process jobs
+(BackTranslationConfig). TORCH_INTRA_OP_THREADS,
+TORCH_INTER_OP_THREADS, INFERENCE_WORKERS and INFERENCE_BATCH_SIZE
+override the file, and values passed in code override both, so every
+grid point runs with the thread counts it is labelled with.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import AutotuneConfig, InferenceConfig, ModelConfig
+from training_benchmark import environment, synthetic_pairs
+
+# Field holding the text of each language in JSONL input
+LANGUAGE_FIELDS = {"fr": "french", "wo": "wolof"}
+
+# Environment variables that take precedence over the tuned file
+OVERRIDE_VARIABLES = ["TORCH_INTRA_OP_THREADS", "TORCH_INTER_OP_THREADS", "INFERENCE_WORKERS", "INFERENCE_BATCH_SIZE"]
+
+
+def load_sentences(path: str, source_lang: str = "fr") -> List[str]:
+    """
+    Read source sentences.
+
+    Args:
+        path: A .txt file (one sentence per line) or a .jsonl file with a
+            "french"/"wolof" field (for ``source_lang``) or a "text" field
+        source_lang: Source language code ('fr' or 'wo')
+
+    Returns:
+        Non-empty sentences
+    """
+    sentences = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if path.endswith(".jsonl"):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                line = record.get(LANGUAGE_FIELDS[source_lang], record.get("text", ""))
+            line = line.strip()
+            if line:
+                sentences.append(line)
+    return sentences
+
+
+def powers_of_two(limit: int) -> List[int]:
+    """
+    List powers of two up to a limit, plus the limit itself.
+
+    Args:
+        limit: Largest value
+
+    Returns:
+        Increasing candidate values (at least [1])
+    """
+    values = []
+    value = 1
+    while value <= limit:
+        values.append(value)
+        value *= 2
+    if values[-1] != limit and limit > 1:
+        values.append(limit)
+    return values
+
+
+def candidate_grid(config: AutotuneConfig, cpu_count: int) -> List[Tuple[int, int, int]]:
+    """
+    Build the (intra-op threads, inter-op threads, workers) combinations to measure.
+
+    Args:
+        config: Autotuning configuration
+        cpu_count: CPUs available on this machine
+
+    Returns:
+        Combinations whose total thread count fits the machine
+    """
+    intra_values = config.intra_op_threads or powers_of_two(cpu_count)
+    worker_values = config.num_workers or powers_of_two(max(1, cpu_count // 2))
+    max_total_threads = config.max_total_threads or cpu_count
+    return [
+        (intra, inter, workers)
+        for workers in worker_values
+        for intra in intra_values
+        for inter in config.inter_op_threads
+        # Always keep single-process combinations so small machines get a result
+        if workers == 1 or workers * intra <= max_total_threads
+    ]
+
+
+def select_settings(measured: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Pick the settings to save from successful measurements.
+
+    Args:
+        measured: Results without errors
+
+    Returns:
+        Thread counts, batch size and throughput of the fastest single-worker
+        result (the translator runs in one process), and the worker count
+        and throughput of the fastest result overall
+    """
+    single_worker = [result for result in measured if result["num_workers"] == 1]
+    if not single_worker:
+        print("No single-worker result: using the thread counts of the fastest multi-worker combination")
+        single_worker = measured
+    best = max(single_worker, key=lambda result: result["sentences_per_second"])
+    best_overall = max(measured, key=lambda result: result["sentences_per_second"])
+    return {
+        "intra_op_threads": best["intra_op_threads"],
+        "inter_op_threads": best["inter_op_threads"],
+        "batch_size": best["batch_size"],
+        "sentences_per_second": best["sentences_per_second"],
+        "num_workers": best_overall["num_workers"],
+        "workers_sentences_per_second": best_overall["sentences_per_second"],
+    }
+
+
+def _worker(
+    rank: int,
+    settings: Dict[str, int],
+    model_checkpoint: str,
+    device: str,
+    texts: List[str],
+    config: AutotuneConfig,
+    barrier,
+    errors
+) -> None:
+    """Load a translator and translate ``texts`` once per batch size, in step with the parent."""
+    try:
+        from translator import FrenchWolofTranslator
+        translator = FrenchWolofTranslator(
+            model_checkpoint=model_checkpoint,
+            device=device,
+            inference_config=InferenceConfig(
+                intra_op_threads=settings["intra_op_threads"],
+                inter_op_threads=settings["inter_op_threads"]
+            )
+        )
+        # Measure the model, not memory lookups
+        translator.translation_memory = None
+        for batch_size in config.batch_sizes:
+            translator.translate_batch(
+                texts[:batch_size * config.warmup_batches], source_lang=config.source_lang, batch_size=batch_size
+            )
+            barrier.wait()
+            translator.translate_batch(texts, source_lang=config.source_lang, batch_size=batch_size)
+            barrier.wait()
+    except Exception:
+        errors.put(f"worker {rank}: {traceback.format_exc()}")
+        barrier.abort()
+
+
+class InferenceAutotuner:
+    """Measures translation throughput over a grid of CPU inference settings."""
+
+    def __init__(
+        self,
+        model_checkpoint: str,
+        sentences: List[str],
+        config: Optional[AutotuneConfig] = None,
+        device: str = "cpu",
+        timeout: float = 600.0
+    ):
+        """
+        Initialize the autotuner.
+
+        Args:
+            model_checkpoint: Checkpoint to benchmark
+            sentences: Representative source sentences (sampled with their
+                length distribution)
+            config: Autotuning configuration
+            device: Device of the worker translators
+            timeout: Seconds a worker may take to load or to finish one
+                measurement before its combination is dropped
+
+        Raises:
+            ValueError: If no sentences are given
+        """
+        if not sentences:
+            raise ValueError("Autotuning needs at least one sentence.")
+        self.model_checkpoint = model_checkpoint
+        self.config = config or AutotuneConfig()
+        self.device = device
+        self.timeout = timeout
+        rng = random.Random(self.config.seed)
+        self.sample = [rng.choice(sentences) for _ in range(self.config.sample_size)]
+        self.results: List[Dict[str, Any]] = []
+
+    def measure(self, intra_op_threads: int, inter_op_threads: int, num_workers: int) -> List[Dict[str, Any]]:
+        """
+        Measure every batch size for one thread/worker combination.
+
+        Args:
+            intra_op_threads: torch intra-op threads per worker
+            inter_op_threads: torch inter-op threads per worker
+            num_workers: Worker processes, each translating an equal share
+
+        Returns:
+            One result per batch size with sentences per second, or a single
+            result with an "error" when the combination failed
+        """
+        settings = {"intra_op_threads": intra_op_threads, "inter_op_threads": inter_op_threads, "num_workers": num_workers}
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(num_workers + 1)
+        errors = context.Queue()
+        shares = [self.sample[rank::num_workers] for rank in range(num_workers)]
+        processes = [
+            context.Process(
+                target=_worker,
+                args=(rank, settings, self.model_checkpoint, self.device, shares[rank], self.config, barrier, errors),
+                daemon=True
+            )
+            for rank in range(num_workers)
+        ]
+        for process in processes:
+            process.start()
+
+        results = []
+        try:
+            for batch_size in self.config.batch_sizes:
+                barrier.wait(self.timeout)  # All workers loaded and warmed up
+                start = time.perf_counter()
+                barrier.wait(self.timeout)  # All workers done
+                seconds = time.perf_counter() - start
+                results.append({
+                    **settings,
+                    "batch_size": batch_size,
+                    "seconds": round(seconds, 4),
+                    "sentences_per_second": round(len(self.sample) / seconds, 2),
+                })
+        except Exception as error:
+            barrier.abort()
+            try:
+                message = errors.get(timeout=5)
+            except queue.Empty:
+                message = f"{type(error).__name__} (timeout or worker exit)"
+            results = [{**settings, "error": message.strip().splitlines()[-1]}]
+        finally:
+            for process in processes:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.terminate()
+        return results
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Measure the whole grid.
+
+        Returns:
+            Report with the best settings (see select_settings), their
+            throughput, every result and the machine description
+        """
+        cpu_count = os.cpu_count() or 1
+        grid = candidate_grid(self.config, cpu_count)
+        print(f"Autotuning {len(grid)} thread/worker combinations x {len(self.config.batch_sizes)} batch sizes "
+              f"on {len(self.sample)} sentences ({cpu_count} CPUs)")
+        for intra_op_threads, inter_op_threads, num_workers in grid:
+            for result in self.measure(intra_op_threads, inter_op_threads, num_workers):
+                self.results.append(result)
+                print_result(result)
+
+        measured = [result for result in self.results if "error" not in result]
+        if not measured:
+            raise RuntimeError("Every autotuning combination failed.")
+        return {
+            **select_settings(measured),
+            "model_checkpoint": self.model_checkpoint,
+            "sample_size": len(self.sample),
+            "mean_sentence_chars": round(sum(len(text) for text in self.sample) / len(self.sample), 1),
+            "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment(),
+            "results": self.results,
+        }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    """Print one measurement."""
+    label = (f"  intra={result['intra_op_threads']:<3} inter={result['inter_op_threads']:<3} "
+             f"workers={result['num_workers']:<3}")
+    if "error" in result:
+        print(f"{label} failed: {result['error']}")
+    else:
+        print(f"{label} batch={result['batch_size']:<4} {result['sentences_per_second']:>9.2f} sentences/s")
+
+
+def main():
+    """Command-line entry point."""
+    defaults = AutotuneConfig()
+    parser = argparse.ArgumentParser(description="Find the fastest CPU inference settings and save them.")
+    parser.add_argument("--checkpoint", default=None, help="Model checkpoint (defaults to MODEL_CHECKPOINT)")
+    parser.add_argument("--input", default=None,
+                        help="Representative text (.txt or .jsonl); synthetic sentences if omitted")
+    parser.add_argument("--output", default=None, help="Settings file (defaults to INFERENCE_SETTINGS_PATH)")
+    parser.add_argument("--intra-op-threads", type=int, nargs="+", default=None)
+    parser.add_argument("--inter-op-threads", type=int, nargs="+", default=defaults.inter_op_threads)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=defaults.batch_sizes)
+    parser.add_argument("--max-total-threads", type=int, default=None)
+    parser.add_argument("--sample-size", type=int, default=defaults.sample_size)
+    parser.add_argument("--source-lang", default=defaults.source_lang, choices=sorted(LANGUAGE_FIELDS))
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    config = AutotuneConfig(
+        intra_op_threads=args.intra_op_threads,
+        inter_op_threads=args.inter_op_threads,
+        num_workers=args.workers,
+        batch_sizes=args.batch_sizes,
+        max_total_threads=args.max_total_threads,
+        sample_size=args.sample_size,
+        source_lang=args.source_lang,
+        output_path=args.output,
+    )
+    if args.input:
+        sentences = load_sentences(args.input, config.source_lang)
+    else:
+        print("No --input given: using synthetic sentences (lengths may not match real traffic)")
+        sentences = [pair[LANGUAGE_FIELDS[config.source_lang]] for pair in synthetic_pairs(1000, 40, config.seed)]
+    overridden = [name for name in OVERRIDE_VARIABLES if os.environ.get(name)]
+    if overridden:
+        print(f"Note: {', '.join(overridden)} set; they take precedence over the tuned file at startup")
+
+    model_checkpoint = args.checkpoint or ModelConfig().checkpoint
+    report = InferenceAutotuner(model_checkpoint, sentences, config, device=args.device, timeout=args.timeout).run()
+    output_path = config.output_path or InferenceConfig().settings_path
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Best single process: {report['intra_op_threads']} intra-op / {report['inter_op_threads']} inter-op "
+          f"threads, batch size {report['batch_size']} ({report['sentences_per_second']} sentences/s)")
+    print(f"Best worker count: {report['num_workers']} ({report['workers_sentences_per_second']} sentences/s)")
+    print(f"Saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Back-translation module for the French-Wolof Translator.
+Turns monolingual text into synthetic parallel pairs with batched inference.
+
+Usage:
+    python back_translation.py data/wolof-*.txt --output-dir back_translated --lang wo
+
+Each input shard gets its own output file of JSON lines, written in input
+order, so an interrupted job resumes from the last written line.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import torch
+
+from config import BackTranslationConfig, ModelConfig
+from corpus_filter import COLUMN_LANGUAGES
+from translator import FrenchWolofTranslator
+
+
+# Language code -> dataset column name
+LANGUAGE_COLUMNS = {lang: column for column, lang in COLUMN_LANGUAGES.items()}
+
+# Provenance tag written on every synthetic pair
+ORIGIN_TAG = "back_translation"
+
+_worker_translator: Optional[FrenchWolofTranslator] = None
+
+
+def _init_worker(model_checkpoint: str, device: Optional[str], num_threads: int) -> None:
+    """Load one translator per worker process."""
+    global _worker_translator
+    torch.set_num_threads(num_threads)
+    _worker_translator = FrenchWolofTranslator(model_checkpoint=model_checkpoint, device=device)
+
+
+def _read_monolingual(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Read a monolingual shard lazily.
+
+    Args:
+        path: A .txt file (one sentence per line) or a .jsonl file whose
+            records hold the sentence in a "text" field
+
+    Yields:
+        Tuples of (1-based line number, sentence) for non-empty lines
+    """
+    is_jsonl = path.endswith(".jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            text = json.loads(line)["text"] if is_jsonl and line.strip() else line
+            text = text.strip()
+            if text:
+                yield line_number, text
+
+
+def _resume_point(output_path: str) -> int:
+    """
+    Find the last input line already back-translated into an output file.
+
+    A trailing partial record (from an interrupted write) is truncated.
+
+    Args:
+        output_path: Output file of a shard
+
+    Returns:
+        Input line number of the last complete record, or 0
+    """
+    if not os.path.exists(output_path):
+        return 0
+    last_line = 0
+    good_offset = 0
+    with open(output_path, "rb") as f:
+        for raw in f:
+            try:
+                last_line = json.loads(raw)["line"]
+            except (ValueError, KeyError):
+                break
+            good_offset += len(raw)
+    if good_offset != os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(good_offset)
+    return last_line
+
+
+def _process_shard(task: Tuple[str, str, BackTranslationConfig, str]) -> Tuple[str, int]:
+    """
+    Back-translate one shard with the worker's translator.
+
+    Args:
+        task: Tuple of (input_path, output_path, config, model_checkpoint)
+
+    Returns:
+        Tuple of (input_path, number of pairs written in this run)
+    """
+    input_path, output_path, config, model_checkpoint = task
+    source_lang = config.monolingual_lang
+    target_lang = "fr" if source_lang == "wo" else "wo"
+    resume_after = _resume_point(output_path)
+    written = 0
+
+    def flush(bucket: List[Tuple[int, str]], out) -> int:
+        translations = _worker_translator.translate_batch(
+            [text for _, text in bucket],
+            source_lang=source_lang,
+            batch_size=config.batch_size
+        )
+        for (line_number, text), translation in zip(bucket, translations):
+            record = {
+                # The monolingual text is the (real) target side, the
+                # translation is the (synthetic) source side
+                LANGUAGE_COLUMNS[source_lang]: text,
+                LANGUAGE_COLUMNS[target_lang]: translation,
+                "origin": ORIGIN_TAG,
+                "model": model_checkpoint,
+                "source_file": input_path,
+                "line": line_number,
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        return len(bucket)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        bucket = []
+        for line_number, text in _read_monolingual(input_path):
+            if line_number <= resume_after:
+                continue
+            bucket.append((line_number, text))
+            if len(bucket) >= config.bucket_size:
+                written += flush(bucket, out)
+                bucket = []
+        if bucket:
+            written += flush(bucket, out)
+
+    # Mark the shard complete so later runs skip it without re-reading
+    open(output_path + ".done", "w").close()
+    return input_path, written
+
+
+class BackTranslationJob:
+    """Resumable back-translation of sharded monolingual corpora."""
+
+    def __init__(
+        self,
+        config: BackTranslationConfig,
+        model_config: Optional[ModelConfig] = None
+    ):
+        """
+        Initialize the job.
+
+        Args:
+            config: Back-translation configuration
+            model_config: Model configuration (default checkpoint)
+
+        Raises:
+            ValueError: If no input files are configured or the language is unknown
+        """
+        if not config.input_files:
+            raise ValueError("BackTranslationConfig.input_files must list at least one shard.")
+        if config.monolingual_lang not in LANGUAGE_COLUMNS:
+            raise ValueError(
+                f"Invalid language code: {config.monolingual_lang}. "
+                "Use 'fr' for French or 'wo' for Wolof."
+            )
+        self.config = config
+        self.model_checkpoint = config.model_checkpoint or (model_config or ModelConfig()).checkpoint
+
+    def shards(self) -> List[str]:
+        """
+        Expand the configured input files and globs.
+
+        Returns:
+            Sorted list of shard paths
+
+        Raises:
+            ValueError: If two shards would write the same output file (same
+                name in different directories, or differing only in extension)
+        """
+        paths = set()
+        for pattern in self.config.input_files:
+            paths.update(os.path.normpath(path) for path in glob.glob(pattern) or [pattern])
+        shards = sorted(paths)
+        outputs: Dict[str, str] = {}
+        for shard in shards:
+            other = outputs.setdefault(self.output_path(shard), shard)
+            if other != shard:
+                raise ValueError(
+                    f"Shards {other} and {shard} would both be written to {self.output_path(shard)}; "
+                    "rename one of them or back-translate them into different output directories."
+                )
+        return shards
+
+    def output_path(self, shard: str) -> str:
+        """
+        Get the output file for a shard.
+
+        Args:
+            shard: Input shard path
+
+        Returns:
+            Path of the synthetic pairs file
+        """
+        name = os.path.splitext(os.path.basename(shard))[0]
+        return os.path.join(self.config.output_dir, f"{name}.bt.jsonl")
+
+    def pending_shards(self) -> List[str]:
+        """
+        List shards that are not yet complete.
+
+        Returns:
+            Shard paths without a completion marker
+        """
+        return [
+            shard for shard in self.shards()
+            if not os.path.exists(self.output_path(shard) + ".done")
+        ]
+
+    def run(self) -> Dict[str, int]:
+        """
+        Back-translate all pending shards.
+
+        With several workers, each process loads its own translator and
+        handles whole shards; torch threads are split between processes.
+
+        Returns:
+            Mapping of shard path to the number of pairs written in this run
+        """
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        tasks = [
+            (shard, self.output_path(shard), self.config, self.model_checkpoint)
+            for shard in self.pending_shards()
+        ]
+        if not tasks:
+            return {}
+
+        num_workers = self.config.num_workers or 1
+        num_workers = max(1, min(num_workers, len(tasks)))
+        num_threads = max(1, torch.get_num_threads() // num_workers)
+        init_args = (self.model_checkpoint, self.config.device, num_threads)
+        if num_workers == 1:
+            _init_worker(*init_args)
+            return dict(_process_shard(task) for task in tasks)
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(num_workers, initializer=_init_worker, initargs=init_args) as pool:
+            return dict(pool.imap_unordered(_process_shard, tasks))
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Back-translate monolingual shards into synthetic pairs.")
+    parser.add_argument("input_files", nargs="+", help="Monolingual shards (.txt or .jsonl), globs allowed")
+    parser.add_argument("--output-dir", default=BackTranslationConfig.output_dir)
+    parser.add_argument("--lang", default=BackTranslationConfig.monolingual_lang, choices=sorted(LANGUAGE_COLUMNS),
+                        help="Language of the monolingual text")
+    parser.add_argument("--checkpoint", default=None, help="Model checkpoint (defaults to MODEL_CHECKPOINT)")
+    parser.add_argument("--batch-size", type=int, default=BackTranslationConfig.batch_size)
+    parser.add_argument("--num-workers", type=int, default=BackTranslationConfig.num_workers,
+                        help="Worker processes (defaults to the tuned INFERENCE_WORKERS setting, else 1)")
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    job = BackTranslationJob(BackTranslationConfig(
+        input_files=args.input_files,
+        output_dir=args.output_dir,
+        monolingual_lang=args.lang,
+        model_checkpoint=args.checkpoint,
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+        device=args.device,
+    ))
+    print(f"Back-translating {len(job.pending_shards())} shard(s) with {job.model_checkpoint}")
+    for shard, written in job.run().items():
+        print(f"  {shard}: {written} synthetic pairs")
+
+
+if __name__ == "__main__":
+    main()
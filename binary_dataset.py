@@ -0,0 +1,257 @@
+"""
+Pre-tokenized binary dataset module for the French-Wolof Translator.
+Stores tokenized splits as flat token arrays plus offset indexes, loaded
+with numpy.memmap so training starts without re-tokenizing anything.
+
+On-disk layout (one directory per dataset):
+    meta.json                 dtype, vocabulary size, example counts and the
+                              settings the dataset was prepared with
+    <split>/input_ids.bin     concatenated source token ids
+    <split>/input_ids.idx     int64 offsets (num_examples + 1)
+    <split>/labels.bin        concatenated target token ids
+    <split>/labels.idx        int64 offsets (num_examples + 1)
+"""
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from torch.utils.data import Dataset
+
+
+# Token fields stored per split
+BINARY_FIELDS = ("input_ids", "labels")
+
+# meta.json is written last, so its presence marks a complete dataset
+META_FILE = "meta.json"
+
+FORMAT_VERSION = 1
+
+
+def token_dtype(vocab_size: int) -> np.dtype:
+    """
+    Pick the smallest token dtype for a vocabulary.
+
+    Args:
+        vocab_size: Tokenizer vocabulary size
+
+    Returns:
+        uint16 when every id fits, int32 otherwise
+    """
+    return np.dtype(np.uint16) if vocab_size <= np.iinfo(np.uint16).max + 1 else np.dtype(np.int32)
+
+
+def is_binary_dataset(path: Optional[str]) -> bool:
+    """
+    Check whether a directory holds a complete binary dataset.
+
+    Args:
+        path: Dataset directory
+
+    Returns:
+        True if the dataset can be loaded
+    """
+    return bool(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+def read_binary_meta(path: str) -> Dict[str, Any]:
+    """
+    Read the metadata of a binary dataset.
+
+    Args:
+        path: Dataset directory
+
+    Returns:
+        Contents of meta.json
+    """
+    with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def binary_dataset_mismatches(path: str, settings: Dict[str, Any]) -> List[str]:
+    """
+    Compare the settings a binary dataset was written with to the current ones.
+
+    Args:
+        path: Dataset directory
+        settings: Current settings (as passed to ``write_binary_dataset``)
+
+    Returns:
+        Names of the settings that differ (all of them for datasets written
+        without settings); empty when the dataset can be reused
+    """
+    stored = read_binary_meta(path).get("settings") or {}
+    # Round-trip through JSON so tuples compare equal to stored lists
+    current = json.loads(json.dumps(settings))
+    return sorted(
+        name for name in set(stored) | set(current)
+        if stored.get(name) != current.get(name)
+    )
+
+
+def write_binary_split(examples: Iterable[Dict[str, Any]], path: str, dtype: np.dtype) -> int:
+    """
+    Write tokenized examples as flat token arrays with offset indexes.
+
+    Examples are streamed to disk, so the split never has to fit in memory
+    (only the offsets, 8 bytes per example and field, are kept).
+
+    Args:
+        examples: Iterable of records with input_ids and labels
+        path: Split directory
+        dtype: Token dtype
+
+    Returns:
+        Number of examples written
+    """
+    os.makedirs(path, exist_ok=True)
+    files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name in BINARY_FIELDS}
+    offsets = {name: [0] for name in BINARY_FIELDS}
+    try:
+        for example in examples:
+            for name in BINARY_FIELDS:
+                tokens = np.asarray(example[name], dtype=dtype)
+                tokens.tofile(files[name])
+                offsets[name].append(offsets[name][-1] + len(tokens))
+    finally:
+        for f in files.values():
+            f.close()
+    for name in BINARY_FIELDS:
+        np.asarray(offsets[name], dtype=np.int64).tofile(os.path.join(path, f"{name}.idx"))
+    return len(offsets[BINARY_FIELDS[0]]) - 1
+
+
+def write_binary_dataset(
+    dataset_dict: Dict[str, Iterable[Dict[str, Any]]],
+    path: str,
+    vocab_size: int,
+    settings: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Write every split of a tokenized dataset to a binary dataset directory.
+
+    Args:
+        dataset_dict: Mapping of split name to tokenized examples
+            (in-memory or streaming)
+        path: Dataset directory
+        vocab_size: Tokenizer vocabulary size (selects the token dtype)
+        settings: JSON-serializable settings the dataset was prepared with,
+            checked by ``binary_dataset_mismatches`` before reuse
+    """
+    dtype = token_dtype(vocab_size)
+    meta_path = os.path.join(path, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    splits = {
+        split: write_binary_split(examples, os.path.join(path, split), dtype)
+        for split, examples in dataset_dict.items()
+    }
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "dtype": dtype.name,
+        "vocab_size": vocab_size,
+        "splits": splits,
+        "settings": settings or {},
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+class MemmapSeq2SeqDataset(Dataset):
+    """Map-style dataset reading pre-tokenized pairs from memory-mapped files."""
+
+    def __init__(self, path: str, dtype: np.dtype):
+        """
+        Initialize the dataset.
+
+        Args:
+            path: Split directory
+            dtype: Token dtype used when writing
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._offsets = {
+            name: np.fromfile(os.path.join(path, f"{name}.idx"), dtype=np.int64)
+            for name in BINARY_FIELDS
+        }
+        self._tokens = None
+
+    def _token_arrays(self) -> Dict[str, np.ndarray]:
+        # Opened lazily so each DataLoader worker maps the files itself
+        # instead of receiving a pickled copy of the arrays.
+        if self._tokens is None:
+            self._tokens = {}
+            for name in BINARY_FIELDS:
+                file_path = os.path.join(self.path, f"{name}.bin")
+                if os.path.getsize(file_path) == 0:
+                    self._tokens[name] = np.empty(0, dtype=self.dtype)
+                else:
+                    self._tokens[name] = np.memmap(file_path, dtype=self.dtype, mode="r")
+        return self._tokens
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_tokens"] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self._offsets[BINARY_FIELDS[0]]) - 1
+
+    def __getitem__(self, index: int) -> Dict[str, np.ndarray]:
+        if index < 0:
+            index += len(self)
+        tokens = self._token_arrays()
+        example = {}
+        for name in BINARY_FIELDS:
+            offsets = self._offsets[name]
+            example[name] = tokens[name][offsets[index]:offsets[index + 1]].astype(np.int64)
+        example["attention_mask"] = np.ones_like(example["input_ids"])
+        return example
+
+    def source_lengths(self) -> np.ndarray:
+        """
+        Get source lengths without touching the token data.
+
+        Returns:
+            Array of input_ids lengths, one per example
+        """
+        return np.diff(self._offsets["input_ids"])
+
+    def target_lengths(self) -> np.ndarray:
+        """
+        Get target lengths without touching the token data.
+
+        Returns:
+            Array of labels lengths, one per example
+        """
+        return np.diff(self._offsets["labels"])
+
+
+def load_binary_dataset(path: str) -> Dict[str, MemmapSeq2SeqDataset]:
+    """
+    Load a binary dataset directory.
+
+    Only the offset indexes are read; token data is paged in on access.
+
+    Args:
+        path: Dataset directory
+
+    Returns:
+        Mapping of split name to MemmapSeq2SeqDataset
+
+    Raises:
+        FileNotFoundError: If the directory holds no complete binary dataset
+        ValueError: If the dataset was written with an unknown format version
+    """
+    if not is_binary_dataset(path):
+        raise FileNotFoundError(f"No binary dataset found in {path} (missing {META_FILE}).")
+    meta = read_binary_meta(path)
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported binary dataset format version: {meta.get('format_version')}."
+        )
+    dtype = np.dtype(meta["dtype"])
+    return {
+        split: MemmapSeq2SeqDataset(os.path.join(path, split), dtype)
+        for split in meta["splits"]
+    }
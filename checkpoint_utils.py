@@ -0,0 +1,167 @@
+"""
+Checkpoint utilities for the French-Wolof Translator.
+Lists and rotates training checkpoints and averages their weights into a
+single model.
+"""
+import json
+import os
+import re
+import shutil
+from typing import Dict, Iterable, List, Optional
+
+import torch
+from safetensors.torch import load_file
+from transformers.trainer_utils import PREFIX_CHECKPOINT_DIR
+
+
+_CHECKPOINT_RE = re.compile(rf"^{PREFIX_CHECKPOINT_DIR}-(\d+)$")
+
+
+def list_checkpoints(output_dir: str) -> List[str]:
+    """
+    List the Trainer checkpoints in an output directory.
+
+    Args:
+        output_dir: Training output directory
+
+    Returns:
+        Checkpoint directories sorted by training step (oldest first)
+    """
+    if not os.path.isdir(output_dir):
+        return []
+    checkpoints = []
+    for name in os.listdir(output_dir):
+        match = _CHECKPOINT_RE.match(name)
+        path = os.path.join(output_dir, name)
+        if match and os.path.isdir(path):
+            checkpoints.append((int(match.group(1)), path))
+    return [path for _, path in sorted(checkpoints)]
+
+
+def rotate_checkpoints(
+    output_dir: str,
+    save_total_limit: Optional[int],
+    best_model_checkpoint: Optional[str] = None,
+    window: int = 1,
+    protected: Iterable[str] = ()
+) -> List[str]:
+    """
+    Delete the oldest checkpoints beyond a limit.
+
+    Like the Trainer's rotation, the newest checkpoint and the best one are
+    never deleted. With ``window`` > 1, neither are the ``window`` newest
+    checkpoints nor the ``window`` checkpoints ending at the best one, so
+    the last ``window`` checkpoints up to the best are still there to be
+    averaged, whichever checkpoint turns out best.
+
+    Args:
+        output_dir: Training output directory
+        save_total_limit: Checkpoints kept (nothing is deleted if None or 0);
+            more are kept when the protected ones exceed it
+        best_model_checkpoint: Best checkpoint so far
+        window: Number of checkpoints averaged at the end of training
+        protected: Other checkpoints that must not be deleted (e.g. still
+            being uploaded or evaluated)
+
+    Returns:
+        Deleted checkpoint directories
+    """
+    if not save_total_limit:
+        return []
+    checkpoints = [os.path.normpath(path) for path in list_checkpoints(output_dir)]
+    keep = {os.path.normpath(path) for path in protected}
+    keep.update(checkpoints[-max(window, 1):])
+    if best_model_checkpoint is not None:
+        best = os.path.normpath(best_model_checkpoint)
+        if best in checkpoints:
+            end = checkpoints.index(best) + 1
+            keep.update(checkpoints[max(0, end - window):end])
+    remaining = len(checkpoints)
+    target = max(save_total_limit, len(keep.intersection(checkpoints)))
+    deleted = []
+    for checkpoint_dir in checkpoints:
+        if remaining <= target:
+            break
+        if checkpoint_dir not in keep:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            deleted.append(checkpoint_dir)
+            remaining -= 1
+    return deleted
+
+
+def load_checkpoint_state_dict(checkpoint_dir: str) -> Dict[str, torch.Tensor]:
+    """
+    Load model weights from a checkpoint directory on CPU.
+
+    Supports single-file and sharded safetensors checkpoints as well as
+    legacy ``pytorch_model.bin`` files.
+
+    Args:
+        checkpoint_dir: Checkpoint directory
+
+    Returns:
+        State dict of the saved model
+
+    Raises:
+        FileNotFoundError: If no weights file is found
+    """
+    single = os.path.join(checkpoint_dir, "model.safetensors")
+    if os.path.exists(single):
+        return load_file(single, device="cpu")
+
+    index_path = os.path.join(checkpoint_dir, "model.safetensors.index.json")
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            shards = sorted(set(json.load(f)["weight_map"].values()))
+        state_dict = {}
+        for shard in shards:
+            state_dict.update(load_file(os.path.join(checkpoint_dir, shard), device="cpu"))
+        return state_dict
+
+    legacy = os.path.join(checkpoint_dir, "pytorch_model.bin")
+    if os.path.exists(legacy):
+        return torch.load(legacy, map_location="cpu", weights_only=True)
+
+    raise FileNotFoundError(f"No model weights found in {checkpoint_dir}.")
+
+
+def average_checkpoints(checkpoint_dirs: List[str]) -> Dict[str, torch.Tensor]:
+    """
+    Average the weights of several checkpoints of the same model.
+
+    Floating-point tensors are averaged in float32 and cast back to their
+    saved dtype; other tensors (e.g. integer buffers) are taken from the
+    last checkpoint. Only one extra state dict is held in memory at a time.
+
+    Args:
+        checkpoint_dirs: Checkpoint directories (at least one)
+
+    Returns:
+        Averaged state dict
+
+    Raises:
+        ValueError: If no checkpoint is given or their parameters differ
+    """
+    if not checkpoint_dirs:
+        raise ValueError("At least one checkpoint is required for averaging.")
+
+    averaged = {}
+    dtypes = {}
+    for checkpoint_dir in checkpoint_dirs:
+        state_dict = load_checkpoint_state_dict(checkpoint_dir)
+        if averaged and set(state_dict) != set(averaged):
+            raise ValueError(f"Checkpoint {checkpoint_dir} does not match the other checkpoints.")
+        for name, tensor in state_dict.items():
+            if not tensor.is_floating_point():
+                averaged[name] = tensor
+            elif name not in averaged:
+                dtypes[name] = tensor.dtype
+                averaged[name] = tensor.to(torch.float32)
+            else:
+                averaged[name] += tensor.to(torch.float32)
+        del state_dict
+
+    count = len(checkpoint_dirs)
+    for name, dtype in dtypes.items():
+        averaged[name] = (averaged[name] / count).to(dtype)
+    return averaged
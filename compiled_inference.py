@@ -0,0 +1,238 @@
+"""
+Compiled inference module for the French-Wolof Translator.
+Runs generation through ``torch.compile`` with shape-bucketed inputs.
+
+Compiled graphs are specialized to tensor shapes, so inputs are padded to
+a small set of sequence-length and batch-size buckets and decoding uses a
+static (preallocated) KV cache. Every bucket then reuses the same few
+graphs instead of recompiling for each new input shape or decoding step.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import torch
+import torch._dynamo
+
+
+def bucket_for(value: int, buckets: List[int]) -> int:
+    """
+    Find the smallest bucket that fits a value.
+
+    Args:
+        value: Sequence length or batch size
+        buckets: Sorted bucket sizes
+
+    Returns:
+        The bucket size
+
+    Raises:
+        ValueError: If the value exceeds the largest bucket
+    """
+    for bucket in buckets:
+        if value <= bucket:
+            return bucket
+    raise ValueError(f"{value} exceeds the largest bucket ({buckets[-1]}).")
+
+
+class CompiledInference:
+    """Compiles a seq2seq model and pads its generate inputs to fixed buckets."""
+
+    def __init__(
+        self,
+        model,
+        length_buckets: List[int],
+        batch_buckets: List[int],
+        pad_token_id: int
+    ):
+        """
+        Compile the model's encoder and decoding step.
+
+        Compilation itself is lazy; call ``warm_up`` to compile every bucket
+        ahead of the first request.
+
+        Args:
+            model: Seq2seq model in eval mode
+            length_buckets: Padded source lengths (the last one must cover
+                the tokenizer's max_length)
+            batch_buckets: Padded batch sizes
+            pad_token_id: Token used for padding
+        """
+        self.model = model
+        self.length_buckets = sorted(set(length_buckets))
+        self.batch_buckets = sorted(set(batch_buckets))
+        self.pad_token_id = pad_token_id
+        self.compile_seconds = 0.0
+
+        # Each bucket compiles a few graphs (first step vs later steps)
+        num_buckets = len(self.length_buckets) * len(self.batch_buckets)
+        torch._dynamo.config.cache_size_limit = max(
+            torch._dynamo.config.cache_size_limit, 4 * num_buckets
+        )
+        encoder = model.get_encoder()
+        self._modules = [model, encoder]
+        self._eager_forwards = [module.forward for module in self._modules]
+        for module, forward in zip(self._modules, self._eager_forwards):
+            module.forward = torch.compile(forward, dynamic=False)
+        self._compiled_forwards = [module.forward for module in self._modules]
+
+    @property
+    def max_batch_size(self) -> int:
+        """Largest batch that fits a bucket."""
+        return self.batch_buckets[-1]
+
+    @contextmanager
+    def eager(self) -> Iterator[None]:
+        """Temporarily run the model without compilation."""
+        for module, forward in zip(self._modules, self._eager_forwards):
+            module.forward = forward
+        try:
+            yield
+        finally:
+            for module, forward in zip(self._modules, self._compiled_forwards):
+                module.forward = forward
+
+    def pad(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """
+        Pad a tokenized batch to its length and batch-size buckets.
+
+        Extra rows repeat the last real row (an all-padding row would give
+        a fully masked attention); they are dropped after generation.
+
+        Args:
+            inputs: Tokenizer output with input_ids and attention_mask
+
+        Returns:
+            Padded inputs
+        """
+        input_ids = inputs["input_ids"]
+        attention_mask = inputs["attention_mask"]
+        batch_size, length = input_ids.shape
+        length_bucket = bucket_for(length, self.length_buckets)
+        batch_bucket = bucket_for(batch_size, self.batch_buckets)
+
+        if length_bucket > length:
+            extra = length_bucket - length
+            input_ids = torch.nn.functional.pad(input_ids, (0, extra), value=self.pad_token_id)
+            attention_mask = torch.nn.functional.pad(attention_mask, (0, extra), value=0)
+        if batch_bucket > batch_size:
+            repeat = [batch_size - 1] * (batch_bucket - batch_size)
+            rows = torch.cat([torch.arange(batch_size), torch.tensor(repeat, dtype=torch.long)])
+            input_ids = input_ids[rows.to(input_ids.device)]
+            attention_mask = attention_mask[rows.to(attention_mask.device)]
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+    def generate(self, inputs: Dict[str, torch.Tensor], **generate_kwargs) -> torch.Tensor:
+        """
+        Generate with bucketed inputs and a static KV cache.
+
+        Args:
+            inputs: Tokenizer output with input_ids and attention_mask
+            **generate_kwargs: Arguments forwarded to ``model.generate``
+
+        Returns:
+            Generated token IDs for the real rows only (or, with
+            ``return_dict_in_generate``, the output with its sequences,
+            sequence scores and per-step scores cut to the real rows)
+        """
+        batch_size = inputs["input_ids"].shape[0]
+        outputs = self.model.generate(
+            **self.pad(inputs),
+            cache_implementation="static",
+            **generate_kwargs
+        )
+        if not generate_kwargs.get("return_dict_in_generate"):
+            return outputs[:batch_size]
+        # Rows are grouped per input, so the real rows come first
+        num_sequences = batch_size * (generate_kwargs.get("num_return_sequences") or 1)
+        num_beam_rows = batch_size * (generate_kwargs.get("num_beams") or 1)
+        outputs.sequences = outputs.sequences[:num_sequences]
+        if getattr(outputs, "sequences_scores", None) is not None:
+            outputs.sequences_scores = outputs.sequences_scores[:num_sequences]
+        if getattr(outputs, "beam_indices", None) is not None:
+            outputs.beam_indices = outputs.beam_indices[:num_sequences]
+        if outputs.scores is not None:
+            outputs.scores = tuple(step[:num_beam_rows] for step in outputs.scores)
+        return outputs
+
+    def warm_up(self, device: Optional[torch.device] = None, **generate_kwargs) -> float:
+        """
+        Compile every bucket ahead of time.
+
+        Each bucket runs twice: the first call compiles the graphs for an
+        empty cache, the second those for a cache reused across calls.
+
+        Args:
+            device: Device of the dummy inputs (model device if None)
+            **generate_kwargs: Decoding arguments used later (beam size,
+                max length); other values compile on first use
+
+        Returns:
+            Total compile (warm-up) time in seconds
+        """
+        device = device or self.model.device
+        start = time.perf_counter()
+        for batch_size in self.batch_buckets:
+            for length in self.length_buckets:
+                input_ids = torch.full((batch_size, length), self.pad_token_id, dtype=torch.long, device=device)
+                input_ids[:, 0] = self.model.config.eos_token_id
+                attention_mask = torch.zeros_like(input_ids)
+                attention_mask[:, 0] = 1
+                inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+                with torch.no_grad():
+                    for _ in range(2):
+                        self.generate(inputs, **generate_kwargs)
+        self.compile_seconds = time.perf_counter() - start
+        return self.compile_seconds
+
+
+def benchmark_compiled(
+    translator,
+    texts: List[str],
+    source_lang: str = "fr",
+    repeats: int = 3
+) -> Dict[str, float]:
+    """
+    Compare steady-state compiled translation against eager translation.
+
+    Args:
+        translator: FrenchWolofTranslator loaded with ``compile`` enabled
+            (and warmed up)
+        texts: Texts to translate
+        source_lang: Source language code
+        repeats: Timed repetitions per mode (the fastest is kept)
+
+    Returns:
+        Dictionary with compile time, eager and compiled timings, speedup
+        and whether the outputs matched
+
+    Raises:
+        ValueError: If the translator was loaded without compilation
+    """
+    compiled = translator.compiled
+    if compiled is None:
+        raise ValueError("The translator was loaded without compile enabled.")
+
+    def timed():
+        best, outputs = float("inf"), None
+        for _ in range(max(1, repeats)):
+            start = time.perf_counter()
+            outputs = translator.translate_batch(texts, source_lang=source_lang)
+            best = min(best, time.perf_counter() - start)
+        return best, outputs
+
+    translator.compiled = None
+    try:
+        with compiled.eager():
+            eager_time, eager_outputs = timed()
+    finally:
+        translator.compiled = compiled
+    compiled_time, compiled_outputs = timed()
+
+    return {
+        "compile_seconds": round(compiled.compile_seconds, 4),
+        "eager_seconds": round(eager_time, 4),
+        "compiled_seconds": round(compiled_time, 4),
+        "speedup": round(eager_time / compiled_time, 4) if compiled_time else 0.0,
+        "identical_outputs": eager_outputs == compiled_outputs,
+    }
@@ -2,8 +2,10 @@
 Configuration settings for the French-Wolof Translator.
 Centralizes all configuration parameters for easy modification.
 """
-from dataclasses import dataclass
-from typing import Optional
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
 
 @dataclass
@@ -14,6 +16,17 @@ class ModelConfig:
     target_lang: str = "wolof"
     max_length: int = 128
     max_generation_length: int = 30
+    num_beams: int = 5
+    # Small seq2seq model sharing the tokenizer, used for speculative decoding
+    draft_checkpoint: Optional[str] = None  # Override with DRAFT_MODEL_CHECKPOINT env var
+    # Classifier used for source_lang="auto" (trained with language_id.py)
+    language_id_path: Optional[str] = None  # Override with LANGUAGE_ID_MODEL env var
+    # Opt-in torch.compile inference with inputs padded to fixed buckets
+    compile: bool = False  # Override with TORCH_COMPILE env var
+    length_buckets: List[int] = field(default_factory=lambda: [16, 32, 64, 128])  # Capped at max_length
+    batch_buckets: List[int] = field(default_factory=lambda: [1, 4, 8, 16])
+    # Opt-in decoding loop dropping finished sentences and using a static KV cache
+    decoding_engine: bool = False  # Override with DECODING_ENGINE env var
     
     def __post_init__(self):
         """Override with environment variables if available."""
@@ -22,6 +35,16 @@ class ModelConfig:
             checkpoint = EnvConfig.MODEL_CHECKPOINT()
             if checkpoint:
                 self.checkpoint = checkpoint
+            draft_checkpoint = EnvConfig.DRAFT_MODEL_CHECKPOINT()
+            if draft_checkpoint:
+                self.draft_checkpoint = draft_checkpoint
+            language_id_path = EnvConfig.LANGUAGE_ID_MODEL()
+            if language_id_path:
+                self.language_id_path = language_id_path
+            if EnvConfig.TORCH_COMPILE():
+                self.compile = True
+            if EnvConfig.DECODING_ENGINE():
+                self.decoding_engine = True
         except ImportError:
             pass  # env_config not available, use default
 
@@ -37,10 +60,33 @@ class TrainingConfig:
     weight_decay: float = 0.01
     save_total_limit: int = 3
     num_train_epochs: int = 2  # Override with NUM_TRAIN_EPOCHS env var
+    max_steps: int = -1  # Required (> 0) for streaming datasets; override with MAX_STEPS env var
     fp16: bool = True
+    bf16: bool = False  # bfloat16 mixed precision (CPU or Ampere+ GPUs); use instead of fp16
+    gradient_checkpointing: bool = False  # Recompute activations in backward to save memory
     push_to_hub: bool = False
     hub_model_id: Optional[str] = None  # Auto-set from HUB_USERNAME/HUB_MODEL_NAME env vars
     hub_token: Optional[str] = None  # Override with HF_TOKEN env var
+    # Checkpoints serialized and uploaded in background threads
+    async_checkpointing: bool = False  # Override with ASYNC_CHECKPOINTING env var
+    hub_local_dir: Optional[str] = None  # Local directory standing in for the Hub; override with HUB_LOCAL_DIR env var
+    upload_max_retries: int = 5  # Upload attempts after the first failure
+    upload_retry_seconds: float = 2.0  # First retry delay, doubled after every failure
+    # Cheap in-training evaluation, early stopping and final model selection
+    eval_steps: Optional[int] = None  # Evaluate (and save) every N steps; override with EVAL_STEPS env var
+    eval_subset_size: Optional[int] = None  # Fixed dev subset used during training; override with EVAL_SUBSET_SIZE env var
+    eval_num_beams: int = 1  # Greedy decoding keeps evaluation cheap
+    eval_max_length: Optional[int] = None  # Generation length cap during evaluation (model default if None)
+    metric_for_best_model: str = "bleu"  # "bleu" or "chrf"
+    # Evaluation by eval_worker.py in a separate process; training only writes checkpoints
+    external_evaluation: bool = False  # Override with EXTERNAL_EVALUATION env var
+    external_eval_wait_seconds: float = 600.0  # Wait at the end of training for checkpoints still being evaluated
+    early_stopping_patience: Optional[int] = None  # Evaluations without improvement; override with EARLY_STOPPING_PATIENCE env var
+    early_stopping_threshold: float = 0.0  # Minimum improvement that resets patience
+    average_last_checkpoints: int = 0  # Average the last N checkpoints into the final model; override with AVERAGE_CHECKPOINTS env var
+    prediction_store_dir: Optional[str] = None  # Cache of evaluation predictions; override with PREDICTION_STORE_DIR env var
+    profile_training: bool = False  # Step time/throughput/memory profile; override with PROFILE_TRAINING env var
+    stall_factor: float = 3.0  # A step slower than this multiple of the recent median is a stall
     
     def __post_init__(self):
         """Override with environment variables if available."""
@@ -55,6 +101,33 @@ class TrainingConfig:
             num_epochs = EnvConfig.NUM_TRAIN_EPOCHS()
             if num_epochs:
                 self.num_train_epochs = num_epochs
+            max_steps = EnvConfig.MAX_STEPS()
+            if max_steps:
+                self.max_steps = max_steps
+            eval_steps = EnvConfig.EVAL_STEPS()
+            if eval_steps:
+                self.eval_steps = eval_steps
+            eval_subset_size = EnvConfig.EVAL_SUBSET_SIZE()
+            if eval_subset_size:
+                self.eval_subset_size = eval_subset_size
+            patience = EnvConfig.EARLY_STOPPING_PATIENCE()
+            if patience:
+                self.early_stopping_patience = patience
+            average_checkpoints = EnvConfig.AVERAGE_CHECKPOINTS()
+            if average_checkpoints:
+                self.average_last_checkpoints = average_checkpoints
+            prediction_store_dir = EnvConfig.PREDICTION_STORE_DIR()
+            if prediction_store_dir:
+                self.prediction_store_dir = prediction_store_dir
+            if EnvConfig.PROFILE_TRAINING():
+                self.profile_training = True
+            if EnvConfig.ASYNC_CHECKPOINTING():
+                self.async_checkpointing = True
+            if EnvConfig.EXTERNAL_EVALUATION():
+                self.external_evaluation = True
+            hub_local_dir = EnvConfig.HUB_LOCAL_DIR()
+            if hub_local_dir:
+                self.hub_local_dir = hub_local_dir
             hf_token = EnvConfig.HF_TOKEN()
             if hf_token:
                 self.hub_token = hf_token
@@ -71,6 +144,19 @@ class DatasetConfig:
     test_size: float = 0.2
     prefix_fr_to_wo: str = "translate French to Wolof: "
     prefix_wo_to_fr: str = "translate Wolof to French: "
+    # Streaming mode: read local shards (JSONL/TSV/Parquet) lazily instead of
+    # materializing the whole corpus in memory.
+    streaming: bool = False  # Override with DATASET_STREAMING env var
+    data_files: Optional[List[str]] = None  # Paths or globs; override with DATA_FILES env var
+    shuffle_buffer_size: int = 10000
+    seed: int = 42
+    # Synthetic (back-translated) pairs mixed into the train split only
+    synthetic_data_files: Optional[List[str]] = None  # Override with SYNTHETIC_DATA_FILES env var
+    synthetic_ratio: float = 0.0  # Share of synthetic pairs in train; override with SYNTHETIC_RATIO env var
+    # Pre-tokenized binary copy of the prepared dataset, written on first use
+    binary_dataset_dir: Optional[str] = None  # Override with BINARY_DATASET_DIR env var
+    # Pack several short train pairs per row (in-memory datasets only)
+    packing: bool = False  # Override with SEQUENCE_PACKING env var
     
     def __post_init__(self):
         """Override with environment variables if available."""
@@ -79,10 +165,304 @@ class DatasetConfig:
             dataset_name = EnvConfig.DATASET_NAME()
             if dataset_name:
                 self.dataset_name = dataset_name
+            if EnvConfig.DATASET_STREAMING():
+                self.streaming = True
+            data_files = EnvConfig.DATA_FILES()
+            if data_files:
+                self.data_files = data_files
+            synthetic_data_files = EnvConfig.SYNTHETIC_DATA_FILES()
+            if synthetic_data_files:
+                self.synthetic_data_files = synthetic_data_files
+            synthetic_ratio = EnvConfig.SYNTHETIC_RATIO()
+            if synthetic_ratio is not None:
+                self.synthetic_ratio = synthetic_ratio
+            binary_dataset_dir = EnvConfig.BINARY_DATASET_DIR()
+            if binary_dataset_dir:
+                self.binary_dataset_dir = binary_dataset_dir
+            if EnvConfig.SEQUENCE_PACKING():
+                self.packing = True
         except ImportError:
             pass  # env_config not available, use default
 
 
+@dataclass
+class CorpusFilterConfig:
+    """Corpus deduplication and filtering configuration."""
+    enabled: bool = False  # Override with CORPUS_FILTER_ENABLED env var
+    num_proc: int = 1  # Override with CORPUS_FILTER_NUM_PROC env var
+    chunk_size: int = 1000  # Pairs per worker task
+    near_duplicates: bool = True
+    num_perm: int = 64  # MinHash permutations
+    lsh_bands: int = 16  # Must divide num_perm
+    shingle_size: int = 5  # Character n-gram size for MinHash
+    near_duplicate_threshold: float = 0.8  # Estimated Jaccard similarity
+    min_words: int = 1
+    max_words: int = 200
+    max_length_ratio: float = 3.0
+    language_filter: bool = True
+    report_path: Optional[str] = None  # Override with CORPUS_FILTER_REPORT env var
+    seed: int = 42
+    
+    def __post_init__(self):
+        """Override with environment variables if available."""
+        try:
+            from env_config import EnvConfig
+            if EnvConfig.CORPUS_FILTER_ENABLED():
+                self.enabled = True
+            num_proc = EnvConfig.CORPUS_FILTER_NUM_PROC()
+            if num_proc:
+                self.num_proc = num_proc
+            report_path = EnvConfig.CORPUS_FILTER_REPORT()
+            if report_path:
+                self.report_path = report_path
+        except ImportError:
+            pass  # env_config not available, use defaults
+
+
+@dataclass
+class BackTranslationConfig:
+    """Back-translation job configuration."""
+    input_files: Optional[List[str]] = None  # Monolingual shards (.txt or .jsonl with a "text" field)
+    output_dir: str = "back_translated"
+    monolingual_lang: str = "wo"  # Language of the monolingual text ('wo' or 'fr')
+    model_checkpoint: Optional[str] = None  # Defaults to ModelConfig.checkpoint
+    batch_size: int = 32
+    bucket_size: int = 1024  # Lines sorted by length together before batching
+    num_workers: Optional[int] = None  # Processes, each with its own model copy (None: INFERENCE_WORKERS env var, else tuned value, else 1)
+    device: Optional[str] = None
+    
+    def __post_init__(self):
+        """Fill an unset worker count from the environment, then from the tuned settings file."""
+        if self.num_workers is not None:
+            return
+        try:
+            from env_config import EnvConfig
+            self.num_workers = EnvConfig.INFERENCE_WORKERS()
+        except ImportError:
+            pass  # env_config not available, use defaults
+        if self.num_workers is None:
+            tuned = load_inference_settings(InferenceConfig().settings_path)
+            if tuned.get("num_workers") is not None:
+                self.num_workers = int(tuned["num_workers"])
+
+
+@dataclass
+class PruningConfig:
+    """Decoder pruning configuration."""
+    levels: Optional[List[int]] = None  # Decoder depths to produce (e.g. [6, 3, 2, 1])
+    merge_layers: bool = False  # Average dropped layers into their nearest kept layer instead of discarding them
+    heads_to_prune: int = 0  # Attention heads zeroed per decoder attention module (lowest output norm first)
+    recovery_steps: int = 0  # Recovery fine-tuning steps per level via ModelTrainer (0 disables)
+    output_dir: str = "pruned"
+    source_lang: str = "fr"  # Evaluation direction
+    eval_samples: int = 200  # Test pairs scored with BLEU/chrF per level
+    latency_samples: int = 50  # Sentences decoded one at a time for latency per token
+    device: Optional[str] = None
+
+
+@dataclass
+class BenchmarkConfig:
+    """Training-path benchmark configuration."""
+    tokenizer: Optional[str] = None  # Tokenizer checkpoint (defaults to ModelConfig.checkpoint)
+    batch_sizes: List[int] = field(default_factory=lambda: [8, 32])
+    seq_lengths: List[int] = field(default_factory=lambda: [32, 128])
+    precisions: List[str] = field(default_factory=lambda: ["fp32", "bf16"])  # fp32, bf16, fp16 (fp16 needs CUDA)
+    gradient_checkpointing: List[bool] = field(default_factory=lambda: [False, True])
+    preprocess_pairs: int = 2000  # Pairs tokenized by the preprocessing benchmark
+    collate_batches: int = 50  # Batches collated per collation measurement
+    warmup_steps: int = 2
+    measure_steps: int = 10  # Timed forward/backward steps per combination
+    # Tiny NLLB-shaped model (same architecture and tokenizer, few small layers)
+    d_model: int = 64
+    layers: int = 2  # Encoder and decoder layers each
+    attention_heads: int = 4
+    ffn_dim: int = 256
+    regression_threshold: float = 0.1  # Relative slowdown flagged as a regression
+    seed: int = 42
+
+
+@dataclass
+class SchedulerConfig:
+    """Inference scheduler configuration."""
+    max_batch_size: int = 16
+    max_queue_size: int = 1024  # Requests beyond this are rejected outright
+    max_wait_ms: float = 5.0  # Time the worker waits for a batch to fill
+    default_timeout: Optional[float] = None  # Seconds to deadline when a request sets none
+    downgrade: bool = True  # Try cheaper decoding before rejecting a late request
+    downgrade_max_length: int = 20  # Generation length cap of downgraded requests (greedy)
+    downgrade_cost_ratio: float = 0.3  # Initial guess of downgraded vs full batch latency
+    initial_batch_seconds: float = 0.5  # Batch latency estimate until one is measured
+    latency_smoothing: float = 0.2  # Weight of the newest batch in the latency average
+
+
+@dataclass
+class LoadTestConfig:
+    """Load test configuration (load_test.py)."""
+    rates: Optional[List[float]] = None  # Open-loop arrival rates in requests/s, one step each
+    concurrency: Optional[List[int]] = None  # Closed-loop client counts, one step each (used if no rates)
+    duration: float = 30.0  # Seconds per step
+    max_requests: Optional[int] = None  # Stop a step after this many requests (None: duration only)
+    arrivals: str = "poisson"  # Open-loop arrival process: "poisson" or "constant"
+    speedup: float = 1.0  # Time compression when replaying logged timestamps
+    warmup_requests: int = 5  # Sequential requests sent before measuring (not reported)
+    request_timeout: float = 60.0  # Seconds before a request counts as a timeout error
+    max_in_flight: int = 256  # Client threads for open-loop steps
+    source_lang: str = "fr"  # For log records and corpus sentences without a language
+    seed: int = 42
+
+
+@dataclass
+class ModelRegistryConfig:
+    """Multi-model registry configuration."""
+    memory_budget_mb: Optional[float] = None  # Weights kept loaded (None: no limit); override with MODEL_REGISTRY_MEMORY_MB env var
+    device: Optional[str] = None  # Default device of registered models
+    
+    def __post_init__(self):
+        """Override with environment variables if available."""
+        try:
+            from env_config import EnvConfig
+            memory_budget_mb = EnvConfig.MODEL_REGISTRY_MEMORY_MB()
+            if memory_budget_mb is not None:
+                self.memory_budget_mb = memory_budget_mb
+        except ImportError:
+            pass  # env_config not available, use defaults
+
+
+@dataclass
+class HotReloadConfig:
+    """Hot model reload configuration."""
+    canary_path: Optional[str] = None  # JSONL of french/wolof pairs checked before a swap; override with HOT_RELOAD_CANARY env var
+    canary_size: int = 32  # Canary pairs used (first N of the file)
+    min_canary_chrf: Optional[float] = None  # Absolute chrF floor on the canary set (None: no floor)
+    max_chrf_drop: Optional[float] = 5.0  # Largest chrF drop vs the serving model; override with HOT_RELOAD_MAX_CHRF_DROP env var
+    drain_timeout: float = 60.0  # Seconds to wait for in-flight requests on the old model
+    
+    def __post_init__(self):
+        """Override with environment variables if available."""
+        try:
+            from env_config import EnvConfig
+            canary_path = EnvConfig.HOT_RELOAD_CANARY()
+            if canary_path:
+                self.canary_path = canary_path
+            max_chrf_drop = EnvConfig.HOT_RELOAD_MAX_CHRF_DROP()
+            if max_chrf_drop is not None:
+                self.max_chrf_drop = max_chrf_drop
+        except ImportError:
+            pass  # env_config not available, use defaults
+
+
+@dataclass
+class TranslationMemoryConfig:
+    """Translation memory configuration."""
+    path: Optional[str] = None  # Saved memory directory; override with TRANSLATION_MEMORY_PATH env var
+    fuzzy_threshold: float = 0.8  # Minimum char n-gram cosine similarity of lookup_fuzzy suggestions; override with TRANSLATION_MEMORY_FUZZY_THRESHOLD env var
+    ngram_size: int = 3
+    
+    def __post_init__(self):
+        """Override with environment variables if available."""
+        try:
+            from env_config import EnvConfig
+            path = EnvConfig.TRANSLATION_MEMORY_PATH()
+            if path:
+                self.path = path
+            fuzzy_threshold = EnvConfig.TRANSLATION_MEMORY_FUZZY_THRESHOLD()
+            if fuzzy_threshold is not None:
+                self.fuzzy_threshold = fuzzy_threshold
+        except ImportError:
+            pass  # env_config not available, use defaults
+
+
+def load_inference_settings(settings_path: Optional[str]) -> Dict[str, Any]:
+    """
+    Read the tuned settings file written by autotune.py.
+    
+    Args:
+        settings_path: Settings file
+        
+    Returns:
+        Tuned settings ({} if the file does not exist)
+    """
+    if not settings_path or not os.path.isfile(settings_path):
+        return {}
+    with open(settings_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@dataclass
+class InferenceConfig:
+    """Translator CPU inference settings, usually written by autotune.py and loaded at startup."""
+    settings_path: str = "inference_settings.json"  # Tuned settings file; override with INFERENCE_SETTINGS_PATH env var
+    intra_op_threads: Optional[int] = None  # torch intra-op threads per process; override with TORCH_INTRA_OP_THREADS env var
+    inter_op_threads: Optional[int] = None  # torch inter-op threads per process; override with TORCH_INTER_OP_THREADS env var
+    batch_size: Optional[int] = None  # Default translate_batch batch size; override with INFERENCE_BATCH_SIZE env var
+    
+    def __post_init__(self):
+        """Fill unset values from environment variables, then from the tuned settings file.
+        
+        Values passed explicitly are never overridden.
+        """
+        overrides = {}
+        try:
+            from env_config import EnvConfig
+            settings_path = EnvConfig.INFERENCE_SETTINGS_PATH()
+            if settings_path:
+                self.settings_path = settings_path
+            overrides = {
+                "intra_op_threads": EnvConfig.TORCH_INTRA_OP_THREADS(),
+                "inter_op_threads": EnvConfig.TORCH_INTER_OP_THREADS(),
+                "batch_size": EnvConfig.INFERENCE_BATCH_SIZE(),
+            }
+        except ImportError:
+            pass  # env_config not available, use defaults
+        
+        tuned = load_inference_settings(self.settings_path)
+        for name in ("intra_op_threads", "inter_op_threads", "batch_size"):
+            if getattr(self, name) is not None:
+                continue
+            if overrides.get(name) is not None:
+                setattr(self, name, overrides[name])
+            elif tuned.get(name) is not None:
+                setattr(self, name, int(tuned[name]))
+
+
+@dataclass
+class AutotuneConfig:
+    """Inference autotuning grid (autotune.py)."""
+    intra_op_threads: Optional[List[int]] = None  # None: powers of two up to the CPU count
+    inter_op_threads: List[int] = field(default_factory=lambda: [1, 2])
+    num_workers: Optional[List[int]] = None  # None: powers of two up to half the CPU count
+    batch_sizes: List[int] = field(default_factory=lambda: [1, 4, 8, 16, 32])
+    max_total_threads: Optional[int] = None  # Skip workers x intra-op threads above this (None: CPU count)
+    sample_size: int = 128  # Sentences translated per measurement, drawn from the input text
+    warmup_batches: int = 2
+    source_lang: str = "fr"
+    output_path: Optional[str] = None  # Defaults to InferenceConfig.settings_path
+    seed: int = 42
+
+
+@dataclass
+class EvalWorkerConfig:
+    """Out-of-band checkpoint evaluation (eval_worker.py)."""
+    test_path: Optional[str] = None  # JSONL of french/wolof pairs; override with EVAL_WORKER_TEST_FILE env var
+    max_samples: Optional[int] = None  # First N pairs of the test file (all if None)
+    source_lang: str = "fr"  # Evaluation direction
+    num_beams: Optional[int] = None  # ModelConfig.num_beams if None
+    max_length: Optional[int] = None  # ModelConfig.max_length if None
+    batch_size: Optional[int] = None  # InferenceConfig batch size if None
+    metric: str = "bleu"  # "bleu" or "chrf", reported as the best
+    poll_seconds: float = 30.0  # Delay between scans of the output directory
+    
+    def __post_init__(self):
+        """Override with environment variables if available."""
+        try:
+            from env_config import EnvConfig
+            test_path = EnvConfig.EVAL_WORKER_TEST_FILE()
+            if test_path:
+                self.test_path = test_path
+        except ImportError:
+            pass  # env_config not available, use defaults
+
+
 @dataclass
 class WandbConfig:
     """Weights & Biases configuration."""
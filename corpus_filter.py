@@ -0,0 +1,536 @@
+"""
+Corpus filtering module for the French-Wolof Translator.
+Removes exact and near-duplicate pairs, badly aligned or mislabeled pairs,
+and train/test leakage before tokenization.
+"""
+import hashlib
+import json
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from datasets import Dataset, DatasetDict, IterableDataset, IterableDatasetDict
+
+from config import CorpusFilterConfig, ModelConfig
+
+
+# Dataset column name -> language code used by the language identifier
+COLUMN_LANGUAGES = {
+    "french": "fr",
+    "wolof": "wo",
+}
+
+# Frequent function words, used by the default language identifier
+STOPWORDS = {
+    "fr": {
+        "le", "la", "les", "des", "une", "est", "et", "dans", "pour", "que",
+        "qui", "pas", "avec", "sur", "vous", "nous", "je", "il", "elle", "ce",
+    },
+    "wo": {
+        "ak", "ci", "mu", "dafa", "dama", "nga", "ngi", "bi", "yi", "ba",
+        "la", "ñu", "dinaa", "dina", "naka", "def", "waaw", "deedeet", "yow", "ma",
+    },
+}
+
+# Mersenne prime used by the MinHash universal hash family
+MINHASH_PRIME = (1 << 31) - 1
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for duplicate detection.
+
+    Applies NFKC normalization, lowercasing, punctuation removal and
+    whitespace collapsing, so trivially different copies hash the same.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def text_key(text: str) -> bytes:
+    """
+    Compute a compact, stable hash key for an already normalized text.
+
+    Args:
+        text: Normalized text
+
+    Returns:
+        8-byte digest
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+class StopwordLanguageIdentifier:
+    """Cheap French/Wolof identifier based on function-word counts."""
+
+    def __call__(self, text: str) -> Optional[str]:
+        """
+        Identify the language of a text.
+
+        Args:
+            text: Text to identify
+
+        Returns:
+            'fr', 'wo', or None when there is no clear evidence either way
+        """
+        words = normalize_text(text).split()
+        scores = {
+            lang: sum(1 for word in words if word in stopwords)
+            for lang, stopwords in STOPWORDS.items()
+        }
+        best = max(scores, key=scores.get)
+        if scores[best] == 0 or list(scores.values()).count(scores[best]) > 1:
+            return None
+        return best
+
+
+class MinHasher:
+    """Computes MinHash signatures over character n-gram shingles."""
+
+    def __init__(self, num_perm: int, shingle_size: int, seed: int = 42):
+        """
+        Initialize the hasher.
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            shingle_size: Character n-gram size
+            seed: Seed for the permutation parameters
+        """
+        rng = np.random.RandomState(seed)
+        self.shingle_size = shingle_size
+        self.a = rng.randint(1, MINHASH_PRIME, size=(num_perm, 1)).astype(np.uint64)
+        self.b = rng.randint(0, MINHASH_PRIME, size=(num_perm, 1)).astype(np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a normalized text.
+
+        Args:
+            text: Normalized text
+
+        Returns:
+            uint32 array of length num_perm
+        """
+        n = self.shingle_size
+        shingles = {text[i:i + n] for i in range(max(len(text) - n + 1, 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) % MINHASH_PRIME for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (self.a * hashes[None, :] + self.b) % MINHASH_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+class MinHashLSH:
+    """Banded locality-sensitive hashing index over MinHash signatures."""
+
+    def __init__(self, num_perm: int, bands: int, threshold: float):
+        """
+        Initialize the index.
+
+        Args:
+            num_perm: Signature length
+            bands: Number of LSH bands (must divide num_perm)
+            threshold: Minimum estimated Jaccard similarity for a match
+
+        Raises:
+            ValueError: If bands does not divide num_perm
+        """
+        if num_perm % bands != 0:
+            raise ValueError(f"lsh_bands ({bands}) must divide num_perm ({num_perm}).")
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        # All signatures per band key: a query may share a band with several
+        # entries, of which only a later one is similar enough
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self.signatures: List[np.ndarray] = []
+
+    def _band_keys(self, signature: np.ndarray) -> Iterator[Tuple[int, bytes]]:
+        for band in range(len(self.buckets)):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature: np.ndarray) -> bool:
+        """
+        Check whether a near-duplicate of the signature is indexed.
+
+        Candidates sharing at least one band are verified against the
+        similarity threshold to discard accidental bucket collisions.
+
+        Args:
+            signature: MinHash signature
+
+        Returns:
+            True if an indexed signature is similar enough
+        """
+        checked = set()
+        for band, key in self._band_keys(signature):
+            for candidate in self.buckets[band].get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                similarity = np.mean(self.signatures[candidate] == signature)
+                if similarity >= self.threshold:
+                    return True
+        return False
+
+    def insert(self, signature: np.ndarray) -> None:
+        """
+        Add a signature to the index.
+
+        Args:
+            signature: MinHash signature
+        """
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        for band, key in self._band_keys(signature):
+            self.buckets[band].setdefault(key, []).append(index)
+
+
+@dataclass
+class FilterReport:
+    """Summary of what the corpus filter removed, per split."""
+    splits: Dict[str, Counter] = field(default_factory=dict)
+
+    def record(self, split: str, reason: Optional[str]) -> None:
+        """
+        Record the outcome for one pair.
+
+        Args:
+            split: Split name
+            reason: Removal reason, or None if the pair was kept
+        """
+        counts = self.splits.setdefault(split, Counter())
+        counts["total"] += 1
+        counts["kept" if reason is None else reason] += 1
+
+    def reset(self, split: str) -> None:
+        """
+        Clear the counts of a split (before re-filtering it).
+
+        Args:
+            split: Split name
+        """
+        self.splits[split] = Counter()
+
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        """
+        Convert the report to a plain dictionary.
+
+        Returns:
+            Mapping of split name to outcome counts
+        """
+        return {split: dict(counts) for split, counts in self.splits.items()}
+
+    def save(self, path: str) -> None:
+        """
+        Write the report as JSON.
+
+        Args:
+            path: Output file path
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self) -> str:
+        """
+        Format the report for display.
+
+        Returns:
+            Human-readable multi-line summary
+        """
+        lines = []
+        for split, counts in self.splits.items():
+            removed = counts["total"] - counts["kept"]
+            lines.append(f"{split}: kept {counts['kept']}/{counts['total']} (removed {removed})")
+            for reason, count in sorted(counts.items()):
+                if reason not in ("total", "kept"):
+                    lines.append(f"  {reason}: {count}")
+        return "\n".join(lines)
+
+
+class PairAnalyzer:
+    """
+    Stateless per-pair analysis (normalization, hashing, local filters).
+
+    Runs in worker processes; the stateful duplicate decisions are made by
+    CorpusFilter in the main process.
+    """
+
+    def __init__(
+        self,
+        filter_config: CorpusFilterConfig,
+        source_lang: Optional[str],
+        target_lang: Optional[str],
+        language_identifier: Optional[Callable[[str], Optional[str]]] = None
+    ):
+        """
+        Initialize the analyzer.
+
+        Args:
+            filter_config: Filter configuration
+            source_lang: Language code expected on the source side
+            target_lang: Language code expected on the target side
+            language_identifier: Callable returning a language code or None
+        """
+        self.filter_config = filter_config
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.language_identifier = language_identifier or StopwordLanguageIdentifier()
+        self.hasher = MinHasher(
+            filter_config.num_perm,
+            filter_config.shingle_size,
+            filter_config.seed
+        )
+
+    def _wrong_language(self, text: str, expected: Optional[str]) -> bool:
+        if expected is None:
+            return False
+        detected = self.language_identifier(text)
+        return detected is not None and detected != expected
+
+    def __call__(self, pair: Tuple[str, str]) -> Tuple[Optional[str], bytes, bytes, Optional[np.ndarray]]:
+        """
+        Analyze one pair.
+
+        Args:
+            pair: (source_text, target_text)
+
+        Returns:
+            Tuple of (removal_reason, pair_key, source_key, signature); the
+            keys and signature are only computed for pairs passing the
+            local filters
+        """
+        config = self.filter_config
+        source, target = pair
+        norm_source, norm_target = normalize_text(source), normalize_text(target)
+        source_words, target_words = len(norm_source.split()), len(norm_target.split())
+
+        if min(source_words, target_words) < config.min_words:
+            return "too_short", b"", b"", None
+        if max(source_words, target_words) > config.max_words:
+            return "too_long", b"", b"", None
+        ratio = (max(source_words, target_words) + 1) / (min(source_words, target_words) + 1)
+        if ratio > config.max_length_ratio:
+            return "length_ratio", b"", b"", None
+        if config.language_filter and (
+            self._wrong_language(source, self.source_lang)
+            or self._wrong_language(target, self.target_lang)
+        ):
+            return "language", b"", b"", None
+
+        pair_text = f"{norm_source}\t{norm_target}"
+        signature = self.hasher.signature(pair_text) if config.near_duplicates else None
+        return None, text_key(pair_text), text_key(norm_source), signature
+
+
+_worker_analyzer: Optional[PairAnalyzer] = None
+
+
+def _init_worker(analyzer: PairAnalyzer) -> None:
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+
+def _analyze_in_worker(pair: Tuple[str, str]):
+    return _worker_analyzer(pair)
+
+
+class _DuplicateIndex:
+    """Exact and near-duplicate state accumulated over one pass."""
+
+    def __init__(self, filter_config: CorpusFilterConfig):
+        self.pair_keys = set()
+        self.source_keys = set()
+        self.lsh = None
+        if filter_config.near_duplicates:
+            self.lsh = MinHashLSH(
+                filter_config.num_perm,
+                filter_config.lsh_bands,
+                filter_config.near_duplicate_threshold
+            )
+
+    def add(self, pair_key: bytes, source_key: bytes, signature: Optional[np.ndarray]) -> None:
+        self.pair_keys.add(pair_key)
+        self.source_keys.add(source_key)
+        if self.lsh is not None:
+            self.lsh.insert(signature)
+
+    def is_near_duplicate(self, signature: Optional[np.ndarray]) -> bool:
+        return self.lsh is not None and self.lsh.query(signature)
+
+
+class CorpusFilter:
+    """Streaming, multi-process deduplication and filtering of parallel pairs."""
+
+    def __init__(
+        self,
+        filter_config: CorpusFilterConfig,
+        model_config: ModelConfig,
+        language_identifier: Optional[Callable[[str], Optional[str]]] = None
+    ):
+        """
+        Initialize the corpus filter.
+
+        Args:
+            filter_config: Filter configuration
+            model_config: Model configuration (source and target columns)
+            language_identifier: Optional callable mapping a text to 'fr',
+                'wo' or None; defaults to a function-word heuristic
+        """
+        self.filter_config = filter_config
+        self.model_config = model_config
+        self.analyzer = PairAnalyzer(
+            filter_config,
+            COLUMN_LANGUAGES.get(model_config.source_lang),
+            COLUMN_LANGUAGES.get(model_config.target_lang),
+            language_identifier
+        )
+        self.report = FilterReport()
+        self._test_index: Optional[_DuplicateIndex] = None
+        self._streaming_test: Optional[IterableDataset] = None
+
+    def _pairs(self, examples: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Tuple[str, str]]]:
+        source_column = self.model_config.source_lang
+        target_column = self.model_config.target_lang
+        for example in examples:
+            yield example, (example[source_column] or "", example[target_column] or "")
+
+    def _analyze(self, examples: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], tuple]]:
+        """
+        Analyze examples in bounded windows, in parallel when configured.
+
+        Only ``num_proc * chunk_size`` examples are held in memory at once.
+        """
+        config = self.filter_config
+        window_size = max(config.num_proc, 1) * config.chunk_size
+        pairs = self._pairs(examples)
+        pool = None
+        if config.num_proc > 1:
+            pool = Pool(config.num_proc, initializer=_init_worker, initargs=(self.analyzer,))
+        try:
+            while True:
+                window = [item for _, item in zip(range(window_size), pairs)]
+                if not window:
+                    break
+                inputs = [pair for _, pair in window]
+                if pool is not None:
+                    results = pool.map(_analyze_in_worker, inputs, chunksize=config.chunk_size)
+                else:
+                    results = [self.analyzer(pair) for pair in inputs]
+                for (example, _), result in zip(window, results):
+                    yield example, result
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    def filter_examples(
+        self,
+        examples: Iterable[Dict[str, Any]],
+        split: str,
+        reference_index: Optional[_DuplicateIndex] = None,
+        index: Optional[_DuplicateIndex] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily filter a stream of examples.
+
+        Args:
+            examples: Iterable of dataset records
+            split: Split name used in the report
+            reference_index: Index of another split; matches count as leakage
+            index: Index to accumulate kept pairs into (a fresh one by default)
+
+        Yields:
+            Records that passed every filter
+        """
+        index = index or _DuplicateIndex(self.filter_config)
+        self.report.reset(split)
+        for example, (reason, pair_key, source_key, signature) in self._analyze(examples):
+            if reason is None:
+                if reference_index is not None and (
+                    source_key in reference_index.source_keys
+                    or pair_key in reference_index.pair_keys
+                ):
+                    reason = "leakage_exact"
+                elif reference_index is not None and reference_index.is_near_duplicate(signature):
+                    reason = "leakage_near"
+                elif pair_key in index.pair_keys:
+                    reason = "exact_duplicate"
+                elif index.is_near_duplicate(signature):
+                    reason = "near_duplicate"
+            self.report.record(split, reason)
+            if reason is None:
+                index.add(pair_key, source_key, signature)
+                yield example
+        if self.filter_config.report_path:
+            self.report.save(self.filter_config.report_path)
+
+    def _filter_in_memory(
+        self,
+        dataset: Dataset,
+        split: str,
+        reference_index: Optional[_DuplicateIndex] = None,
+        index: Optional[_DuplicateIndex] = None
+    ) -> Dataset:
+        indexed = (dict(example, __index__=i) for i, example in enumerate(dataset))
+        kept = [
+            example["__index__"]
+            for example in self.filter_examples(indexed, split, reference_index, index)
+        ]
+        return dataset.select(kept)
+
+    def _filter_streaming(self, dataset: IterableDataset, split: str, with_leakage: bool) -> IterableDataset:
+        def generate():
+            reference_index = self._build_test_index() if with_leakage else None
+            yield from self.filter_examples(dataset, split, reference_index)
+        return IterableDataset.from_generator(generate)
+
+    def _build_test_index(self) -> _DuplicateIndex:
+        if self._test_index is None:
+            self._test_index = _DuplicateIndex(self.filter_config)
+            for _ in self.filter_examples(self._streaming_test, "test", index=self._test_index):
+                pass
+        return self._test_index
+
+    def filter_dataset_dict(self, dataset_dict: DatasetDict) -> DatasetDict:
+        """
+        Deduplicate and filter train/test splits.
+
+        The test split is filtered first; train pairs whose source sentence
+        or pair (exactly or approximately) appears in the test split are
+        then removed as leakage, keeping the evaluation set unchanged.
+
+        Args:
+            dataset_dict: Dataset dictionary with train and test splits
+                (in-memory or streaming)
+
+        Returns:
+            Filtered dataset dictionary of the same kind
+        """
+        if isinstance(dataset_dict, IterableDatasetDict):
+            self._test_index = None
+            self._streaming_test = dataset_dict["test"]
+            return IterableDatasetDict({
+                "train": self._filter_streaming(dataset_dict["train"], "train", with_leakage=True),
+                "test": self._filter_streaming(dataset_dict["test"], "test", with_leakage=False),
+            })
+
+        test_index = _DuplicateIndex(self.filter_config)
+        test_dataset = self._filter_in_memory(dataset_dict["test"], "test", index=test_index)
+        train_dataset = self._filter_in_memory(dataset_dict["train"], "train", reference_index=test_index)
+        return DatasetDict({"train": train_dataset, "test": test_dataset})
@@ -2,10 +2,45 @@
 Data processing module for the French-Wolof Translator.
 Handles dataset loading, preprocessing, and tokenization.
 """
-from datasets import load_dataset, DatasetDict
+import hashlib
+import os
+from dataclasses import asdict
+from datasets import (
+    Dataset,
+    load_dataset,
+    concatenate_datasets,
+    interleave_datasets,
+    DatasetDict,
+    IterableDataset,
+    IterableDatasetDict
+)
 from transformers import AutoTokenizer
-from typing import Dict, Any
-from config import DatasetConfig, ModelConfig
+from typing import Dict, Any, List, Optional, Tuple, Union
+from config import CorpusFilterConfig, DatasetConfig, ModelConfig
+from corpus_filter import CorpusFilter
+from binary_dataset import (
+    MemmapSeq2SeqDataset,
+    binary_dataset_mismatches,
+    is_binary_dataset,
+    load_binary_dataset,
+    write_binary_dataset
+)
+from sequence_packing import pack_examples, packing_report
+
+
+# Loader builder (and extra loader kwargs) for each supported shard extension
+SHARD_FORMATS = {
+    ".jsonl": ("json", {}),
+    ".json": ("json", {}),
+    ".tsv": ("csv", {"delimiter": "\t"}),
+    ".parquet": ("parquet", {}),
+}
+
+# Compression suffixes handled transparently by the datasets loaders
+COMPRESSION_EXTENSIONS = (".gz", ".bz2", ".xz", ".zst")
+
+# Corpus filter fields that do not change which pairs are kept
+FILTER_RUNTIME_FIELDS = ("num_proc", "chunk_size", "report_path")
 
 
 class DataProcessor:
@@ -15,7 +50,8 @@ class DataProcessor:
         self,
         tokenizer: AutoTokenizer,
         dataset_config: DatasetConfig,
-        model_config: ModelConfig
+        model_config: ModelConfig,
+        filter_config: Optional[CorpusFilterConfig] = None
     ):
         """
         Initialize the data processor.
@@ -24,10 +60,14 @@ class DataProcessor:
             tokenizer: The tokenizer to use for preprocessing
             dataset_config: Dataset configuration
             model_config: Model configuration
+            filter_config: Optional corpus deduplication/filtering configuration
         """
         self.tokenizer = tokenizer
         self.dataset_config = dataset_config
         self.model_config = model_config
+        self.filter_config = filter_config
+        self.corpus_filter: Optional[CorpusFilter] = None
+        self.packing_report: Optional[Dict[str, float]] = None
     
     def load_dataset(self) -> DatasetDict:
         """
@@ -54,6 +94,180 @@ class DataProcessor:
         )
         return dataset_dict
     
+    def load_streaming_dataset(self) -> IterableDataset:
+        """
+        Lazily load local data shards as a streaming dataset.
+        
+        Shards are read one record at a time, so the corpus never has to
+        fit in memory.
+        
+        Returns:
+            IterableDataset over all records of the configured shards
+            
+        Raises:
+            ValueError: If no data files are configured or their format is unsupported
+        """
+        data_files = self.dataset_config.data_files
+        if not data_files:
+            raise ValueError(
+                "Streaming mode requires local data files. "
+                "Set DatasetConfig.data_files or the DATA_FILES env var."
+            )
+        builder, loader_kwargs = self._shard_format(data_files)
+        return load_dataset(
+            builder,
+            data_files=data_files,
+            split="train",
+            streaming=True,
+            **loader_kwargs
+        )
+    
+    def _shard_format(self, data_files: List[str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Infer the datasets loader to use from the shard file extensions.
+        
+        Args:
+            data_files: Shard paths or globs
+            
+        Returns:
+            Tuple of (builder_name, loader_kwargs)
+            
+        Raises:
+            ValueError: If shards mix formats or use an unsupported extension
+        """
+        formats = {}
+        for path in data_files:
+            name = path.lower()
+            for compression in COMPRESSION_EXTENSIONS:
+                if name.endswith(compression):
+                    name = name[:-len(compression)]
+                    break
+            extension = os.path.splitext(name)[1]
+            if extension not in SHARD_FORMATS:
+                raise ValueError(
+                    f"Unsupported data file format: {path}. "
+                    f"Use one of: {', '.join(sorted(SHARD_FORMATS))}."
+                )
+            builder, loader_kwargs = SHARD_FORMATS[extension]
+            formats[builder] = loader_kwargs
+        if len(formats) > 1:
+            raise ValueError(
+                f"All data files must share one format, got: {', '.join(sorted(formats))}."
+            )
+        builder, loader_kwargs = formats.popitem()
+        return builder, dict(loader_kwargs)
+    
+    def split_bucket(self, text: str) -> float:
+        """
+        Map a text deterministically to a value in [0, 1).
+        
+        Uses a stable hash (unlike Python's salted ``hash``), so the same
+        pair lands in the same split across runs, processes and machines.
+        
+        Args:
+            text: Text to hash (the source side of a pair)
+            
+        Returns:
+            Float in [0, 1)
+        """
+        key = f"{self.dataset_config.seed}:{text}".encode("utf-8")
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2 ** 64
+    
+    def split_streaming_dataset(self, dataset: IterableDataset) -> IterableDatasetDict:
+        """
+        Split a streaming dataset into train and test sets by hashing.
+        
+        Each pair is assigned to a split from the hash of its source text,
+        which needs no shuffle or global view of the data and sends exact
+        duplicates of a source sentence to the same split.
+        
+        Args:
+            dataset: Streaming dataset to split
+            
+        Returns:
+            IterableDatasetDict with train and test splits
+        """
+        source_column = self.model_config.source_lang
+        test_size = self.dataset_config.test_size
+        return IterableDatasetDict({
+            "train": dataset.filter(
+                lambda example: self.split_bucket(example[source_column]) >= test_size
+            ),
+            "test": dataset.filter(
+                lambda example: self.split_bucket(example[source_column]) < test_size
+            ),
+        })
+    
+    def mix_synthetic_data(
+        self,
+        dataset_dict: Union[DatasetDict, IterableDatasetDict]
+    ) -> Union[DatasetDict, IterableDatasetDict]:
+        """
+        Mix synthetic (back-translated) pairs into the train split.
+        
+        ``synthetic_ratio`` is the share of synthetic pairs in the resulting
+        train split; the test split is left untouched. Every pair gets an
+        ``origin`` column ('parallel' or the synthetic provenance tag).
+        
+        Args:
+            dataset_dict: Dataset dictionary with train and test splits
+            
+        Returns:
+            Dataset dictionary with synthetic pairs added to train
+            
+        Raises:
+            ValueError: If synthetic_ratio is not in [0, 1)
+        """
+        ratio = self.dataset_config.synthetic_ratio
+        if not 0.0 <= ratio < 1.0:
+            raise ValueError(f"synthetic_ratio must be in [0, 1), got {ratio}.")
+        columns = [self.model_config.source_lang, self.model_config.target_lang]
+        data_files = self.dataset_config.synthetic_data_files
+        streaming = isinstance(dataset_dict, IterableDatasetDict)
+        
+        train = dataset_dict["train"].select_columns(columns)
+        train = train.map(lambda example: {"origin": "parallel"})
+        synthetic = load_dataset("json", data_files=data_files, split="train", streaming=streaming)
+        synthetic = synthetic.map(lambda example: {"origin": example.get("origin") or "synthetic"})
+        synthetic = synthetic.select_columns(columns + ["origin"])
+        
+        if streaming:
+            train = interleave_datasets(
+                [train, synthetic],
+                probabilities=[1.0 - ratio, ratio],
+                seed=self.dataset_config.seed,
+                stopping_strategy="first_exhausted"
+            )
+        else:
+            num_synthetic = min(len(synthetic), round(len(train) * ratio / (1.0 - ratio)))
+            synthetic = synthetic.shuffle(seed=self.dataset_config.seed).select(range(num_synthetic))
+            synthetic = synthetic.cast(train.features)
+            train = concatenate_datasets([train, synthetic]).shuffle(seed=self.dataset_config.seed)
+        
+        dataset_dict["train"] = train
+        return dataset_dict
+    
+    def filter_dataset(
+        self,
+        dataset_dict: Union[DatasetDict, IterableDatasetDict]
+    ) -> Union[DatasetDict, IterableDatasetDict]:
+        """
+        Deduplicate and filter the split dataset.
+        
+        Removes exact and near-duplicate pairs, badly aligned or
+        mislabeled pairs, and train pairs leaking into the test split.
+        The removal counts are kept in ``self.corpus_filter.report``.
+        
+        Args:
+            dataset_dict: Dataset dictionary with train and test splits
+            
+        Returns:
+            Filtered dataset dictionary
+        """
+        self.corpus_filter = CorpusFilter(self.filter_config, self.model_config)
+        return self.corpus_filter.filter_dataset_dict(dataset_dict)
+    
     def preprocess_function(self, examples: Dict[str, Any]) -> Dict[str, Any]:
         """
         Preprocess examples for training.
@@ -94,15 +308,189 @@ class DataProcessor:
         dataset_dict = dataset_dict.map(self.preprocess_function)
         return dataset_dict
     
-    def prepare_dataset(self) -> DatasetDict:
+    def pack_dataset(self, dataset_dict: DatasetDict) -> DatasetDict:
+        """
+        Pack the tokenized train split into rows of several pairs.
+        
+        Rows hold up to ``max_length`` source and target tokens and carry
+        per-token segment IDs (see ``sequence_packing``). The test split is
+        left unpacked. Packing statistics are kept in ``self.packing_report``.
+        
+        Args:
+            dataset_dict: Tokenized dataset dictionary
+            
+        Returns:
+            Dataset dictionary with a packed train split
+        """
+        max_length = self.model_config.max_length
+        packed = pack_examples(
+            dataset_dict["train"].select_columns(["input_ids", "labels"]),
+            max_source_length=max_length,
+            max_target_length=max_length
+        )
+        self.packing_report = packing_report(packed, max_length, max_length)
+        print(
+            f"Packed {self.packing_report['pairs']} train pairs into {self.packing_report['rows']} rows "
+            f"({self.packing_report['pairs_per_row']} per row, source fill {self.packing_report['source_fill']:.1%}, "
+            f"target fill {self.packing_report['target_fill']:.1%})"
+        )
+        dataset_dict["train"] = Dataset.from_list(packed)
+        return dataset_dict
+    
+    def preprocess_streaming_dataset(
+        self,
+        dataset_dict: IterableDatasetDict
+    ) -> IterableDatasetDict:
+        """
+        Tokenize a streaming dataset on the fly.
+        
+        The train split is shuffled through a bounded buffer of
+        ``shuffle_buffer_size`` examples (and its shard order), so memory
+        stays constant whatever the corpus size.
+        
+        Args:
+            dataset_dict: The streaming dataset dictionary to preprocess
+            
+        Returns:
+            Streaming dataset dictionary yielding tokenized examples
+        """
+        train_dataset = dataset_dict["train"].shuffle(
+            seed=self.dataset_config.seed,
+            buffer_size=self.dataset_config.shuffle_buffer_size
+        )
+        return IterableDatasetDict({
+            "train": train_dataset.map(self.preprocess_function),
+            "test": dataset_dict["test"].map(self.preprocess_function),
+        })
+    
+    def prepare_streaming_dataset(self) -> IterableDatasetDict:
+        """
+        Complete streaming dataset preparation pipeline.
+        
+        Returns:
+            Streaming dataset dictionary with tokenized train and test splits
+        """
+        dataset = self.load_streaming_dataset()
+        dataset_dict = self.split_streaming_dataset(dataset)
+        if self.dataset_config.synthetic_data_files and self.dataset_config.synthetic_ratio > 0:
+            dataset_dict = self.mix_synthetic_data(dataset_dict)
+        if self.filter_config and self.filter_config.enabled:
+            dataset_dict = self.filter_dataset(dataset_dict)
+        dataset_dict = self.preprocess_streaming_dataset(dataset_dict)
+        return dataset_dict
+    
+    def save_binary_dataset(
+        self,
+        dataset_dict: Union[DatasetDict, IterableDatasetDict],
+        path: str
+    ) -> None:
+        """
+        Save a tokenized dataset in the pre-tokenized binary format.
+        
+        Args:
+            dataset_dict: Tokenized dataset dictionary (in-memory or streaming)
+            path: Output directory
+        """
+        tokenized = {
+            split: dataset.select_columns(["input_ids", "labels"])
+            for split, dataset in dataset_dict.items()
+        }
+        write_binary_dataset(
+            tokenized,
+            path,
+            vocab_size=len(self.tokenizer),
+            settings=self.binary_dataset_settings()
+        )
+    
+    def binary_dataset_settings(self) -> Dict[str, Any]:
+        """
+        Collect the settings that determine the contents of a binary dataset.
+        
+        A saved dataset is only reused when these match the current ones.
+        
+        Returns:
+            Tokenizer, sequence length, language direction, data source,
+            split, synthetic mix, filter and packing settings
+        """
+        dataset_config = self.dataset_config
+        filter_settings = None
+        if self.filter_config and self.filter_config.enabled:
+            filter_settings = {
+                name: value for name, value in asdict(self.filter_config).items()
+                if name not in FILTER_RUNTIME_FIELDS
+            }
+        return {
+            "tokenizer": getattr(self.tokenizer, "name_or_path", None),
+            "vocab_size": len(self.tokenizer),
+            "max_length": self.model_config.max_length,
+            "source_lang": self.model_config.source_lang,
+            "target_lang": self.model_config.target_lang,
+            "prefix": dataset_config.prefix_fr_to_wo,
+            "dataset_name": dataset_config.dataset_name,
+            "data_files": dataset_config.data_files,
+            "streaming": dataset_config.streaming,
+            "shuffle_buffer_size": dataset_config.shuffle_buffer_size if dataset_config.streaming else None,
+            "test_size": dataset_config.test_size,
+            "seed": dataset_config.seed,
+            "synthetic_data_files": dataset_config.synthetic_data_files,
+            "synthetic_ratio": dataset_config.synthetic_ratio,
+            "filter": filter_settings,
+            "packing": dataset_config.packing,
+        }
+    
+    def load_binary_dataset(self, path: str) -> Dict[str, MemmapSeq2SeqDataset]:
+        """
+        Load a pre-tokenized binary dataset with memory-mapped token arrays.
+        
+        Args:
+            path: Dataset directory
+            
+        Returns:
+            Mapping of split name to a map-style dataset yielding tokenized examples
+        """
+        return load_binary_dataset(path)
+    
+    def prepare_dataset(self) -> Union[DatasetDict, IterableDatasetDict, Dict[str, MemmapSeq2SeqDataset]]:
         """
         Complete dataset preparation pipeline.
         
+        When ``DatasetConfig.binary_dataset_dir`` is set, a dataset already
+        saved there with the current settings (see
+        ``binary_dataset_settings``) is loaded directly (no loading,
+        filtering or tokenization); otherwise the pipeline runs once and its
+        output is saved there, replacing any stale copy, and reloaded
+        memory-mapped.
+        
         Returns:
-            Fully prepared dataset dictionary
+            Fully prepared dataset dictionary (streaming when
+            ``DatasetConfig.streaming`` is enabled, memory-mapped when
+            ``DatasetConfig.binary_dataset_dir`` is set, with a packed train
+            split when ``DatasetConfig.packing`` is enabled on in-memory data)
         """
-        dataset_dict = self.load_dataset()
-        dataset_dict = self.split_dataset(dataset_dict)
-        dataset_dict = self.preprocess_dataset(dataset_dict)
+        binary_dir = self.dataset_config.binary_dataset_dir
+        if binary_dir and is_binary_dataset(binary_dir):
+            mismatches = binary_dataset_mismatches(binary_dir, self.binary_dataset_settings())
+            if not mismatches:
+                return self.load_binary_dataset(binary_dir)
+            print(
+                f"Binary dataset in {binary_dir} was prepared with different settings "
+                f"({', '.join(mismatches)}); rebuilding it."
+            )
+        
+        if self.dataset_config.streaming:
+            dataset_dict = self.prepare_streaming_dataset()
+        else:
+            dataset_dict = self.load_dataset()
+            dataset_dict = self.split_dataset(dataset_dict)
+            if self.dataset_config.synthetic_data_files and self.dataset_config.synthetic_ratio > 0:
+                dataset_dict = self.mix_synthetic_data(dataset_dict)
+            if self.filter_config and self.filter_config.enabled:
+                dataset_dict = self.filter_dataset(dataset_dict)
+            dataset_dict = self.preprocess_dataset(dataset_dict)
+            if self.dataset_config.packing and not binary_dir:
+                dataset_dict = self.pack_dataset(dataset_dict)
+        
+        if binary_dir:
+            self.save_binary_dataset(dataset_dict, binary_dir)
+            return self.load_binary_dataset(binary_dir)
         return dataset_dict
-
@@ -0,0 +1,371 @@
+"""
+Decoder pruning module for the French-Wolof Translator.
+Builds shallower-decoder variants of a trained checkpoint and reports
+their speed/quality tradeoff.
+
+Usage:
+    python decoder_pruning.py --levels 6,3,2,1 --output-dir pruned
+
+Decoder depth sets the per-token cost of ``model.generate`` while the
+encoder runs once per sentence, so removing decoder layers trades quality
+for latency. Every pruned model is saved with ``save_pretrained`` (the
+config's ``decoder_layers`` is updated), so ``FrenchWolofTranslator`` and
+``ModelTrainer`` load it like any other checkpoint.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
+
+from config import ModelConfig, PruningConfig, TrainingConfig
+from evaluator import Evaluator
+from speculative import ForwardCounter
+from translator import FrenchWolofTranslator
+
+
+def select_layers(num_layers: int, keep: int) -> List[int]:
+    """
+    Choose which decoder layers to keep.
+
+    Layers are spaced evenly, so the first and last layers always stay.
+
+    Args:
+        num_layers: Current decoder depth
+        keep: Number of layers to keep
+
+    Returns:
+        Sorted indices of the kept layers
+
+    Raises:
+        ValueError: If keep is not between 1 and num_layers
+    """
+    if not 1 <= keep <= num_layers:
+        raise ValueError(f"Cannot keep {keep} of {num_layers} decoder layers.")
+    if keep == 1:
+        return [num_layers - 1]
+    return sorted(set(np.linspace(0, num_layers - 1, keep).round().astype(int).tolist()))
+
+
+def _decoder(model) -> torch.nn.Module:
+    return model.get_decoder()
+
+
+def prune_decoder_layers(model, keep_layers: List[int], merge: bool = False):
+    """
+    Remove decoder layers in place.
+
+    Args:
+        model: Seq2seq model (NLLB/M2M100 layout)
+        keep_layers: Sorted indices of the layers to keep
+        merge: Average each dropped layer into the nearest kept layer
+            before it (or after it, for leading layers) instead of
+            discarding its weights
+
+    Returns:
+        The pruned model
+    """
+    decoder = _decoder(model)
+    layers = list(decoder.layers)
+
+    if merge:
+        groups = {index: [index] for index in keep_layers}
+        for index in range(len(layers)):
+            if index in groups:
+                continue
+            before = [kept for kept in keep_layers if kept < index]
+            target = before[-1] if before else keep_layers[0]
+            groups[target].append(index)
+        for target, members in groups.items():
+            if len(members) == 1:
+                continue
+            states = [layers[index].state_dict() for index in members]
+            merged = {
+                name: torch.stack([state[name].float() for state in states]).mean(0).to(tensor.dtype)
+                if tensor.is_floating_point() else tensor
+                for name, tensor in states[0].items()
+            }
+            layers[target].load_state_dict(merged)
+
+    decoder.layers = torch.nn.ModuleList([layers[index] for index in keep_layers])
+    # The KV cache is indexed by layer position
+    for position, layer in enumerate(decoder.layers):
+        for module in layer.modules():
+            if hasattr(module, "layer_idx"):
+                module.layer_idx = position
+    model.config.decoder_layers = len(keep_layers)
+    return model
+
+
+def prune_decoder_heads(model, heads_to_prune: int) -> Dict[str, List[int]]:
+    """
+    Disable the least important heads of every decoder attention module.
+
+    A head's importance is the norm of its slice of the output projection,
+    which is zeroed to remove its contribution. Projection shapes are kept,
+    so the checkpoint still loads with the existing code; this measures the
+    quality cost of fewer heads but does not by itself reduce latency.
+
+    Args:
+        model: Seq2seq model (NLLB/M2M100 layout)
+        heads_to_prune: Heads disabled per attention module
+
+    Returns:
+        Mapping of attention module name to the disabled head indices
+
+    Raises:
+        ValueError: If heads_to_prune would disable every head
+    """
+    pruned = {}
+    if heads_to_prune <= 0:
+        return pruned
+    for name, module in _decoder(model).named_modules():
+        if not (hasattr(module, "out_proj") and hasattr(module, "num_heads")):
+            continue
+        if heads_to_prune >= module.num_heads:
+            raise ValueError(
+                f"Cannot prune {heads_to_prune} of {module.num_heads} heads in {name}."
+            )
+        head_dim = module.head_dim
+        with torch.no_grad():
+            weight = module.out_proj.weight
+            norms = weight.view(weight.shape[0], module.num_heads, head_dim).norm(dim=(0, 2))
+            heads = sorted(torch.argsort(norms)[:heads_to_prune].tolist())
+            for head in heads:
+                weight[:, head * head_dim:(head + 1) * head_dim] = 0
+        pruned[name] = heads
+    return pruned
+
+
+class DecoderPruner:
+    """Builds, optionally fine-tunes and evaluates pruned-decoder models."""
+
+    def __init__(
+        self,
+        model_checkpoint: str,
+        config: PruningConfig,
+        training_config: Optional[TrainingConfig] = None
+    ):
+        """
+        Initialize the pruner.
+
+        Args:
+            model_checkpoint: Checkpoint to prune (as used by FrenchWolofTranslator)
+            config: Pruning configuration
+            training_config: Base configuration for recovery fine-tuning
+        """
+        self.model_checkpoint = model_checkpoint
+        self.config = config
+        self.training_config = training_config or TrainingConfig()
+        self.tokenizer = AutoTokenizer.from_pretrained(model_checkpoint, src_lang="fra_Latn")
+        self.evaluator = Evaluator(self.tokenizer)
+
+    def level_dir(self, num_layers: int) -> str:
+        """
+        Get the output directory of a pruning level.
+
+        Args:
+            num_layers: Decoder depth
+
+        Returns:
+            Directory of the pruned model
+        """
+        return os.path.join(self.config.output_dir, f"decoder-{num_layers}")
+
+    def prune(self, num_layers: int) -> Dict:
+        """
+        Prune the checkpoint to a decoder depth and save it.
+
+        Args:
+            num_layers: Decoder layers to keep
+
+        Returns:
+            Description of the pruned model (kept layers, disabled heads, path)
+        """
+        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_checkpoint)
+        keep_layers = select_layers(model.config.decoder_layers, num_layers)
+        prune_decoder_layers(model, keep_layers, merge=self.config.merge_layers)
+        pruned_heads = prune_decoder_heads(model, self.config.heads_to_prune)
+
+        path = self.level_dir(num_layers)
+        model.save_pretrained(path)
+        self.tokenizer.save_pretrained(path)
+        return {
+            "decoder_layers": num_layers,
+            "kept_layers": keep_layers,
+            "merged": self.config.merge_layers,
+            "pruned_heads": pruned_heads,
+            "path": path,
+        }
+
+    def recover(self, path: str, train_dataset, eval_dataset) -> Dict:
+        """
+        Briefly fine-tune a pruned model with ModelTrainer and save it in place.
+
+        Args:
+            path: Pruned model directory
+            train_dataset: Tokenized training dataset
+            eval_dataset: Tokenized evaluation dataset
+
+        Returns:
+            Training metrics
+        """
+        from trainer import ModelTrainer
+
+        training_config = dataclasses.replace(self.training_config)
+        training_config.output_dir = os.path.join(path, "recovery")
+        training_config.max_steps = self.config.recovery_steps
+        training_config.push_to_hub = False
+        training_config.early_stopping_patience = None
+        training_config.average_last_checkpoints = 0
+        training_config.fp16 = training_config.fp16 and torch.cuda.is_available()
+
+        trainer = ModelTrainer(model_config_checkpoint=path, training_config=training_config)
+        metrics = trainer.train(train_dataset=train_dataset, eval_dataset=eval_dataset)
+        trainer.model.save_pretrained(path)
+        return metrics
+
+    def evaluate(self, path: str, sources: List[str], references: List[str]) -> Dict[str, float]:
+        """
+        Score a model and measure its decoding latency.
+
+        Quality uses the translator's default decoding over all pairs.
+        Latency decodes ``latency_samples`` sentences one at a time with
+        greedy search, where every decoder forward pass yields one token.
+
+        Args:
+            path: Model directory
+            sources: Source sentences
+            references: Reference translations
+
+        Returns:
+            Dictionary with bleu, chrf, ms_per_token and ms_per_sentence
+        """
+        model_config = ModelConfig()
+        model_config.draft_checkpoint = None
+        translator = FrenchWolofTranslator(path, device=self.config.device, model_config=model_config)
+        translator.translation_memory = None
+
+        predictions = translator.translate_batch(sources, source_lang=self.config.source_lang)
+        result = self.evaluator.compute_text_metrics(predictions, references)
+
+        latency_sources = sources[:self.config.latency_samples]
+        with ForwardCounter(translator.model) as steps:
+            start = time.perf_counter()
+            for text in latency_sources:
+                translator.translate(text, source_lang=self.config.source_lang, num_beams=1)
+            elapsed = time.perf_counter() - start
+        result["ms_per_token"] = 1000 * elapsed / max(steps.count, 1)
+        result["ms_per_sentence"] = 1000 * elapsed / max(len(latency_sources), 1)
+        return {name: round(value, 4) for name, value in result.items()}
+
+    def run(self, eval_pairs, train_dataset=None, eval_dataset=None) -> List[Dict]:
+        """
+        Evaluate the original model and every configured pruning level.
+
+        Args:
+            eval_pairs: Records with "french" and "wolof" fields used for scoring
+            train_dataset: Tokenized training dataset (recovery fine-tuning)
+            eval_dataset: Tokenized evaluation dataset (recovery fine-tuning)
+
+        Returns:
+            One report entry per level, the unpruned model first; each has
+            the metrics, the latency and the speedup over the unpruned model
+
+        Raises:
+            ValueError: If no levels are configured or recovery lacks data
+        """
+        if not self.config.levels:
+            raise ValueError("PruningConfig.levels must list at least one decoder depth.")
+        if self.config.recovery_steps > 0 and train_dataset is None:
+            raise ValueError("Recovery fine-tuning needs a training dataset.")
+
+        source_column = "french" if self.config.source_lang == "fr" else "wolof"
+        target_column = "wolof" if source_column == "french" else "french"
+        pairs = list(eval_pairs)[:self.config.eval_samples]
+        sources = [pair[source_column] for pair in pairs]
+        references = [pair[target_column] for pair in pairs]
+
+        base_layers = AutoConfig.from_pretrained(self.model_checkpoint).decoder_layers
+        report = [{
+            "decoder_layers": base_layers,
+            "path": self.model_checkpoint,
+            **self.evaluate(self.model_checkpoint, sources, references),
+        }]
+        for num_layers in sorted(set(self.config.levels), reverse=True):
+            if num_layers >= base_layers:
+                continue
+            entry = self.prune(num_layers)
+            if self.config.recovery_steps > 0:
+                entry["recovery"] = self.recover(entry["path"], train_dataset, eval_dataset)
+            entry.update(self.evaluate(entry["path"], sources, references))
+            report.append(entry)
+
+        base_latency = report[0]["ms_per_token"]
+        for entry in report:
+            entry["speedup"] = round(base_latency / entry["ms_per_token"], 4) if entry["ms_per_token"] else 0.0
+        return report
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Prune decoder layers and report the speed/quality tradeoff.")
+    parser.add_argument("--checkpoint", default=None, help="Model checkpoint (defaults to MODEL_CHECKPOINT)")
+    parser.add_argument("--levels", required=True, help="Comma-separated decoder depths, e.g. 6,3,2,1")
+    parser.add_argument("--output-dir", default=PruningConfig.output_dir)
+    parser.add_argument("--merge", action="store_true", help="Merge dropped layers into kept ones")
+    parser.add_argument("--prune-heads", type=int, default=0, help="Heads disabled per decoder attention module")
+    parser.add_argument("--recovery-steps", type=int, default=0, help="Recovery fine-tuning steps per level")
+    parser.add_argument("--source-lang", default=PruningConfig.source_lang, choices=["fr", "wo"])
+    parser.add_argument("--eval-samples", type=int, default=PruningConfig.eval_samples)
+    parser.add_argument("--latency-samples", type=int, default=PruningConfig.latency_samples)
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    from config import DatasetConfig
+    from data_processor import DataProcessor
+
+    model_config = ModelConfig()
+    checkpoint = args.checkpoint or model_config.checkpoint
+    config = PruningConfig(
+        levels=[int(level) for level in args.levels.split(",")],
+        merge_layers=args.merge,
+        heads_to_prune=args.prune_heads,
+        recovery_steps=args.recovery_steps,
+        output_dir=args.output_dir,
+        source_lang=args.source_lang,
+        eval_samples=args.eval_samples,
+        latency_samples=args.latency_samples,
+        device=args.device,
+    )
+    pruner = DecoderPruner(checkpoint, config)
+
+    data_processor = DataProcessor(
+        tokenizer=pruner.tokenizer,
+        dataset_config=DatasetConfig(),
+        model_config=model_config
+    )
+    dataset_dict = data_processor.split_dataset(data_processor.load_dataset())
+    if config.recovery_steps > 0:
+        dataset_dict = data_processor.preprocess_dataset(dataset_dict)
+
+    report = pruner.run(dataset_dict["test"], dataset_dict["train"], dataset_dict["test"])
+    os.makedirs(config.output_dir, exist_ok=True)
+    report_path = os.path.join(config.output_dir, "pruning_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'layers':>6} {'BLEU':>8} {'chrF':>8} {'ms/token':>9} {'speedup':>8}")
+    for entry in report:
+        print(f"{entry['decoder_layers']:>6} {entry['bleu']:>8.2f} {entry['chrf']:>8.2f} "
+              f"{entry['ms_per_token']:>9.3f} {entry['speedup']:>8.2f}")
+    print(f"Report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
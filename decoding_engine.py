@@ -0,0 +1,419 @@
+"""
+Decoding engine module for the French-Wolof Translator.
+A generation loop for NLLB (M2M100) models that stops spending compute on
+finished sentences and never reallocates its key/value cache.
+
+Compared with ``model.generate``:
+
+- the encoder runs once per batch, and the cross-attention keys/values of
+  every decoder layer are projected once per batch (not kept per step in
+  a growing cache),
+- self-attention keys/values go into buffers preallocated for the whole
+  generation length and reused across calls; a step writes one position
+  in place instead of concatenating (each thread has its own buffers, so
+  concurrent calls on one engine do not overwrite each other's cache),
+- sentences that are done (greedy: emitted EOS; beam search: no finished
+  hypothesis can change any more) leave the active batch, so later steps
+  only run the sentences still decoding.
+
+Greedy and beam search follow ``generate``'s rules (forced BOS/EOS
+tokens, length penalty, early stopping, top-2k beam candidates), so
+outputs are the same token IDs. Other logits processors (repetition
+penalties, n-gram blocking, sampling, ...) are not supported.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+
+# Generation settings the engine does not implement, with their neutral values
+UNSUPPORTED_SETTINGS = {
+    "do_sample": False,
+    "min_length": 0,
+    "min_new_tokens": None,
+    "repetition_penalty": 1.0,
+    "encoder_repetition_penalty": 1.0,
+    "no_repeat_ngram_size": 0,
+    "encoder_no_repeat_ngram_size": 0,
+    "bad_words_ids": None,
+    "suppress_tokens": None,
+    "begin_suppress_tokens": None,
+    "sequence_bias": None,
+    "num_beam_groups": 1,
+    "exponential_decay_length_penalty": None,
+    "renormalize_logits": False,
+}
+
+
+class DecodingEngine:
+    """Greedy and beam search for M2M100/NLLB with batch shrinking and a static cache."""
+
+    def __init__(self, model):
+        """
+        Initialize the engine for a loaded model.
+
+        Args:
+            model: M2M100ForConditionalGeneration (NLLB) model in eval mode
+
+        Raises:
+            ValueError: If the model is not an M2M100 model or its generation
+                config uses settings the engine does not implement
+        """
+        if getattr(model.config, "model_type", None) != "m2m_100":
+            raise ValueError(f"DecodingEngine supports M2M100/NLLB models, not {model.config.model_type}.")
+        generation_config = model.generation_config
+        for name, neutral in UNSUPPORTED_SETTINGS.items():
+            value = getattr(generation_config, name, neutral)
+            if value is not None and value != neutral:
+                raise ValueError(f"DecodingEngine does not support generation setting {name}={value!r}.")
+
+        self.model = model
+        self.encoder = model.get_encoder()
+        self.decoder = model.get_decoder()
+        config = model.config
+        self.num_heads = config.decoder_attention_heads
+        self.head_dim = config.d_model // self.num_heads
+        self.pad_token_id = generation_config.pad_token_id
+        if self.pad_token_id is None:
+            self.pad_token_id = config.pad_token_id
+        self.decoder_start_token_id = generation_config.decoder_start_token_id
+        if self.decoder_start_token_id is None:
+            self.decoder_start_token_id = config.decoder_start_token_id
+        eos_token_id = generation_config.eos_token_id
+        if eos_token_id is None:
+            eos_token_id = config.eos_token_id
+        self.eos_token_ids = eos_token_id if isinstance(eos_token_id, list) else [eos_token_id]
+        self.forced_eos_token_id = generation_config.forced_eos_token_id
+        # Unset values mean generate's defaults
+        self.length_penalty = generation_config.length_penalty
+        if self.length_penalty is None:
+            self.length_penalty = 1.0
+        # Per thread, two sets of per-layer (keys, values) buffers: beam
+        # reordering and batch shrinking gather from one set into the other
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "steps": 0, "row_steps": 0, "full_row_steps": 0, "cache_allocations": 0}
+
+    def _workspace(self, rows: int, length: int, dtype: torch.dtype, device: torch.device):
+        """Return the calling thread's cache buffers for at least ``rows`` x ``length``, allocating only to grow."""
+        buffers: Optional[List[List[Tuple[torch.Tensor, torch.Tensor]]]] = getattr(self._local, "buffers", None)
+        if buffers is not None:
+            keys = buffers[0][0][0]
+            if (
+                keys.shape[0] >= rows and keys.shape[2] >= length
+                and keys.dtype == dtype and keys.device == device
+            ):
+                return buffers
+        shape = (rows, self.num_heads, length, self.head_dim)
+        self._local.buffers = buffers = [
+            [
+                (torch.empty(shape, dtype=dtype, device=device), torch.empty(shape, dtype=dtype, device=device))
+                for _ in self.decoder.layers
+            ]
+            for _ in range(2)
+        ]
+        with self._lock:
+            self.stats["cache_allocations"] += 1
+        return buffers
+
+    def _encode(self, input_ids: torch.Tensor, attention_mask: torch.Tensor, expand: int):
+        """Run the encoder and project cross-attention keys/values for every layer."""
+        hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        if expand > 1:
+            hidden = hidden.repeat_interleave(expand, dim=0)
+            attention_mask = attention_mask.repeat_interleave(expand, dim=0)
+        rows, length = hidden.shape[:2]
+        cross = []
+        for layer in self.decoder.layers:
+            attention = layer.encoder_attn
+            keys = attention.k_proj(hidden).view(rows, length, self.num_heads, self.head_dim).transpose(1, 2)
+            values = attention.v_proj(hidden).view(rows, length, self.num_heads, self.head_dim).transpose(1, 2)
+            cross.append((keys, values))
+        # No mask at all when nothing is padded (same kernel as generate)
+        mask = None if bool(attention_mask.all()) else attention_mask[:, None, None, :].bool()
+        return cross, mask
+
+    def _step(
+        self,
+        tokens: torch.Tensor,
+        step: int,
+        cache: List[Tuple[torch.Tensor, torch.Tensor]],
+        cross: List[Tuple[torch.Tensor, torch.Tensor]],
+        cross_mask: Optional[torch.Tensor]
+    ) -> torch.Tensor:
+        """Decode one position for the active rows; returns float32 logits."""
+        rows = tokens.shape[0]
+        embed_positions = self.decoder.embed_positions
+        padding_idx = embed_positions.padding_idx
+        # Positions as generate computes them: padding tokens get the padding position
+        positions = torch.where(
+            tokens == self.pad_token_id,
+            torch.full_like(tokens, padding_idx),
+            torch.full_like(tokens, padding_idx + 1 + step)
+        )
+        hidden = self.decoder.embed_tokens(tokens[:, None])
+        hidden = hidden + embed_positions.weights.index_select(0, positions)[:, None, :].to(hidden.device)
+
+        for layer, (cache_keys, cache_values), (cross_keys, cross_values) in zip(self.decoder.layers, cache, cross):
+            attention = layer.self_attn
+            residual = hidden
+            states = layer.self_attn_layer_norm(hidden)
+            query = attention.q_proj(states).view(rows, 1, self.num_heads, self.head_dim).transpose(1, 2)
+            cache_keys[:rows, :, step] = attention.k_proj(states).view(rows, self.num_heads, self.head_dim)
+            cache_values[:rows, :, step] = attention.v_proj(states).view(rows, self.num_heads, self.head_dim)
+            output = F.scaled_dot_product_attention(
+                query, cache_keys[:rows, :, :step + 1], cache_values[:rows, :, :step + 1], scale=attention.scaling
+            )
+            hidden = residual + attention.out_proj(output.transpose(1, 2).reshape(rows, 1, -1))
+
+            attention = layer.encoder_attn
+            residual = hidden
+            states = layer.encoder_attn_layer_norm(hidden)
+            query = attention.q_proj(states).view(rows, 1, self.num_heads, self.head_dim).transpose(1, 2)
+            output = F.scaled_dot_product_attention(
+                query, cross_keys, cross_values, attn_mask=cross_mask, scale=attention.scaling
+            )
+            hidden = residual + attention.out_proj(output.transpose(1, 2).reshape(rows, 1, -1))
+
+            residual = hidden
+            states = layer.final_layer_norm(hidden)
+            hidden = residual + layer.fc2(layer.activation_fn(layer.fc1(states)))
+
+        hidden = self.decoder.layer_norm(hidden)
+        self.stats["steps"] += 1
+        self.stats["row_steps"] += rows
+        return self.model.lm_head(hidden)[:, -1, :].float()
+
+    def _force_tokens(
+        self,
+        scores: torch.Tensor,
+        cur_len: int,
+        max_length: int,
+        forced_bos_token_id: Optional[int]
+    ) -> torch.Tensor:
+        """Apply forced BOS/EOS tokens like generate's logits processors."""
+        forced = None
+        if forced_bos_token_id is not None and cur_len == 1:
+            forced = forced_bos_token_id
+        elif self.forced_eos_token_id is not None and cur_len == max_length - 1:
+            forced = self.forced_eos_token_id
+        if forced is None:
+            return scores
+        processed = torch.full_like(scores, float("-inf"))
+        processed[:, forced] = 0
+        return processed
+
+    @staticmethod
+    def _compact(
+        buffers: List[List[Tuple[torch.Tensor, torch.Tensor]]],
+        current: int,
+        source_rows: torch.Tensor
+    ) -> int:
+        """Gather cache rows into the other buffer set; returns its index."""
+        target = 1 - current
+        rows = source_rows.shape[0]
+        for (source_keys, source_values), (target_keys, target_values) in zip(buffers[current], buffers[target]):
+            torch.index_select(source_keys, 0, source_rows, out=target_keys[:rows])
+            torch.index_select(source_values, 0, source_rows, out=target_values[:rows])
+        return target
+
+    @torch.no_grad()
+    def generate(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: Optional[torch.Tensor] = None,
+        max_length: int = 200,
+        num_beams: int = 1,
+        forced_bos_token_id: Optional[int] = None,
+        early_stopping: bool = False,
+        length_penalty: Optional[float] = None
+    ) -> torch.Tensor:
+        """
+        Generate translations.
+
+        Args:
+            input_ids: (batch, source length) source token IDs
+            attention_mask: Source padding mask (all ones if None)
+            max_length: Maximum output length, decoder start token included
+            num_beams: Beam size (1: greedy)
+            forced_bos_token_id: Token forced as the first generated token
+                (the target language code)
+            early_stopping: Stop a sentence's beam search once num_beams
+                hypotheses are finished (as in generate)
+            length_penalty: Beam score length exponent (generation config
+                default if None)
+
+        Returns:
+            (batch, length) generated token IDs, padded like ``generate``'s
+        """
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        embed_positions = self.decoder.embed_positions
+        needed = embed_positions.padding_idx + 1 + max_length
+        with self._lock:
+            if needed > embed_positions.weights.size(0):
+                embed_positions.make_weights(
+                    needed + embed_positions.offset, embed_positions.embedding_dim, embed_positions.padding_idx
+                )
+            self.stats["batches"] += 1
+        if num_beams == 1:
+            return self._greedy(input_ids, attention_mask, max_length, forced_bos_token_id)
+        return self._beam_search(
+            input_ids, attention_mask, max_length, num_beams, forced_bos_token_id, early_stopping,
+            self.length_penalty if length_penalty is None else length_penalty
+        )
+
+    def _greedy(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: torch.Tensor,
+        max_length: int,
+        forced_bos_token_id: Optional[int]
+    ) -> torch.Tensor:
+        """Greedy decoding; sentences leave the batch when they emit EOS."""
+        batch_size, device = input_ids.shape[0], input_ids.device
+        eos = torch.tensor(self.eos_token_ids, device=device)
+        cross, cross_mask = self._encode(input_ids, attention_mask, expand=1)
+        buffers = self._workspace(batch_size, max_length, cross[0][0].dtype, device)
+        current = 0
+
+        output = torch.full((batch_size, max_length), self.pad_token_id, dtype=torch.long, device=device)
+        output[:, 0] = self.decoder_start_token_id
+        lengths = torch.ones(batch_size, dtype=torch.long, device=device)
+        rows = torch.arange(batch_size, device=device)  # Original index of every active row
+        tokens = output[:, 0].clone()
+        for step in range(max_length - 1):
+            cur_len = step + 1
+            scores = self._step(tokens, step, buffers[current], cross, cross_mask)
+            scores = self._force_tokens(scores, cur_len, max_length, forced_bos_token_id)
+            tokens = scores.argmax(dim=-1)
+            output[rows, cur_len] = tokens
+            lengths[rows] = cur_len + 1
+            self.stats["full_row_steps"] += batch_size
+            finished = torch.isin(tokens, eos)
+            if cur_len + 1 >= max_length or bool(finished.all()):
+                break
+            if bool(finished.any()):
+                keep = (~finished).nonzero().squeeze(1)
+                rows, tokens = rows[keep], tokens[keep]
+                current = self._compact(buffers, current, keep)
+                cross = [(keys.index_select(0, keep), values.index_select(0, keep)) for keys, values in cross]
+                if cross_mask is not None:
+                    cross_mask = cross_mask.index_select(0, keep)
+        return output[:, :int(lengths.max())]
+
+    def _beam_search(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: torch.Tensor,
+        max_length: int,
+        num_beams: int,
+        forced_bos_token_id: Optional[int],
+        early_stopping: bool,
+        length_penalty: float
+    ) -> torch.Tensor:
+        """Beam search; a sentence leaves the batch once its hypotheses are final."""
+        batch_size, device = input_ids.shape[0], input_ids.device
+        eos = torch.tensor(self.eos_token_ids, device=device)
+        beams_to_keep = max(2, 1 + len(self.eos_token_ids)) * num_beams
+        top_beam_mask = torch.arange(beams_to_keep, device=device) < num_beams
+        cross, cross_mask = self._encode(input_ids, attention_mask, expand=num_beams)
+        buffers = self._workspace(batch_size * num_beams, max_length, cross[0][0].dtype, device)
+        current = 0
+
+        # Running beams and finished hypotheses of the active sentences
+        running = torch.full((batch_size, num_beams, max_length), self.pad_token_id, dtype=torch.long, device=device)
+        running[:, :, 0] = self.decoder_start_token_id
+        running_scores = torch.zeros((batch_size, num_beams), device=device)
+        running_scores[:, 1:] = -1e9
+        finished = running.clone()
+        finished_scores = torch.full((batch_size, num_beams), -1e9, device=device)
+        finished_lengths = torch.ones((batch_size, num_beams), dtype=torch.long, device=device)
+        is_finished = torch.zeros((batch_size, num_beams), dtype=torch.bool, device=device)
+        can_improve = torch.ones((batch_size, 1), dtype=torch.bool, device=device)
+        rows = torch.arange(batch_size, device=device)
+        results: Dict[int, torch.Tensor] = {}
+
+        for cur_len in range(1, max_length):
+            sentences = rows.shape[0]
+            self.stats["full_row_steps"] += batch_size * num_beams
+            scores = self._step(running[:, :, cur_len - 1].reshape(-1), cur_len - 1, buffers[current], cross, cross_mask)
+            log_probs = self._force_tokens(F.log_softmax(scores, dim=-1), cur_len, max_length, forced_bos_token_id)
+            vocab_size = log_probs.shape[-1]
+            log_probs = log_probs.view(sentences, num_beams, vocab_size) + running_scores[:, :, None]
+
+            # Best 2k continuations over all beams of each sentence
+            topk_scores, topk_indices = torch.topk(log_probs.view(sentences, -1), k=beams_to_keep)
+            topk_beams = topk_indices // vocab_size
+            topk_sequences = torch.take_along_dim(running, topk_beams[:, :, None], dim=1)
+            topk_sequences[:, :, cur_len] = topk_indices % vocab_size
+            hits_stop = torch.isin(topk_sequences[:, :, cur_len], eos) | (cur_len + 1 >= max_length)
+
+            # Unfinished continuations keep running
+            running_candidates = topk_scores + hits_stop.float() * -1e9
+            next_indices = torch.topk(running_candidates, k=num_beams)[1]
+            running = torch.take_along_dim(topk_sequences, next_indices[:, :, None], dim=1)
+            running_scores = torch.take_along_dim(running_candidates, next_indices, dim=1)
+            source_beams = torch.take_along_dim(topk_beams, next_indices, dim=1)
+
+            # Finished continuations among the top k enter the hypotheses
+            just_finished = hits_stop & top_beam_mask[None, :]
+            candidate_scores = topk_scores / ((cur_len + 1 - 1) ** length_penalty)
+            full = is_finished.all(dim=-1, keepdim=True) & (early_stopping is True)
+            candidate_scores = candidate_scores + full.float() * -1e9
+            candidate_scores = candidate_scores + (~can_improve).float() * -1e9
+            candidate_scores = candidate_scores + (~just_finished).float() * -1e9
+            merged_scores = torch.cat((finished_scores, candidate_scores), dim=1)
+            best = torch.topk(merged_scores, k=num_beams)[1]
+            finished = torch.take_along_dim(torch.cat((finished, topk_sequences), dim=1), best[:, :, None], dim=1)
+            finished_scores = torch.take_along_dim(merged_scores, best, dim=1)
+            finished_lengths = torch.take_along_dim(
+                torch.cat((finished_lengths, torch.full_like(topk_beams, cur_len + 1)), dim=1), best, dim=1
+            )
+            is_finished = torch.take_along_dim(torch.cat((is_finished, just_finished), dim=1), best, dim=1)
+
+            # Can the best running beam still beat the worst finished hypothesis?
+            if early_stopping == "never" and length_penalty > 0.0:
+                best_length = max_length - 1
+            else:
+                best_length = cur_len + 1 - 1
+            best_running = running_scores[:, :1] / (best_length ** length_penalty)
+            worst_finished = torch.where(
+                is_finished, torch.min(finished_scores, dim=1, keepdim=True)[0], torch.tensor(-1e9, device=device)
+            )
+            can_improve = can_improve & torch.any(best_running > worst_finished, dim=-1, keepdim=True)
+
+            if cur_len + 1 >= max_length:
+                break
+            done = ~can_improve.squeeze(1)
+            if early_stopping is True:
+                done = done | is_finished.all(dim=-1)
+            for i in done.nonzero().squeeze(1).tolist():
+                results[int(rows[i])] = finished[i, 0, :int(finished_lengths[i, 0])]
+            keep = (~done).nonzero().squeeze(1)
+            if keep.numel() == 0:
+                break
+
+            # Reorder the cache to the surviving beams of the remaining sentences
+            cache_rows = (keep[:, None] * num_beams + source_beams.index_select(0, keep)).reshape(-1)
+            current = self._compact(buffers, current, cache_rows)
+            if keep.numel() < sentences:
+                expanded = (keep[:, None] * num_beams + torch.arange(num_beams, device=device)).reshape(-1)
+                cross = [(keys.index_select(0, expanded), values.index_select(0, expanded)) for keys, values in cross]
+                if cross_mask is not None:
+                    cross_mask = cross_mask.index_select(0, expanded)
+                rows = rows[keep]
+                running, running_scores = running[keep], running_scores[keep]
+                finished, finished_scores = finished[keep], finished_scores[keep]
+                finished_lengths, is_finished, can_improve = finished_lengths[keep], is_finished[keep], can_improve[keep]
+
+        for i, row in enumerate(rows.tolist()):
+            if row not in results:
+                results[row] = finished[i, 0, :int(finished_lengths[i, 0])]
+        width = max(sequence.shape[0] for sequence in results.values())
+        output = torch.full((batch_size, width), self.pad_token_id, dtype=torch.long, device=device)
+        for row, sequence in results.items():
+            output[row, :sequence.shape[0]] = sequence
+        return output
@@ -3,7 +3,7 @@ Environment configuration loader.
 Loads configuration from environment variables for secure, open-source deployment.
 """
 import os
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if it exists
@@ -60,11 +60,130 @@ class EnvConfig:
     def MODEL_CHECKPOINT(cls) -> str:
         return cls._get("MODEL_CHECKPOINT", "facebook/nllb-200-distilled-600M") or "facebook/nllb-200-distilled-600M"
     
+    @classmethod
+    def DRAFT_MODEL_CHECKPOINT(cls) -> Optional[str]:
+        return cls._get("DRAFT_MODEL_CHECKPOINT")
+    
+    @classmethod
+    def LANGUAGE_ID_MODEL(cls) -> Optional[str]:
+        return cls._get("LANGUAGE_ID_MODEL")
+    
+    @classmethod
+    def TORCH_COMPILE(cls) -> bool:
+        val = cls._get("TORCH_COMPILE", "false")
+        return val.lower() == "true" if val else False
+    
+    @classmethod
+    def DECODING_ENGINE(cls) -> bool:
+        val = cls._get("DECODING_ENGINE", "false")
+        return val.lower() == "true" if val else False
+    
     # Dataset
     @classmethod
     def DATASET_NAME(cls) -> str:
         return cls._get("DATASET_NAME", "galsenai/french-wolof-translation") or "galsenai/french-wolof-translation"
     
+    @classmethod
+    def DATASET_STREAMING(cls) -> bool:
+        val = cls._get("DATASET_STREAMING", "false")
+        return val.lower() == "true" if val else False
+    
+    @classmethod
+    def DATA_FILES(cls) -> Optional[List[str]]:
+        """Comma-separated list of local data shards (paths or globs)."""
+        val = cls._get("DATA_FILES")
+        if not val:
+            return None
+        return [path.strip() for path in val.split(",") if path.strip()]
+    
+    @classmethod
+    def SYNTHETIC_DATA_FILES(cls) -> Optional[List[str]]:
+        """Comma-separated list of back-translated data files (paths or globs)."""
+        val = cls._get("SYNTHETIC_DATA_FILES")
+        if not val:
+            return None
+        return [path.strip() for path in val.split(",") if path.strip()]
+    
+    @classmethod
+    def SYNTHETIC_RATIO(cls) -> Optional[float]:
+        val = cls._get("SYNTHETIC_RATIO")
+        return float(val) if val else None
+    
+    @classmethod
+    def BINARY_DATASET_DIR(cls) -> Optional[str]:
+        return cls._get("BINARY_DATASET_DIR")
+    
+    @classmethod
+    def SEQUENCE_PACKING(cls) -> bool:
+        val = cls._get("SEQUENCE_PACKING", "false")
+        return val.lower() == "true" if val else False
+    
+    # Corpus filtering
+    @classmethod
+    def CORPUS_FILTER_ENABLED(cls) -> bool:
+        val = cls._get("CORPUS_FILTER_ENABLED", "false")
+        return val.lower() == "true" if val else False
+    
+    @classmethod
+    def CORPUS_FILTER_NUM_PROC(cls) -> Optional[int]:
+        val = cls._get("CORPUS_FILTER_NUM_PROC")
+        return int(val) if val else None
+    
+    @classmethod
+    def CORPUS_FILTER_REPORT(cls) -> Optional[str]:
+        return cls._get("CORPUS_FILTER_REPORT")
+    
+    # Model registry
+    @classmethod
+    def MODEL_REGISTRY_MEMORY_MB(cls) -> Optional[float]:
+        val = cls._get("MODEL_REGISTRY_MEMORY_MB")
+        return float(val) if val else None
+    
+    # Hot reload
+    @classmethod
+    def HOT_RELOAD_CANARY(cls) -> Optional[str]:
+        return cls._get("HOT_RELOAD_CANARY")
+    
+    @classmethod
+    def HOT_RELOAD_MAX_CHRF_DROP(cls) -> Optional[float]:
+        val = cls._get("HOT_RELOAD_MAX_CHRF_DROP")
+        return float(val) if val else None
+    
+    # Inference settings
+    @classmethod
+    def INFERENCE_SETTINGS_PATH(cls) -> Optional[str]:
+        return cls._get("INFERENCE_SETTINGS_PATH")
+    
+    @classmethod
+    def TORCH_INTRA_OP_THREADS(cls) -> Optional[int]:
+        val = cls._get("TORCH_INTRA_OP_THREADS")
+        return int(val) if val else None
+    
+    @classmethod
+    def TORCH_INTER_OP_THREADS(cls) -> Optional[int]:
+        val = cls._get("TORCH_INTER_OP_THREADS")
+        return int(val) if val else None
+    
+    @classmethod
+    def INFERENCE_WORKERS(cls) -> Optional[int]:
+        val = cls._get("INFERENCE_WORKERS")
+        return int(val) if val else None
+    
+    @classmethod
+    def INFERENCE_BATCH_SIZE(cls) -> Optional[int]:
+        val = cls._get("INFERENCE_BATCH_SIZE")
+        return int(val) if val else None
+    
+    # Translation memory
+    @classmethod
+    def TRANSLATION_MEMORY_PATH(cls) -> Optional[str]:
+        return cls._get("TRANSLATION_MEMORY_PATH")
+    
+    @classmethod
+    def TRANSLATION_MEMORY_FUZZY_THRESHOLD(cls) -> Optional[float]:
+        val = cls._get("TRANSLATION_MEMORY_FUZZY_THRESHOLD")
+        return float(val) if val else None
+    
     # Weights & Biases
     @classmethod
     def WANDB_API_KEY(cls) -> Optional[str]:
@@ -89,6 +208,58 @@ class EnvConfig:
         val = cls._get("NUM_TRAIN_EPOCHS")
         return int(val) if val else None
     
+    @classmethod
+    def MAX_STEPS(cls) -> Optional[int]:
+        val = cls._get("MAX_STEPS")
+        return int(val) if val else None
+    
+    @classmethod
+    def EVAL_STEPS(cls) -> Optional[int]:
+        val = cls._get("EVAL_STEPS")
+        return int(val) if val else None
+    
+    @classmethod
+    def EVAL_SUBSET_SIZE(cls) -> Optional[int]:
+        val = cls._get("EVAL_SUBSET_SIZE")
+        return int(val) if val else None
+    
+    @classmethod
+    def EARLY_STOPPING_PATIENCE(cls) -> Optional[int]:
+        val = cls._get("EARLY_STOPPING_PATIENCE")
+        return int(val) if val else None
+    
+    @classmethod
+    def AVERAGE_CHECKPOINTS(cls) -> Optional[int]:
+        val = cls._get("AVERAGE_CHECKPOINTS")
+        return int(val) if val else None
+    
+    @classmethod
+    def PREDICTION_STORE_DIR(cls) -> Optional[str]:
+        return cls._get("PREDICTION_STORE_DIR")
+    
+    @classmethod
+    def PROFILE_TRAINING(cls) -> bool:
+        val = cls._get("PROFILE_TRAINING", "false")
+        return val.lower() == "true" if val else False
+    
+    @classmethod
+    def ASYNC_CHECKPOINTING(cls) -> bool:
+        val = cls._get("ASYNC_CHECKPOINTING", "false")
+        return val.lower() == "true" if val else False
+    
+    @classmethod
+    def HUB_LOCAL_DIR(cls) -> Optional[str]:
+        return cls._get("HUB_LOCAL_DIR")
+    
+    @classmethod
+    def EXTERNAL_EVALUATION(cls) -> bool:
+        val = cls._get("EXTERNAL_EVALUATION", "false")
+        return val.lower() == "true" if val else False
+    
+    @classmethod
+    def EVAL_WORKER_TEST_FILE(cls) -> Optional[str]:
+        return cls._get("EVAL_WORKER_TEST_FILE")
+    
     @classmethod
     def LEARNING_RATE(cls) -> Optional[float]:
         val = cls._get("LEARNING_RATE")
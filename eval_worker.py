@@ -0,0 +1,442 @@
+"""
+Evaluation worker module for the French-Wolof Translator.
+Scores training checkpoints in a separate process, so training never
+stops for evaluation.
+
+Usage:
+    python eval_worker.py --output-dir wolofToFrenchTranslator_nllb --test-file data/test.jsonl
+
+With ``TrainingConfig.external_evaluation`` (EXTERNAL_EVALUATION=true) the
+training loop only writes checkpoints. The worker polls the output
+directory and evaluates every complete ``checkpoint-<step>`` directory
+(staging ``.tmp`` directories and checkpoints whose trainer state is not
+written yet are skipped) with batched translation of a test file. Each
+result is written into the checkpoint (``external_eval.json``) and
+appended to ``<output_dir>/external_eval.jsonl``. On the training side,
+ExternalEvaluationCallback reads these results back to track the best
+checkpoint, keep unevaluated checkpoints from rotation and stop early;
+ModelTrainer loads the best checkpoint at the end of training. The worker
+exits once training has finished and every checkpoint is scored.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from transformers import TrainerCallback
+from transformers.trainer import TRAINER_STATE_NAME
+
+from checkpoint_utils import list_checkpoints, rotate_checkpoints
+from config import EvalWorkerConfig, InferenceConfig, TrainingConfig
+
+# Result of one checkpoint, written into the checkpoint directory
+RESULTS_NAME = "external_eval.json"
+# Every result in evaluation order, in the training output directory
+HISTORY_NAME = "external_eval.jsonl"
+# Written by ModelTrainer when training has finished
+DONE_NAME = "training_done.json"
+
+
+def load_pairs(path: str, max_samples: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    Load test pairs.
+
+    Args:
+        path: JSONL file with "french" and "wolof" fields per line
+        max_samples: Number of pairs to keep (from the start of the file; all if None)
+
+    Returns:
+        Test pairs
+    """
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                pairs.append(json.loads(line))
+            if max_samples and len(pairs) >= max_samples:
+                break
+    return pairs
+
+
+def is_complete(checkpoint_dir: str) -> bool:
+    """
+    Check that a checkpoint has been fully written.
+
+    The Trainer writes the trainer state after the weights, and the
+    asynchronous checkpointer only renames a staging directory once it is
+    complete, so the trainer state marks a finished checkpoint.
+
+    Args:
+        checkpoint_dir: Checkpoint directory
+
+    Returns:
+        Whether the checkpoint can be loaded
+    """
+    return os.path.isfile(os.path.join(checkpoint_dir, TRAINER_STATE_NAME))
+
+
+def read_result(checkpoint_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the evaluation result of a checkpoint.
+
+    Args:
+        checkpoint_dir: Checkpoint directory
+
+    Returns:
+        Result, or None if the checkpoint has not been evaluated
+    """
+    path = os.path.join(checkpoint_dir, RESULTS_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_history(output_dir: str) -> List[Dict[str, Any]]:
+    """
+    Read every evaluation result of a training run.
+
+    Args:
+        output_dir: Training output directory
+
+    Returns:
+        Results in evaluation order
+    """
+    path = os.path.join(output_dir, HISTORY_NAME)
+    if not os.path.isfile(path):
+        return []
+    results = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            # A line being appended by the worker may be incomplete
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return results
+
+
+def _write_json(path: str, value: Dict[str, Any]) -> None:
+    """Write a JSON file atomically."""
+    staging_path = path + ".tmp"
+    with open(staging_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, indent=2)
+    os.replace(staging_path, path)
+
+
+def mark_training_done(output_dir: str, global_step: int) -> None:
+    """Tell the worker that no more checkpoints will be written."""
+    _write_json(os.path.join(output_dir, DONE_NAME), {"global_step": global_step, "time": time.time()})
+
+
+def clear_training_done(output_dir: str) -> None:
+    """Remove the marker of a previous run before training starts."""
+    path = os.path.join(output_dir, DONE_NAME)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class EvaluationWorker:
+    """Evaluates the checkpoints of a training run as they appear."""
+
+    def __init__(
+        self,
+        output_dir: str,
+        pairs: List[Dict[str, str]],
+        config: Optional[EvalWorkerConfig] = None,
+        device: Optional[str] = None
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            output_dir: Training output directory to watch
+            pairs: Test pairs with "french" and "wolof" fields
+            config: Worker configuration
+            device: Device of the evaluated translators (auto-detected if None)
+
+        Raises:
+            ValueError: If no test pairs are given
+        """
+        if not pairs:
+            raise ValueError("The evaluation worker needs at least one test pair.")
+        self.output_dir = output_dir
+        self.config = config or EvalWorkerConfig()
+        self.device = device
+        target_lang = "wo" if self.config.source_lang == "fr" else "fr"
+        fields = {"fr": "french", "wo": "wolof"}
+        self.sources = [pair[fields[self.config.source_lang]] for pair in pairs]
+        self.references = [pair[fields[target_lang]] for pair in pairs]
+        self._evaluator = None
+
+    def pending(self) -> List[str]:
+        """
+        List complete checkpoints without a result.
+
+        Returns:
+            Checkpoint directories, oldest first
+        """
+        return [
+            checkpoint_dir for checkpoint_dir in list_checkpoints(self.output_dir)
+            if is_complete(checkpoint_dir) and read_result(checkpoint_dir) is None
+        ]
+
+    def training_done(self) -> bool:
+        """Whether training has finished writing checkpoints."""
+        return os.path.exists(os.path.join(self.output_dir, DONE_NAME))
+
+    def evaluate(self, checkpoint_dir: str) -> Dict[str, Any]:
+        """
+        Translate the test set with a checkpoint and record its scores.
+
+        Args:
+            checkpoint_dir: Complete checkpoint directory
+
+        Returns:
+            Result with the step, BLEU, chrF and decoding speed, or an
+            "error" if the checkpoint could not be evaluated
+        """
+        from translator import FrenchWolofTranslator
+        name = os.path.basename(checkpoint_dir)
+        result: Dict[str, Any] = {"checkpoint": name, "step": int(name.rsplit("-", 1)[1])}
+        try:
+            translator = FrenchWolofTranslator(
+                model_checkpoint=checkpoint_dir,
+                device=self.device,
+                inference_config=InferenceConfig(batch_size=self.config.batch_size)
+            )
+            # Score the model, not stored translations
+            translator.translation_memory = None
+            start = time.perf_counter()
+            predictions = translator.translate_batch(
+                self.sources,
+                source_lang=self.config.source_lang,
+                max_length=self.config.max_length,
+                num_beams=self.config.num_beams
+            )
+            seconds = time.perf_counter() - start
+            if self._evaluator is None:
+                from evaluator import Evaluator
+                self._evaluator = Evaluator(translator.tokenizer)
+            scores = self._evaluator.compute_text_metrics(predictions, self.references)
+            result.update({name: round(value, 4) for name, value in scores.items()})
+            result.update({
+                "samples": len(self.sources),
+                "seconds": round(seconds, 4),
+                "sentences_per_second": round(len(self.sources) / seconds, 2),
+            })
+            del translator
+        except Exception as error:
+            if not os.path.isdir(checkpoint_dir):
+                # Deleted while being evaluated: nothing to write the result to
+                return {**result, "error": "checkpoint deleted"}
+            result["error"] = f"{type(error).__name__}: {error}"
+        result["evaluated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+        _write_json(os.path.join(checkpoint_dir, RESULTS_NAME), result)
+        with open(os.path.join(self.output_dir, HISTORY_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        return result
+
+    def run(self, once: bool = False, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate checkpoints until training is done and none is left.
+
+        Args:
+            once: Evaluate the checkpoints present now, then return
+            timeout: Seconds without a new checkpoint after which to give up
+                (no limit if None)
+
+        Returns:
+            Results of the checkpoints evaluated by this call
+        """
+        results = []
+        idle_since = time.monotonic()
+        while True:
+            # Read the marker first: checkpoints listed afterwards are the last ones
+            done = once or self.training_done()
+            pending = self.pending()
+            for checkpoint_dir in pending:
+                result = self.evaluate(checkpoint_dir)
+                results.append(result)
+                print_result(result, self.config.metric)
+            if pending:
+                idle_since = time.monotonic()
+            elif done:
+                return results
+            elif timeout is not None and time.monotonic() - idle_since > timeout:
+                print(f"No new checkpoint for {timeout}s, stopping")
+                return results
+            else:
+                time.sleep(self.config.poll_seconds)
+
+
+def print_result(result: Dict[str, Any], metric: str) -> None:
+    """Print one evaluation."""
+    if "error" in result:
+        print(f"  {result['checkpoint']}: failed ({result['error']})")
+    else:
+        print(f"  {result['checkpoint']}: {metric} {result[metric]:.2f} "
+              f"({result['samples']} sentences, {result['sentences_per_second']:.1f} sentences/s)")
+
+
+class ExternalEvaluationCallback(TrainerCallback):
+    """
+    Reads evaluation worker results back into training.
+
+    Results update the trainer state's best checkpoint (so it is kept and
+    can be loaded at the end) and its log history, and count towards
+    early stopping. This callback also rotates checkpoints in place of the
+    Trainer: only checkpoints that have been evaluated are deleted.
+    """
+
+    def __init__(
+        self,
+        metric: str = "bleu",
+        save_total_limit: Optional[int] = None,
+        average_last_checkpoints: int = 1,
+        early_stopping_patience: Optional[int] = None,
+        early_stopping_threshold: float = 0.0,
+        in_use: Optional[Callable[[str], bool]] = None
+    ):
+        """
+        Initialize the callback.
+
+        Args:
+            metric: Result field used to select the best checkpoint (higher is better)
+            save_total_limit: Checkpoints kept on disk (all if None)
+            average_last_checkpoints: Checkpoints averaged at the end of
+                training; rotation keeps that many ending at the best one
+            early_stopping_patience: Results without improvement before training
+                stops (never if None)
+            early_stopping_threshold: Minimum improvement that resets patience
+            in_use: Tells whether a checkpoint must not be deleted yet (e.g.
+                AsyncCheckpointer.in_use for pending uploads)
+        """
+        self.metric = metric
+        self.save_total_limit = save_total_limit
+        self.average_last_checkpoints = average_last_checkpoints
+        self.early_stopping_patience = early_stopping_patience
+        self.early_stopping_threshold = early_stopping_threshold
+        self.in_use = in_use
+        self.results: List[Dict[str, Any]] = []
+        self.evaluations_without_improvement = 0
+        self._history_size = -1
+
+    def collect(self, args, state) -> List[Dict[str, Any]]:
+        """
+        Read results written since the last call.
+
+        Args:
+            args: Training arguments
+            state: Trainer state, updated with the best checkpoint
+
+        Returns:
+            New results
+        """
+        path = os.path.join(args.output_dir, HISTORY_NAME)
+        size = os.path.getsize(path) if os.path.isfile(path) else 0
+        if size == self._history_size:
+            return []
+        self._history_size = size
+
+        seen = {result["checkpoint"] for result in self.results}
+        new_results = [
+            result for result in read_history(args.output_dir)
+            if result["checkpoint"] not in seen and "error" not in result
+        ]
+        for result in new_results:
+            self.results.append(result)
+            value = result[self.metric]
+            state.log_history.append({
+                "step": result["step"],
+                f"external_eval_{self.metric}": value,
+                "external_eval_checkpoint": result["checkpoint"],
+            })
+            if state.best_metric is None or value > state.best_metric + self.early_stopping_threshold:
+                self.evaluations_without_improvement = 0
+            else:
+                self.evaluations_without_improvement += 1
+            if state.best_metric is None or value > state.best_metric:
+                state.best_metric = value
+                state.best_global_step = result["step"]
+                state.best_model_checkpoint = os.path.join(args.output_dir, result["checkpoint"])
+        return new_results
+
+    def rotate(self, args, state) -> None:
+        """Delete old evaluated checkpoints beyond the limit, keeping the best ones."""
+        if not self.save_total_limit:
+            return
+        protected = [
+            checkpoint_dir for checkpoint_dir in list_checkpoints(args.output_dir)
+            if read_result(checkpoint_dir) is None or (self.in_use is not None and self.in_use(checkpoint_dir))
+        ]
+        rotate_checkpoints(
+            args.output_dir,
+            self.save_total_limit,
+            best_model_checkpoint=state.best_model_checkpoint,
+            window=self.average_last_checkpoints,
+            protected=protected
+        )
+
+    def on_step_end(self, args, state, control, **kwargs):
+        # Reading the history is a stat() unless the worker appended a result
+        if not state.is_world_process_zero:
+            return
+        self.collect(args, state)
+        if self.early_stopping_patience and self.evaluations_without_improvement >= self.early_stopping_patience:
+            print(f"Stopping: {self.evaluations_without_improvement} external evaluations without "
+                  f"{self.metric} improvement")
+            control.should_training_stop = True
+
+    def on_save(self, args, state, control, **kwargs):
+        if state.is_world_process_zero:
+            self.collect(args, state)
+            self.rotate(args, state)
+
+
+def main():
+    """Command-line entry point."""
+    defaults = EvalWorkerConfig()
+    parser = argparse.ArgumentParser(description="Evaluate training checkpoints as they are written.")
+    parser.add_argument("--output-dir", default=None, help="Training output directory (defaults to OUTPUT_DIR)")
+    parser.add_argument("--test-file", default=defaults.test_path,
+                        help="JSONL of french/wolof pairs (defaults to EVAL_WORKER_TEST_FILE)")
+    parser.add_argument("--max-samples", type=int, default=defaults.max_samples)
+    parser.add_argument("--source-lang", default=defaults.source_lang, choices=["fr", "wo"])
+    parser.add_argument("--num-beams", type=int, default=defaults.num_beams)
+    parser.add_argument("--max-length", type=int, default=defaults.max_length)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--metric", default=defaults.metric, choices=["bleu", "chrf"])
+    parser.add_argument("--poll-seconds", type=float, default=defaults.poll_seconds)
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Stop after this many seconds without a new checkpoint")
+    parser.add_argument("--once", action="store_true", help="Evaluate the current checkpoints and exit")
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+    if not args.test_file:
+        parser.error("--test-file (or EVAL_WORKER_TEST_FILE) is required")
+
+    config = EvalWorkerConfig(
+        test_path=args.test_file,
+        max_samples=args.max_samples,
+        source_lang=args.source_lang,
+        num_beams=args.num_beams,
+        max_length=args.max_length,
+        batch_size=args.batch_size,
+        metric=args.metric,
+        poll_seconds=args.poll_seconds,
+    )
+    output_dir = args.output_dir or TrainingConfig().output_dir
+    worker = EvaluationWorker(output_dir, load_pairs(config.test_path, config.max_samples), config, device=args.device)
+    print(f"Watching {output_dir} ({len(worker.sources)} test sentences)")
+    results = [result for result in worker.run(once=args.once, timeout=args.timeout) if "error" not in result]
+    if results:
+        best = max(results, key=lambda result: result[config.metric])
+        print(f"Best: {best['checkpoint']} ({config.metric} {best[config.metric]:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 """
 Evaluation module for the French-Wolof Translator.
-Handles model evaluation using BLEU score and other metrics.
+Handles model evaluation using BLEU, chrF and other metrics.
 """
 import numpy as np
 import evaluate
 from transformers import AutoTokenizer
-from typing import Dict, Tuple, Any
+from typing import Dict, List, Tuple, Any
 
 
 class Evaluator:
@@ -20,6 +20,7 @@ class Evaluator:
         """
         self.tokenizer = tokenizer
         self.metric = evaluate.load("sacrebleu")
+        self.chrf_metric = evaluate.load("chrf")
     
     def postprocess_text(self, preds: list, labels: list) -> Tuple[list, list]:
         """
@@ -36,9 +37,37 @@ class Evaluator:
         labels = [[label.strip()] for label in labels]
         return preds, labels
     
+    def compute_text_metrics(self, preds: List[str], references: List[str]) -> Dict[str, float]:
+        """
+        Compute BLEU and chrF scores for decoded translations.
+        
+        Args:
+            preds: Predicted translations
+            references: Reference translations, aligned with preds
+            
+        Returns:
+            Dictionary with "bleu" and "chrf" scores
+        """
+        preds, labels = self.postprocess_text(preds, references)
+        
+        # Compute BLEU score
+        result = self.metric.compute(
+            predictions=preds,
+            references=labels
+        )
+        result = {"bleu": result["score"]}
+        
+        # Compute chrF score (more robust than BLEU for Wolof morphology)
+        chrf = self.chrf_metric.compute(
+            predictions=preds,
+            references=labels
+        )
+        result["chrf"] = chrf["score"]
+        return result
+    
     def compute_metrics(self, eval_preds: Tuple) -> Dict[str, float]:
         """
-        Compute evaluation metrics (BLEU score).
+        Compute evaluation metrics (BLEU and chrF scores).
         
         Args:
             eval_preds: Tuple containing predictions and labels
@@ -52,6 +81,10 @@ class Evaluator:
         if isinstance(preds, tuple):
             preds = preds[0]
         
+        # Predictions of different lengths are padded with -100 when batches
+        # are concatenated
+        preds = np.where(preds != -100, preds, self.tokenizer.pad_token_id)
+        
         # Decode predictions
         decoded_preds = self.tokenizer.batch_decode(
             preds,
@@ -69,18 +102,7 @@ class Evaluator:
             skip_special_tokens=True
         )
         
-        # Postprocess
-        decoded_preds, decoded_labels = self.postprocess_text(
-            decoded_preds,
-            decoded_labels
-        )
-        
-        # Compute BLEU score
-        result = self.metric.compute(
-            predictions=decoded_preds,
-            references=decoded_labels
-        )
-        result = {"bleu": result["score"]}
+        result = self.compute_text_metrics(decoded_preds, decoded_labels)
         
         # Compute average generation length
         prediction_lens = [
@@ -0,0 +1,329 @@
+"""
+Hot reload module for the French-Wolof Translator.
+Swaps a new checkpoint into a running service without dropping requests.
+
+Requests lease the active translator for the duration of one call (one
+batch). A reload runs in a background thread:
+
+1. the new checkpoint is loaded and warmed up next to the serving one,
+2. it translates a canary set, which must succeed, produce non-empty
+   output and not score (chrF) much worse than the serving model,
+3. it becomes the active translator (requests starting after this point
+   use it; calls already running finish on the old one),
+4. once every lease on the old translator is released, its weights are
+   freed.
+
+A reload that fails at any step leaves the serving translator untouched.
+"""
+import gc
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+import torch
+
+from config import HotReloadConfig
+from translator import FrenchWolofTranslator
+
+
+class CanaryFailed(Exception):
+    """Raised (through the reload's future) when a new model fails validation."""
+
+
+def load_canary(path: str, size: int) -> List[Dict[str, str]]:
+    """
+    Load canary pairs.
+
+    Args:
+        path: JSONL file with "french" and "wolof" fields per line
+        size: Number of pairs to keep (from the start of the file)
+
+    Returns:
+        Canary pairs
+    """
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                pairs.append(json.loads(line))
+            if len(pairs) >= size:
+                break
+    return pairs
+
+
+@dataclass
+class _Slot:
+    """A loaded translator and the number of calls using it."""
+    translator: Optional[FrenchWolofTranslator]
+    checkpoint: str
+    version: int
+    in_flight: int = 0
+
+
+class HotReloader:
+    """Serves a translator and replaces it with new checkpoints while running."""
+
+    def __init__(
+        self,
+        translator: FrenchWolofTranslator,
+        config: Optional[HotReloadConfig] = None,
+        canary: Optional[List[Dict[str, str]]] = None
+    ):
+        """
+        Initialize the reloader around a loaded translator.
+
+        Args:
+            translator: Translator currently serving
+            config: Hot reload configuration
+            canary: French/Wolof pairs checked before a swap (defaults to
+                ``config.canary_path``; without a canary set only a warm-up
+                translation is checked)
+        """
+        self.config = config or HotReloadConfig()
+        if canary is None and self.config.canary_path:
+            canary = load_canary(self.config.canary_path, self.config.canary_size)
+        self.canary = canary or []
+        self._active = _Slot(translator, translator.model_checkpoint, version=1)
+        self._condition = threading.Condition()
+        # One worker: reloads run one at a time, in submission order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hot-reload")
+        self._evaluator = None
+        self.history: List[Dict[str, Any]] = []
+
+    @property
+    def translator(self) -> FrenchWolofTranslator:
+        """The translator new requests are served with."""
+        return self._active.translator
+
+    @property
+    def checkpoint(self) -> str:
+        """Checkpoint of the active translator."""
+        return self._active.checkpoint
+
+    @property
+    def version(self) -> int:
+        """Number of the active translator (1 for the initial one, +1 per swap)."""
+        return self._active.version
+
+    @contextmanager
+    def acquire(self) -> Iterator[FrenchWolofTranslator]:
+        """
+        Lease the active translator for one call.
+
+        The translator is not freed before the lease is released, even if a
+        reload swaps in a new one meanwhile.
+
+        Yields:
+            The active translator
+        """
+        with self._condition:
+            slot = self._active
+            slot.in_flight += 1
+        try:
+            yield slot.translator
+        finally:
+            with self._condition:
+                slot.in_flight -= 1
+                self._condition.notify_all()
+
+    def translate(self, text: str, source_lang: str = "fr", max_length: Optional[int] = None) -> str:
+        """
+        Translate a text with the active translator.
+
+        Args:
+            text: Text to translate
+            source_lang: Source language code ('fr', 'wo' or 'auto')
+            max_length: Maximum generation length (uses config default if None)
+
+        Returns:
+            Translated text
+        """
+        with self.acquire() as translator:
+            return translator.translate(text, source_lang=source_lang, max_length=max_length)
+
+    def translate_batch(self, texts: List[str], source_lang: str = "fr", **kwargs) -> List[str]:
+        """
+        Translate a batch with the active translator.
+
+        A reload never swaps models in the middle of a batch. The reloader
+        can stand in for the translator of an InferenceScheduler.
+
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code ('fr', 'wo' or 'auto')
+            **kwargs: Other ``FrenchWolofTranslator.translate_batch`` arguments
+
+        Returns:
+            Translated texts, aligned with the inputs
+        """
+        with self.acquire() as translator:
+            return translator.translate_batch(texts, source_lang=source_lang, **kwargs)
+
+    def reload(self, checkpoint: str, **translator_kwargs) -> "Future[Dict[str, Any]]":
+        """
+        Load, validate and swap in a new checkpoint in the background.
+
+        Args:
+            checkpoint: New model checkpoint (e.g. the output of train.py)
+            **translator_kwargs: FrenchWolofTranslator arguments overriding
+                those of the serving translator (device, configs, draft model,
+                memory and language classifier are reused by default)
+
+        Returns:
+            Future resolving to the reload report, or raising CanaryFailed
+            (or the loading error) when the checkpoint is rejected
+        """
+        return self._executor.submit(self._reload, checkpoint, translator_kwargs)
+
+    def _inherited_kwargs(self) -> Dict[str, Any]:
+        """
+        Arguments the serving translator was built with, reused by reloads.
+
+        Only settings are read, so no reference to the serving translator
+        outlives this call and its weights can be freed after the swap.
+        """
+        current = self._active.translator
+        return {
+            "device": str(current.device),
+            "model_config": current.model_config,
+            "dataset_config": current.dataset_config,
+            "translation_memory": current.translation_memory,
+            "language_classifier": current.language_classifier,
+            "inference_config": current.inference_config,
+            "draft_model_checkpoint": current.draft_model_checkpoint,
+        }
+
+    def _reload(self, checkpoint: str, translator_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one reload (on the reload worker thread)."""
+        report: Dict[str, Any] = {"checkpoint": checkpoint, "swapped": False}
+        start = time.perf_counter()
+        try:
+            kwargs = self._inherited_kwargs()
+            kwargs.update(translator_kwargs)
+            # The new model gets its own tokenizer: both translators run
+            # concurrently while the old one drains and each sets src_lang
+            candidate = FrenchWolofTranslator(checkpoint, **kwargs)
+            report["load_seconds"] = round(time.perf_counter() - start, 4)
+
+            # Validate the model itself: memory hits would return stored
+            # references for canary sentences and hide broken output
+            memory = candidate.translation_memory
+            candidate.translation_memory = None
+            report["canary"] = self.validate(candidate)
+            if not report["canary"]["passed"]:
+                raise CanaryFailed(f"Checkpoint {checkpoint} failed validation: {report['canary']['reason']}")
+            candidate.translation_memory = memory
+        except Exception as error:
+            report["error"] = str(error)
+            self.history.append(report)
+            candidate = None
+            self._free()
+            raise
+
+        with self._condition:
+            old = self._active
+            self._active = _Slot(candidate, checkpoint, version=old.version + 1)
+        report["swapped"] = True
+        report["version"] = self._active.version
+        report["swap_seconds"] = round(time.perf_counter() - start, 4)
+        print(f"Swapped in {checkpoint} (version {report['version']})")
+
+        drain_start = time.perf_counter()
+        with self._condition:
+            report["drained"] = self._condition.wait_for(
+                lambda: old.in_flight == 0, timeout=self.config.drain_timeout
+            )
+        report["drain_seconds"] = round(time.perf_counter() - drain_start, 4)
+        # Calls still running keep their own reference; the weights go when they finish
+        old.translator = None
+        self._free()
+        self.history.append(report)
+        return report
+
+    def validate(self, candidate: FrenchWolofTranslator) -> Dict[str, Any]:
+        """
+        Check a loaded translator against the canary set.
+
+        Also warms the candidate up, so its first real request does not pay
+        one-off initialization costs.
+
+        Args:
+            candidate: Newly loaded translator
+
+        Returns:
+            Report with "passed", a "reason" when it did not, timing and
+            canary chrF of the candidate (and of the serving translator)
+        """
+        if not self.canary:
+            start = time.perf_counter()
+            outputs = [candidate.translate("Bonjour", source_lang="fr"), candidate.translate("Salaam", source_lang="wo")]
+            result = {"passed": all(o.strip() for o in outputs), "warmup_seconds": round(time.perf_counter() - start, 4)}
+            if not result["passed"]:
+                result["reason"] = "empty warm-up translation"
+            return result
+
+        sources = [pair["french"] for pair in self.canary]
+        references = [pair["wolof"] for pair in self.canary]
+        start = time.perf_counter()
+        outputs = candidate.translate_batch(sources, source_lang="fr", use_memory=False)
+        result: Dict[str, Any] = {
+            "pairs": len(sources),
+            "seconds": round(time.perf_counter() - start, 4),
+            "empty": sum(not output.strip() for output in outputs),
+        }
+        if result["empty"]:
+            return {**result, "passed": False, "reason": f"{result['empty']} empty translations"}
+
+        if self.config.min_canary_chrf is None and self.config.max_chrf_drop is None:
+            return {**result, "passed": True}
+        if self._evaluator is None:
+            from evaluator import Evaluator
+            self._evaluator = Evaluator(candidate.tokenizer)
+        result["chrf"] = round(self._evaluator.compute_text_metrics(outputs, references)["chrf"], 2)
+        if self.config.min_canary_chrf is not None and result["chrf"] < self.config.min_canary_chrf:
+            return {**result, "passed": False, "reason": f"chrF {result['chrf']} below {self.config.min_canary_chrf}"}
+        if self.config.max_chrf_drop is not None:
+            # Scored on the serving model under a lease, like any other request
+            with self.acquire() as current:
+                serving = current.translate_batch(sources, source_lang="fr", use_memory=False)
+            result["serving_chrf"] = round(self._evaluator.compute_text_metrics(serving, references)["chrf"], 2)
+            if result["chrf"] < result["serving_chrf"] - self.config.max_chrf_drop:
+                return {
+                    **result,
+                    "passed": False,
+                    "reason": f"chrF {result['chrf']} is more than {self.config.max_chrf_drop} "
+                              f"below the serving model's {result['serving_chrf']}",
+                }
+        return {**result, "passed": True}
+
+    @staticmethod
+    def _free() -> None:
+        """Release memory of dropped translators."""
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the serving state.
+
+        Returns:
+            Dictionary with the active checkpoint, version, in-flight calls
+            and the reports of past reloads
+        """
+        with self._condition:
+            return {
+                "checkpoint": self._active.checkpoint,
+                "version": self._active.version,
+                "in_flight": self._active.in_flight,
+                "reloads": list(self.history),
+            }
+
+    def close(self) -> None:
+        """Wait for pending reloads and stop the reload worker."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,263 @@
+"""
+Language identification module for the French-Wolof Translator.
+A small naive Bayes classifier over hashed character n-grams, trained
+from the parallel corpus, that tells French from Wolof.
+
+Usage:
+    python language_id.py --output language_id.npz
+
+Features are hashed for a whole batch at once and scores are one table
+lookup per n-gram plus a per-sentence sum, so a batch of sentences is
+scored in a single numpy pass.
+"""
+import argparse
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from corpus_filter import COLUMN_LANGUAGES, normalize_text
+
+
+# Multiplier of the n-gram rolling hash and the final bit mixer
+_HASH_MULTIPLIER = np.uint64(1000003)
+_HASH_MIXER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class CharNgramLanguageClassifier:
+    """French/Wolof classifier over hashed character n-grams."""
+
+    def __init__(
+        self,
+        languages: Sequence[str] = ("fr", "wo"),
+        ngram_range: Sequence[int] = (1, 4),
+        num_features: int = 1 << 16,
+        min_margin: float = 0.0
+    ):
+        """
+        Initialize an untrained classifier.
+
+        Args:
+            languages: Language codes to tell apart
+            ngram_range: Smallest and largest n-gram size (inclusive)
+            num_features: Size of the hashed feature space
+            min_margin: Log-probability margin below which ``__call__``
+                returns None instead of a language
+        """
+        self.languages = list(languages)
+        self.ngram_range = tuple(ngram_range)
+        self.num_features = num_features
+        self.min_margin = min_margin
+        # log P(feature | language), shape (num_languages, num_features)
+        self.feature_log_probs = np.zeros((len(self.languages), num_features), dtype=np.float32)
+        self.class_log_priors = np.zeros(len(self.languages), dtype=np.float32)
+
+    def batch_features(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hash the character n-grams of many texts in one vectorized pass.
+
+        The texts are concatenated into a single code point array; n-grams
+        crossing a text boundary are discarded.
+
+        Args:
+            texts: Raw texts
+
+        Returns:
+            Tuple of (feature indices, index of the text each feature belongs to)
+        """
+        padded = [f" {normalize_text(text)} " for text in texts]
+        codepoints = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        text_ids = np.repeat(np.arange(len(texts)), [len(text) for text in padded])
+        low, high = self.ngram_range
+        features, owners = [], []
+        for n in range(low, high + 1):
+            count = len(codepoints) - n + 1
+            if count <= 0:
+                break
+            # Polynomial rolling hash of each n-gram (uint64 arithmetic wraps)
+            h = np.full(count, n, dtype=np.uint64)
+            for k in range(n):
+                h = h * _HASH_MULTIPLIER + codepoints[k:k + count]
+            inside = text_ids[:count] == text_ids[n - 1:]
+            features.append(h[inside])
+            owners.append(text_ids[:count][inside])
+        if not features:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        mixed = (np.concatenate(features) * _HASH_MIXER) >> np.uint64(32)
+        return (mixed % np.uint64(self.num_features)).astype(np.int64), np.concatenate(owners)
+
+    def fit(self, texts: Iterable[str], labels: Iterable[str], alpha: float = 1.0) -> "CharNgramLanguageClassifier":
+        """
+        Train the classifier.
+
+        Args:
+            texts: Training sentences
+            labels: Their language codes
+            alpha: Additive (Laplace) smoothing
+
+        Returns:
+            The trained classifier
+
+        Raises:
+            ValueError: If a label is not one of the classifier's languages
+        """
+        counts = np.zeros((len(self.languages), self.num_features), dtype=np.float64)
+        documents = np.zeros(len(self.languages), dtype=np.float64)
+        pending = [[] for _ in self.languages]
+
+        def flush(row: int) -> None:
+            features, _ = self.batch_features(pending[row])
+            counts[row] += np.bincount(features, minlength=self.num_features)
+            pending[row] = []
+
+        for text, label in zip(texts, labels):
+            if label not in self.languages:
+                raise ValueError(f"Unknown language label: {label}.")
+            row = self.languages.index(label)
+            pending[row].append(text)
+            documents[row] += 1
+            if len(pending[row]) >= 10000:
+                flush(row)
+        for row in range(len(self.languages)):
+            if pending[row]:
+                flush(row)
+        counts += alpha
+        self.feature_log_probs = (
+            np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+        ).astype(np.float32)
+        self.class_log_priors = np.log(
+            (documents + 1) / (documents.sum() + len(self.languages))
+        ).astype(np.float32)
+        return self
+
+    def fit_pairs(self, pairs: Iterable[dict]) -> "CharNgramLanguageClassifier":
+        """
+        Train from parallel records (both sides of every pair are used).
+
+        Args:
+            pairs: Records with "french" and "wolof" fields
+
+        Returns:
+            The trained classifier
+        """
+        texts, labels = [], []
+        for pair in pairs:
+            for column, lang in COLUMN_LANGUAGES.items():
+                if pair.get(column):
+                    texts.append(pair[column])
+                    labels.append(lang)
+        return self.fit(texts, labels)
+
+    def scores(self, texts: List[str]) -> np.ndarray:
+        """
+        Compute log-probability scores for a batch.
+
+        Args:
+            texts: Sentences
+
+        Returns:
+            Array of shape (len(texts), num_languages)
+        """
+        features, owners = self.batch_features(texts)
+        scores = np.tile(self.class_log_priors, (len(texts), 1)).astype(np.float64)
+        for row in range(len(self.languages)):
+            scores[:, row] += np.bincount(
+                owners,
+                weights=self.feature_log_probs[row, features],
+                minlength=len(texts)
+            )
+        return scores
+
+    def predict(self, texts: List[str]) -> List[str]:
+        """
+        Predict the language of each sentence.
+
+        Args:
+            texts: Sentences
+
+        Returns:
+            Language codes, aligned with texts
+        """
+        if not texts:
+            return []
+        return [self.languages[index] for index in self.scores(texts).argmax(axis=1)]
+
+    def __call__(self, text: str) -> Optional[str]:
+        """
+        Identify one sentence (compatible with CorpusFilter's language_identifier).
+
+        Args:
+            text: Sentence
+
+        Returns:
+            Language code, or None if the margin is below ``min_margin``
+        """
+        scores = self.scores([text])[0]
+        order = np.argsort(scores)[::-1]
+        if len(order) > 1 and scores[order[0]] - scores[order[1]] < self.min_margin:
+            return None
+        return self.languages[order[0]]
+
+    def save(self, path: str) -> None:
+        """
+        Save the classifier to an .npz file.
+
+        Args:
+            path: Output file
+        """
+        np.savez(
+            path,
+            languages=np.array(self.languages),
+            ngram_range=np.array(self.ngram_range),
+            min_margin=np.array(self.min_margin),
+            feature_log_probs=self.feature_log_probs,
+            class_log_priors=self.class_log_priors
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CharNgramLanguageClassifier":
+        """
+        Load a classifier saved with ``save``.
+
+        Args:
+            path: .npz file
+
+        Returns:
+            CharNgramLanguageClassifier
+        """
+        arrays = np.load(path)
+        classifier = cls(
+            languages=arrays["languages"].tolist(),
+            ngram_range=arrays["ngram_range"].tolist(),
+            num_features=arrays["feature_log_probs"].shape[1],
+            min_margin=float(arrays["min_margin"])
+        )
+        classifier.feature_log_probs = arrays["feature_log_probs"]
+        classifier.class_log_priors = arrays["class_log_priors"]
+        return classifier
+
+
+def main():
+    """Command-line entry point: train a classifier from the parallel corpus."""
+    parser = argparse.ArgumentParser(description="Train the French/Wolof language classifier.")
+    parser.add_argument("--output", default="language_id.npz")
+    parser.add_argument("--test-size", type=float, default=0.1, help="Share of pairs held out for accuracy")
+    args = parser.parse_args()
+
+    from datasets import load_dataset
+    from config import DatasetConfig
+
+    dataset = load_dataset(DatasetConfig().dataset_name)["train"]
+    splits = dataset.train_test_split(test_size=args.test_size, seed=42)
+    classifier = CharNgramLanguageClassifier().fit_pairs(splits["train"])
+
+    held_out = splits["test"]
+    texts = list(held_out["french"]) + list(held_out["wolof"])
+    labels = ["fr"] * len(held_out) + ["wo"] * len(held_out)
+    accuracy = np.mean([p == l for p, l in zip(classifier.predict(texts), labels)])
+    classifier.save(args.output)
+    print(f"Held-out accuracy: {accuracy:.4f} on {len(texts)} sentences")
+    print(f"Classifier saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,532 @@
+"""
+Load testing module for the French-Wolof Translator.
+Sends recorded or synthetic traffic to the translator and measures how it
+behaves as load grows.
+
+Usage:
+    # In process (through the InferenceScheduler), open loop at increasing rates
+    python load_test.py run --checkpoint ./model --log request_log.jsonl --rates 1 2 4 8
+
+    # Against a local server, closed loop with increasing client counts
+    python load_test.py serve --checkpoint ./model --port 8000 &
+    python load_test.py run --url http://127.0.0.1:8000/translate --corpus data/test.jsonl --concurrency 1 4 16
+
+Each load level is one step. Open-loop steps send requests at a fixed
+average rate whatever the response times, and latency is measured from
+each request's scheduled send time, so queueing delay is not hidden when
+the target falls behind. Closed-loop steps keep a fixed number of clients
+each waiting for its response before sending the next request. Every step
+reports throughput, p50/p95/p99 latency and errors by type; together the
+steps form the latency-versus-load curve.
+
+Request logs are JSONL with the text in a "text", "source", "french" or
+"wolof" field (or ``--text-field``), an optional "source_lang" and an
+optional "timestamp" (seconds or ISO 8601) used by ``--original-timing``.
+Nothing is downloaded: use a local checkpoint and local text files.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config import LoadTestConfig, ModelConfig, SchedulerConfig
+from scheduler import InferenceScheduler, RequestRejected
+
+# Fields searched for the request text, and the language they imply
+TEXT_FIELDS = {"text": None, "source": None, "french": "fr", "wolof": "wo"}
+
+# Fields holding a request's time in a log
+TIMESTAMP_FIELDS = ("timestamp", "time", "ts")
+
+
+@dataclass
+class LoadRequest:
+    """One request to send."""
+    text: str
+    source_lang: str = "fr"
+    offset: Optional[float] = None  # Seconds after the first logged request
+
+
+def _parse_timestamp(value: Any) -> float:
+    """Convert a logged timestamp (epoch seconds or ISO 8601) to seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def load_request_log(path: str, text_field: Optional[str] = None, default_lang: str = "fr") -> List[LoadRequest]:
+    """
+    Read a JSONL request log.
+
+    Args:
+        path: JSONL file, one request per line
+        text_field: Field holding the text (searched in TEXT_FIELDS if None)
+        default_lang: Source language of records that do not set one
+
+    Returns:
+        Requests in log order, with offsets when every record has a timestamp
+
+    Raises:
+        ValueError: If a record has no text
+    """
+    requests = []
+    timestamps = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            fields = [text_field] if text_field else [name for name in TEXT_FIELDS if name in record]
+            if not fields or not str(record.get(fields[0], "")).strip():
+                raise ValueError(f"{path}:{line_number}: no request text found")
+            source_lang = record.get("source_lang") or TEXT_FIELDS.get(fields[0]) or default_lang
+            requests.append(LoadRequest(str(record[fields[0]]).strip(), source_lang))
+            timestamp = next((record[name] for name in TIMESTAMP_FIELDS if name in record), None)
+            timestamps.append(None if timestamp is None else _parse_timestamp(timestamp))
+    if requests and None not in timestamps:
+        first = min(timestamps)
+        for request, timestamp in zip(requests, timestamps):
+            request.offset = timestamp - first
+    return requests
+
+
+def corpus_requests(path: str, source_lang: str = "fr") -> List[LoadRequest]:
+    """
+    Build requests from corpus sentences.
+
+    Args:
+        path: A .txt file (one sentence per line) or a .jsonl file of pairs
+        source_lang: Language to translate from ('fr' or 'wo')
+
+    Returns:
+        One request per sentence
+    """
+    from autotune import load_sentences
+    return [LoadRequest(text, source_lang) for text in load_sentences(path, source_lang)]
+
+
+def percentile_summary(latencies: List[float]) -> Dict[str, Optional[float]]:
+    """
+    Summarize latencies in milliseconds.
+
+    Args:
+        latencies: Latencies in seconds
+
+    Returns:
+        Dictionary of mean, p50, p95, p99 and max (None when empty)
+    """
+    if not latencies:
+        return {"mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+class InProcessTarget:
+    """Sends requests to a translator through an InferenceScheduler."""
+
+    def __init__(self, translator, scheduler_config: Optional[SchedulerConfig] = None):
+        """
+        Initialize the target.
+
+        Args:
+            translator: FrenchWolofTranslator (or HotReloader) to load
+            scheduler_config: Batching configuration of the scheduler
+        """
+        self.scheduler = InferenceScheduler(translator, scheduler_config).start()
+
+    def send(self, request: LoadRequest, timeout: float) -> str:
+        """Translate one request, blocking until it is done."""
+        return self.scheduler.submit(request.text, source_lang=request.source_lang).result(timeout=timeout)
+
+    def close(self) -> None:
+        """Stop the scheduler."""
+        self.scheduler.stop()
+
+
+class HttpTarget:
+    """Sends requests to a translation server as JSON POSTs."""
+
+    def __init__(self, url: str):
+        """
+        Initialize the target.
+
+        Args:
+            url: Endpoint accepting {"text", "source_lang"} and returning
+                {"translation"} (as served by ``serve``)
+        """
+        self.url = url
+
+    def send(self, request: LoadRequest, timeout: float) -> str:
+        """Translate one request, blocking until the response arrives."""
+        body = json.dumps({"text": request.text, "source_lang": request.source_lang}).encode("utf-8")
+        http_request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            return json.loads(response.read())["translation"]
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class LoadGenerator:
+    """Runs load steps against a target and collects their measurements."""
+
+    def __init__(self, target, requests: List[LoadRequest], config: Optional[LoadTestConfig] = None):
+        """
+        Initialize the generator.
+
+        Args:
+            target: Object with ``send(request, timeout)``, e.g. InProcessTarget or HttpTarget
+            requests: Requests to send, cycled through when a step needs more
+            config: Load test configuration
+
+        Raises:
+            ValueError: If there are no requests
+        """
+        if not requests:
+            raise ValueError("A load test needs at least one request.")
+        self.target = target
+        self.requests = requests
+        self.config = config or LoadTestConfig()
+        self.steps: List[Dict[str, Any]] = []
+        self._position = 0
+        self._position_lock = threading.Lock()
+
+    def _next_request(self) -> LoadRequest:
+        """Take the next request, wrapping around the list."""
+        with self._position_lock:
+            request = self.requests[self._position % len(self.requests)]
+            self._position += 1
+            return request
+
+    def warm_up(self) -> None:
+        """Send the warm-up requests one at a time (errors ignored)."""
+        for _ in range(self.config.warmup_requests):
+            try:
+                self.target.send(self._next_request(), self.config.request_timeout)
+            except Exception:
+                pass
+
+    def _record(self, results: Dict[str, Any], request: LoadRequest, scheduled: float) -> None:
+        """Send one request and record its latency (from ``scheduled``) or error."""
+        try:
+            self.target.send(request, self.config.request_timeout)
+            latency = time.perf_counter() - scheduled
+            with results["lock"]:
+                results["latencies"].append(latency)
+        except Exception as error:
+            if isinstance(error, urllib.error.HTTPError):
+                name = f"HTTP {error.code}"
+            elif isinstance(error, RequestRejected):
+                name = "rejected"
+            else:
+                name = type(error).__name__
+            with results["lock"]:
+                results["errors"][name] = results["errors"].get(name, 0) + 1
+
+    def _step(self, mode: str, load: float, body: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """Run one step and summarize it."""
+        results = {"latencies": [], "errors": {}, "lock": threading.Lock()}
+        start = time.perf_counter()
+        body(results)
+        elapsed = time.perf_counter() - start
+        completed = len(results["latencies"])
+        errors = sum(results["errors"].values())
+        step = {
+            "mode": mode,
+            "load": load,
+            "sent": completed + errors,
+            "completed": completed,
+            "errors": errors,
+            "error_types": results["errors"],
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(completed / elapsed, 3) if elapsed > 0 else 0.0,
+            **percentile_summary(results["latencies"]),
+        }
+        self.steps.append(step)
+        return step
+
+    def _schedule(self, requests: Iterator[LoadRequest], offsets: Iterator[float], results: Dict[str, Any]) -> None:
+        """Send requests at their offsets from now, without waiting for responses."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.config.max_in_flight) as executor:
+            for request, offset in zip(requests, offsets):
+                scheduled = start + offset
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._record, results, request, scheduled)
+
+    def _arrival_offsets(self, rate: float) -> Iterator[float]:
+        """Yield send offsets for one open-loop step."""
+        rng = random.Random(self.config.seed)
+        offset = 0.0
+        count = 0
+        while offset < self.config.duration and (self.config.max_requests is None or count < self.config.max_requests):
+            yield offset
+            count += 1
+            offset += rng.expovariate(rate) if self.config.arrivals == "poisson" else 1.0 / rate
+
+    def run_rate(self, rate: float) -> Dict[str, Any]:
+        """
+        Run an open-loop step.
+
+        Args:
+            rate: Average requests per second
+
+        Returns:
+            Step measurements
+        """
+        requests = iter(self._next_request, None)
+        return self._step("rate", rate, lambda results: self._schedule(requests, self._arrival_offsets(rate), results))
+
+    def run_concurrency(self, clients: int) -> Dict[str, Any]:
+        """
+        Run a closed-loop step.
+
+        Args:
+            clients: Clients sending back-to-back requests
+
+        Returns:
+            Step measurements
+        """
+        def body(results: Dict[str, Any]) -> None:
+            deadline = time.perf_counter() + self.config.duration
+            budget = {"left": self.config.max_requests}
+            budget_lock = threading.Lock()
+
+            def client() -> None:
+                while time.perf_counter() < deadline:
+                    with budget_lock:
+                        if budget["left"] is not None:
+                            if budget["left"] <= 0:
+                                return
+                            budget["left"] -= 1
+                    self._record(results, self._next_request(), time.perf_counter())
+
+            threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        return self._step("concurrency", clients, body)
+
+    def replay(self) -> Dict[str, Any]:
+        """
+        Replay the requests at their logged times (divided by ``config.speedup``).
+
+        Returns:
+            Step measurements
+
+        Raises:
+            ValueError: If the requests have no timestamps
+        """
+        if any(request.offset is None for request in self.requests):
+            raise ValueError("Replaying original timing needs a timestamp on every logged request.")
+        ordered = sorted(self.requests, key=lambda request: request.offset)
+        if self.config.max_requests is not None:
+            ordered = ordered[:self.config.max_requests]
+        span = ordered[-1].offset or 1.0
+        return self._step(
+            "replay",
+            round(len(ordered) / span * self.config.speedup, 3),
+            lambda results: self._schedule(
+                iter(ordered), (request.offset / self.config.speedup for request in ordered), results
+            )
+        )
+
+    def run(self, original_timing: bool = False) -> Dict[str, Any]:
+        """
+        Warm up, then run every configured step.
+
+        Args:
+            original_timing: Replay logged timestamps instead of rate or
+                concurrency steps
+
+        Returns:
+            Report with the configuration and every step
+        """
+        self.warm_up()
+        if original_timing:
+            print_step(self.replay())
+        elif self.config.rates:
+            for rate in self.config.rates:
+                print_step(self.run_rate(rate))
+        else:
+            for clients in self.config.concurrency or [1]:
+                print_step(self.run_concurrency(clients))
+        return {
+            "requests": len(self.requests),
+            "duration": self.config.duration,
+            "arrivals": self.config.arrivals,
+            "steps": self.steps,
+        }
+
+
+def print_step(step: Dict[str, Any]) -> None:
+    """Print one row of the latency-versus-load curve."""
+    def ms(value: Optional[float]) -> str:
+        return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+    load = f"{step['load']:g} {'req/s' if step['mode'] != 'concurrency' else 'clients'}"
+    errors = ", ".join(f"{name}: {count}" for name, count in step["error_types"].items())
+    print(f"  {step['mode']:<11} {load:>14} {step['throughput_rps']:9.2f} req/s  "
+          f"p50 {ms(step['p50_ms'])}  p95 {ms(step['p95_ms'])}  p99 {ms(step['p99_ms'])} ms  "
+          f"errors {step['errors']}{f' ({errors})' if errors else ''}")
+
+
+def make_server(scheduler: InferenceScheduler, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Build a minimal HTTP front end for a scheduler.
+
+    ``POST /translate`` takes {"text", "source_lang"} and returns
+    {"translation"} (503 when the request is shed, 400 on bad input);
+    ``GET /health`` returns the scheduler statistics.
+
+    Args:
+        scheduler: Running InferenceScheduler
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+
+    Returns:
+        Server (call ``serve_forever``)
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", **scheduler.stats()})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if self.path != "/translate":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                future = scheduler.submit(payload["text"], source_lang=payload.get("source_lang", "fr"))
+            except (ValueError, KeyError, TypeError) as error:
+                self._reply(400, {"error": str(error)})
+                return
+            try:
+                self._reply(200, {"translation": future.result()})
+            except RequestRejected as error:
+                self._reply(503, {"error": str(error)})
+            except ValueError as error:
+                self._reply(400, {"error": str(error)})
+
+        def log_message(self, format, *args) -> None:
+            pass  # One line per request would swamp the load test output
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def _load_translator(checkpoint: Optional[str], device: Optional[str]):
+    """Load the translator for in-process targets and the server."""
+    from translator import FrenchWolofTranslator
+    return FrenchWolofTranslator(model_checkpoint=checkpoint or ModelConfig().checkpoint, device=device)
+
+
+def main():
+    """Command-line entry point."""
+    defaults = LoadTestConfig()
+    parser = argparse.ArgumentParser(description="Load test the translator with recorded or synthetic traffic.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Send load and report latency per load level")
+    source = run.add_mutually_exclusive_group(required=True)
+    source.add_argument("--log", help="JSONL request log to replay")
+    source.add_argument("--corpus", help="Corpus sentences (.txt or .jsonl pairs) to synthesize traffic from")
+    run.add_argument("--text-field", default=None, help="Log field holding the request text")
+    run.add_argument("--url", default=None, help="Server endpoint (in-process translator if omitted)")
+    run.add_argument("--checkpoint", default=None, help="Model checkpoint for in-process runs (defaults to MODEL_CHECKPOINT)")
+    run.add_argument("--device", default=None)
+    run.add_argument("--rates", type=float, nargs="+", default=None, help="Open-loop steps, requests/s")
+    run.add_argument("--concurrency", type=int, nargs="+", default=None, help="Closed-loop steps, clients")
+    run.add_argument("--original-timing", action="store_true", help="Replay logged timestamps")
+    run.add_argument("--speedup", type=float, default=defaults.speedup)
+    run.add_argument("--duration", type=float, default=defaults.duration, help="Seconds per step")
+    run.add_argument("--max-requests", type=int, default=None, help="Requests per step at most")
+    run.add_argument("--arrivals", default=defaults.arrivals, choices=["poisson", "constant"])
+    run.add_argument("--warmup", type=int, default=defaults.warmup_requests)
+    run.add_argument("--timeout", type=float, default=defaults.request_timeout)
+    run.add_argument("--source-lang", default=defaults.source_lang, choices=["fr", "wo"])
+    run.add_argument("--output", default=None, help="Write the report as JSON")
+
+    serve = commands.add_parser("serve", help="Serve the translator over HTTP for load tests")
+    serve.add_argument("--checkpoint", default=None, help="Model checkpoint (defaults to MODEL_CHECKPOINT)")
+    serve.add_argument("--device", default=None)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        scheduler = InferenceScheduler(_load_translator(args.checkpoint, args.device)).start()
+        server = make_server(scheduler, args.host, args.port)
+        print(f"Serving on http://{args.host}:{server.server_address[1]}/translate")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            scheduler.stop()
+        return
+
+    config = LoadTestConfig(
+        rates=args.rates,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        max_requests=args.max_requests,
+        arrivals=args.arrivals,
+        speedup=args.speedup,
+        warmup_requests=args.warmup,
+        request_timeout=args.timeout,
+        source_lang=args.source_lang,
+    )
+    if args.log:
+        requests = load_request_log(args.log, args.text_field, config.source_lang)
+    else:
+        requests = corpus_requests(args.corpus, config.source_lang)
+        random.Random(config.seed).shuffle(requests)
+    target = HttpTarget(args.url) if args.url else InProcessTarget(_load_translator(args.checkpoint, args.device))
+    print(f"Load testing {args.url or 'in-process translator'} with {len(requests)} distinct requests")
+    try:
+        report = LoadGenerator(target, requests, config).run(original_timing=args.original_timing)
+    finally:
+        target.close()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Model registry module for the French-Wolof Translator.
+Serves several checkpoints from one process: translators are loaded on
+first use, checkpoints with identical tokenizer files share one
+tokenizer, and the least recently used translators are evicted when the
+loaded weights would exceed a memory budget. The size of a model is
+estimated before it is loaded, so evictions happen first and peak memory
+stays within the budget. Loads run outside the registry lock: requests
+for models already loaded are not held up by a load in progress.
+
+Translators sharing a tokenizer switch its source language before each
+call, so they should be served from one thread (e.g. behind an
+InferenceScheduler) rather than concurrently.
+"""
+import gc
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import torch
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
+
+from config import ModelRegistryConfig
+from translator import FrenchWolofTranslator
+
+
+# Files that define a tokenizer; checkpoints with identical copies share one
+TOKENIZER_FILES = (
+    "tokenizer.json",
+    "sentencepiece.bpe.model",
+    "tokenizer_config.json",
+    "special_tokens_map.json",
+    "added_tokens.json",
+)
+
+
+def tokenizer_fingerprint(checkpoint: str) -> str:
+    """
+    Identify the tokenizer of a checkpoint.
+
+    Local checkpoints are identified by a hash of their tokenizer files, so
+    fine-tuned copies of the same base model share a fingerprint. Hub
+    checkpoints are identified by their ID.
+
+    Args:
+        checkpoint: Local directory or HuggingFace model ID
+
+    Returns:
+        Fingerprint string
+    """
+    if not os.path.isdir(checkpoint):
+        return f"hub:{checkpoint}"
+    digest = hashlib.blake2b(digest_size=16)
+    found = False
+    for name in TOKENIZER_FILES:
+        path = os.path.join(checkpoint, name)
+        if os.path.exists(path):
+            found = True
+            digest.update(name.encode("utf-8"))
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    if not found:
+        return f"dir:{os.path.abspath(checkpoint)}"
+    return digest.hexdigest()
+
+
+def checkpoint_memory_bytes(checkpoint: str) -> int:
+    """
+    Estimate the memory a checkpoint's weights will take once loaded.
+
+    Local checkpoints are measured by the size of their weight files (models
+    load in their stored dtype). Otherwise the parameters of the model
+    described by the config are counted without allocating them.
+
+    Args:
+        checkpoint: Local directory or HuggingFace model ID
+
+    Returns:
+        Estimated bytes of parameters
+    """
+    if os.path.isdir(checkpoint):
+        names = os.listdir(checkpoint)
+        weights = [name for name in names if name.endswith(".safetensors")]
+        weights = weights or [name for name in names if name.startswith("pytorch_model") and name.endswith(".bin")]
+        if weights:
+            return sum(os.path.getsize(os.path.join(checkpoint, name)) for name in weights)
+    config = AutoConfig.from_pretrained(checkpoint)
+    with torch.device("meta"):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+    dtype = getattr(config, "dtype", None) or torch.float32
+    if isinstance(dtype, str):
+        dtype = getattr(torch, dtype, torch.float32)
+    element_size = torch.empty((), dtype=dtype).element_size()
+    return sum(parameter.numel() for parameter in model.parameters()) * element_size
+
+
+def model_memory_bytes(translator: FrenchWolofTranslator) -> int:
+    """
+    Compute the memory held by a translator's weights.
+
+    Args:
+        translator: Loaded translator
+
+    Returns:
+        Bytes of parameters and buffers (main and draft model)
+    """
+    total = 0
+    for model in (translator.model, translator.draft_model):
+        if model is None:
+            continue
+        for tensor in list(model.parameters()) + list(model.buffers()):
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+@dataclass
+class ModelEntry:
+    """A registered checkpoint and its usage statistics."""
+    name: str
+    checkpoint: str
+    translator_kwargs: Dict[str, Any]
+    tokenizer_key: Optional[str] = None
+    translator: Optional[FrenchWolofTranslator] = None
+    memory_bytes: int = 0
+    estimated_bytes: Optional[int] = None  # Size estimate made before the first load
+    loading: Optional[threading.Event] = None  # Set while a thread loads this model
+    loads: int = 0
+    last_load_seconds: float = 0.0
+    total_load_seconds: float = 0.0
+    hits: int = 0
+    evictions: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the statistics to a dictionary.
+
+        Returns:
+            Dictionary of per-model statistics
+        """
+        return {
+            "checkpoint": self.checkpoint,
+            "loaded": self.translator is not None,
+            "memory_mb": round(self.memory_bytes / 2**20, 2),
+            "loads": self.loads,
+            "last_load_seconds": round(self.last_load_seconds, 4),
+            "total_load_seconds": round(self.total_load_seconds, 4),
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+
+class ModelRegistry:
+    """Lazy-loading, memory-budgeted cache of translators."""
+
+    def __init__(self, config: Optional[ModelRegistryConfig] = None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            config: Registry configuration
+        """
+        self.config = config or ModelRegistryConfig()
+        self._entries: Dict[str, ModelEntry] = {}
+        # Loaded models, least recently used first
+        self._loaded: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._tokenizers: Dict[str, Any] = {}
+        # Estimated bytes of the models being loaded right now
+        self._reserved_bytes = 0
+        self._lock = threading.RLock()
+
+    def register(
+        self,
+        name: str,
+        checkpoint: str,
+        tokenizer_key: Optional[str] = None,
+        **translator_kwargs
+    ) -> None:
+        """
+        Register a checkpoint under a name (nothing is loaded yet).
+
+        Args:
+            name: Name used to request the model
+            checkpoint: Local directory or HuggingFace model ID
+            tokenizer_key: Checkpoints with the same key share one tokenizer
+                (derived from the tokenizer files if None)
+            **translator_kwargs: Extra FrenchWolofTranslator arguments
+                (device, model_config, draft_model_checkpoint, ...)
+
+        Raises:
+            ValueError: If the name is already registered
+        """
+        with self._lock:
+            if name in self._entries:
+                raise ValueError(f"Model '{name}' is already registered.")
+            translator_kwargs.setdefault("device", self.config.device)
+            self._entries[name] = ModelEntry(
+                name=name,
+                checkpoint=checkpoint,
+                translator_kwargs=translator_kwargs,
+                tokenizer_key=tokenizer_key,
+            )
+
+    def models(self) -> List[str]:
+        """
+        List registered model names.
+
+        Returns:
+            Names in registration order
+        """
+        return list(self._entries)
+
+    def get(self, name: str) -> FrenchWolofTranslator:
+        """
+        Get a translator, loading it (and evicting others) if needed.
+
+        Concurrent requests for a model being loaded wait for that load;
+        requests for loaded models are served meanwhile.
+
+        Args:
+            name: Registered model name
+
+        Returns:
+            FrenchWolofTranslator
+
+        Raises:
+            KeyError: If the name is not registered
+        """
+        while True:
+            with self._lock:
+                if name not in self._entries:
+                    raise KeyError(f"Model '{name}' is not registered.")
+                entry = self._entries[name]
+                if entry.translator is not None:
+                    entry.hits += 1
+                    self._loaded.move_to_end(name)
+                    return entry.translator
+                loading = entry.loading
+                if loading is None:
+                    entry.loading = threading.Event()
+                    break
+            # Another thread is loading this model; retry once it is done
+            loading.wait()
+        self._load(entry)
+        return entry.translator
+
+    def _tokenizer_for(self, entry: ModelEntry):
+        """Return the shared tokenizer of an entry, loading it once."""
+        if entry.tokenizer_key is None:
+            entry.tokenizer_key = tokenizer_fingerprint(entry.checkpoint)
+        with self._lock:
+            tokenizer = self._tokenizers.get(entry.tokenizer_key)
+        if tokenizer is None:
+            tokenizer = AutoTokenizer.from_pretrained(entry.checkpoint, src_lang="fra_Latn")
+            with self._lock:
+                tokenizer = self._tokenizers.setdefault(entry.tokenizer_key, tokenizer)
+        return tokenizer
+
+    def _estimate(self, entry: ModelEntry) -> int:
+        """Estimate the weights of an entry (main and draft model) before loading it."""
+        if entry.memory_bytes:
+            return entry.memory_bytes  # Measured at a previous load
+        if entry.estimated_bytes is None:
+            estimate = checkpoint_memory_bytes(entry.checkpoint)
+            draft_checkpoint = entry.translator_kwargs.get("draft_model_checkpoint")
+            if draft_checkpoint:
+                estimate += checkpoint_memory_bytes(draft_checkpoint)
+            entry.estimated_bytes = estimate
+        return entry.estimated_bytes
+
+    def _load(self, entry: ModelEntry) -> None:
+        """Make room for a translator, then load it outside the lock (caller owns ``entry.loading``)."""
+        estimate = 0
+        translator = None
+        try:
+            if self.config.memory_budget_mb is not None:
+                estimate = self._estimate(entry)
+            with self._lock:
+                # Evict before loading, so the new weights never sit on top of the old ones
+                self._evict(keep=entry.name, incoming_bytes=estimate)
+                self._reserved_bytes += estimate
+            start = time.perf_counter()
+            translator = FrenchWolofTranslator(
+                model_checkpoint=entry.checkpoint,
+                tokenizer=self._tokenizer_for(entry),
+                **entry.translator_kwargs
+            )
+            load_seconds = time.perf_counter() - start
+        finally:
+            with self._lock:
+                self._reserved_bytes -= estimate
+                if translator is not None:
+                    entry.translator = translator
+                    entry.last_load_seconds = load_seconds
+                    entry.total_load_seconds += load_seconds
+                    entry.loads += 1
+                    entry.memory_bytes = model_memory_bytes(translator)
+                    self._loaded[entry.name] = entry
+                    # The estimate may have been low
+                    self._evict(keep=entry.name)
+                entry.loading.set()
+                entry.loading = None
+
+    def _evict(self, keep: str, incoming_bytes: int = 0) -> None:
+        """Unload least recently used models until the budget fits them plus ``incoming_bytes`` (lock held)."""
+        budget = self.config.memory_budget_mb
+        if budget is None:
+            return
+        budget_bytes = budget * 2**20
+        while self.memory_bytes() + self._reserved_bytes + incoming_bytes > budget_bytes:
+            victim = next((name for name in self._loaded if name != keep), None)
+            if victim is None:
+                # The requested model alone exceeds the budget; keep it loaded
+                break
+            self.unload(victim)
+
+    def unload(self, name: str) -> None:
+        """
+        Unload a model and free its weights.
+
+        Args:
+            name: Registered model name
+        """
+        with self._lock:
+            entry = self._loaded.pop(name, None)
+            if entry is None:
+                return
+            entry.translator = None
+            entry.evictions += 1
+            if not any(
+                loaded.tokenizer_key == entry.tokenizer_key for loaded in self._loaded.values()
+            ):
+                self._tokenizers.pop(entry.tokenizer_key, None)
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def memory_bytes(self) -> int:
+        """
+        Get the memory held by loaded weights.
+
+        Returns:
+            Total bytes over all loaded models
+        """
+        return sum(entry.memory_bytes for entry in self._loaded.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get registry and per-model statistics.
+
+        Returns:
+            Dictionary with loaded models (LRU order), memory use and
+            per-model load time, hit and eviction counts
+        """
+        with self._lock:
+            return {
+                "loaded": list(self._loaded),
+                "memory_mb": round(self.memory_bytes() / 2**20, 2),
+                "memory_budget_mb": self.config.memory_budget_mb,
+                "shared_tokenizers": len(self._tokenizers),
+                "models": {name: entry.to_dict() for name, entry in self._entries.items()},
+            }
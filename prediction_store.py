@@ -0,0 +1,170 @@
+"""
+Prediction store module for the French-Wolof Translator.
+Caches generated evaluation predictions on disk so that unchanged
+checkpoints are not decoded again.
+
+Predictions are grouped by a hash of the model weights and of the
+generation settings, and stored per segment under a hash of the segment's
+source token IDs. Re-evaluating the same checkpoint with the same settings
+(e.g. to add a metric or inspect segments) reads every prediction back;
+when the test set changes, only the new segments are generated.
+
+Layout::
+
+    <root>/<weights hash>/<generation hash>.jsonl   # {"key": ..., "tokens": [...]}
+    <root>/<weights hash>/<generation hash>.json    # generation settings
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import torch
+
+
+def weights_fingerprint(model: torch.nn.Module) -> str:
+    """
+    Hash the weights of a model.
+
+    Args:
+        model: Model whose parameters and buffers are hashed
+
+    Returns:
+        Hex digest (changes whenever any weight changes)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name, tensor in sorted(model.state_dict().items()):
+        tensor = tensor.detach().cpu().contiguous()
+        digest.update(name.encode("utf-8"))
+        digest.update(str(tensor.dtype).encode("utf-8"))
+        digest.update(str(tuple(tensor.shape)).encode("utf-8"))
+        digest.update(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def generation_fingerprint(settings: Dict[str, Any]) -> str:
+    """
+    Hash generation settings.
+
+    Args:
+        settings: JSON-serializable decoding settings (beam size, lengths,
+            forced tokens, ...)
+
+    Returns:
+        Hex digest
+    """
+    payload = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def segment_key(token_ids: List[int]) -> str:
+    """
+    Hash the source token IDs of one segment.
+
+    Args:
+        token_ids: Source token IDs without padding
+
+    Returns:
+        Hex digest
+    """
+    return hashlib.blake2b(
+        json.dumps(token_ids).encode("utf-8"), digest_size=12
+    ).hexdigest()
+
+
+class PredictionStore:
+    """On-disk cache of generated token IDs per checkpoint and decoding setup."""
+
+    def __init__(self, root: str):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding the cached predictions
+        """
+        self.root = root
+        self._tables: Dict[tuple, Dict[str, List[int]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, weights_hash: str, generation_hash: str, extension: str) -> str:
+        return os.path.join(self.root, weights_hash, f"{generation_hash}.{extension}")
+
+    def _table(self, weights_hash: str, generation_hash: str) -> Dict[str, List[int]]:
+        """Load (once) the predictions of one checkpoint and decoding setup."""
+        table_key = (weights_hash, generation_hash)
+        if table_key not in self._tables:
+            table = {}
+            path = self._path(weights_hash, generation_hash, "jsonl")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if line:
+                            record = json.loads(line)
+                            table[record["key"]] = record["tokens"]
+            self._tables[table_key] = table
+        return self._tables[table_key]
+
+    def lookup(
+        self,
+        weights_hash: str,
+        generation_hash: str,
+        keys: List[str]
+    ) -> List[Optional[List[int]]]:
+        """
+        Look up cached predictions.
+
+        Args:
+            weights_hash: Model weights fingerprint
+            generation_hash: Generation settings fingerprint
+            keys: Segment keys
+
+        Returns:
+            Generated token IDs per key (None where not cached)
+        """
+        table = self._table(weights_hash, generation_hash)
+        results = [table.get(key) for key in keys]
+        found = sum(result is not None for result in results)
+        self.hits += found
+        self.misses += len(keys) - found
+        return results
+
+    def add(
+        self,
+        weights_hash: str,
+        generation_hash: str,
+        predictions: Dict[str, List[int]],
+        settings: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Store new predictions (appended to disk immediately).
+
+        Args:
+            weights_hash: Model weights fingerprint
+            generation_hash: Generation settings fingerprint
+            predictions: Generated token IDs per segment key
+            settings: Generation settings, written alongside for reference
+        """
+        table = self._table(weights_hash, generation_hash)
+        new = {key: tokens for key, tokens in predictions.items() if key not in table}
+        if not new:
+            return
+        os.makedirs(os.path.join(self.root, weights_hash), exist_ok=True)
+        settings_path = self._path(weights_hash, generation_hash, "json")
+        if settings is not None and not os.path.exists(settings_path):
+            with open(settings_path, "w", encoding="utf-8") as f:
+                json.dump(settings, f, indent=2, sort_keys=True, default=str)
+        with open(self._path(weights_hash, generation_hash, "jsonl"), "a", encoding="utf-8") as f:
+            for key, tokens in new.items():
+                f.write(json.dumps({"key": key, "tokens": tokens}) + "\n")
+        table.update(new)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get lookup statistics.
+
+        Returns:
+            Dictionary with cache hits and misses since creation
+        """
+        return {"hits": self.hits, "misses": self.misses}
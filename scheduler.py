@@ -0,0 +1,299 @@
+"""
+Request scheduling module for the French-Wolof Translator.
+Batches translation requests by earliest deadline and sheds load when the
+queue cannot meet a request's deadline.
+
+A single worker thread owns the translator. Each submitted request gets a
+projected completion time from the current queue and the measured batch
+latency. A request that would miss its deadline is downgraded to cheaper
+decoding (greedy, shorter output) if that is projected to be on time, and
+rejected immediately otherwise, so interactive callers fail fast instead
+of queueing behind bulk work.
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from config import SchedulerConfig
+
+
+class RequestRejected(Exception):
+    """Raised (through the request's future) when a request is shed."""
+
+
+@dataclass(order=True)
+class TranslationRequest:
+    """A queued translation request, ordered by deadline then priority."""
+    deadline: float
+    neg_priority: int
+    sequence: int
+    text: str = field(compare=False)
+    source_lang: str = field(compare=False)
+    downgraded: bool = field(compare=False, default=False)
+    submitted_at: float = field(compare=False, default=0.0)
+    future: Future = field(compare=False, default_factory=Future)
+
+    @property
+    def batch_key(self):
+        """Requests sharing this key can be decoded in the same batch."""
+        return (self.source_lang, self.downgraded)
+
+
+class InferenceScheduler:
+    """Earliest-deadline-first batching scheduler with load shedding."""
+
+    def __init__(self, translator, config: Optional[SchedulerConfig] = None):
+        """
+        Initialize the scheduler (call ``start`` to begin serving).
+
+        Args:
+            translator: FrenchWolofTranslator used by the worker thread
+            config: Scheduler configuration
+        """
+        self.translator = translator
+        self.config = config or SchedulerConfig()
+        self._queue: List[TranslationRequest] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._running = False
+        # Measured batch latency per decoding mode (False: full, True: downgraded)
+        self._batch_seconds = {
+            False: self.config.initial_batch_seconds,
+            True: self.config.initial_batch_seconds * self.config.downgrade_cost_ratio,
+        }
+        self._busy_until = 0.0
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "downgraded": 0,
+            "rejected": 0,
+            "expired": 0,
+            "failed": 0,
+            "cancelled": 0,
+        }
+
+    def start(self) -> "InferenceScheduler":
+        """
+        Start the worker thread.
+
+        Returns:
+            The scheduler
+        """
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._worker = threading.Thread(target=self._run, name="translation-scheduler", daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self, drain: bool = True) -> None:
+        """
+        Stop the worker thread.
+
+        Args:
+            drain: Finish queued requests first; otherwise they are rejected
+        """
+        with self._condition:
+            self._running = False
+            if not drain:
+                while self._queue:
+                    self._shed(heapq.heappop(self._queue), "rejected", "Scheduler stopped.")
+            self._condition.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def __enter__(self) -> "InferenceScheduler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def submit(
+        self,
+        text: str,
+        source_lang: str = "fr",
+        priority: int = 0,
+        timeout: Optional[float] = None
+    ) -> Future:
+        """
+        Queue a translation request.
+
+        Args:
+            text: Text to translate
+            source_lang: Source language code ('fr', 'wo' or 'auto')
+            priority: Higher values are served first among equal deadlines
+            timeout: Seconds until the deadline (config default if None;
+                no deadline if both are None)
+
+        Returns:
+            Future resolving to the translation; it raises RequestRejected
+            if the request is shed
+
+        Raises:
+            RuntimeError: If the scheduler is not running
+        """
+        now = time.monotonic()
+        timeout = timeout if timeout is not None else self.config.default_timeout
+        deadline = now + timeout if timeout is not None else float("inf")
+        request = TranslationRequest(
+            deadline=deadline,
+            neg_priority=-priority,
+            sequence=next(self._sequence),
+            text=text,
+            source_lang=source_lang,
+            submitted_at=now,
+        )
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("The scheduler is not running; call start() first.")
+            self._counters["submitted"] += 1
+            if len(self._queue) >= self.config.max_queue_size:
+                self._shed(request, "rejected", "Queue is full.")
+                return request.future
+            if deadline != float("inf") and self.projected_completion(request, now) > deadline:
+                request.downgraded = True
+                if not self.config.downgrade or self.projected_completion(request, now) > deadline:
+                    self._shed(request, "rejected", "Projected wait exceeds the deadline.")
+                    return request.future
+                self._counters["downgraded"] += 1
+            heapq.heappush(self._queue, request)
+            self._condition.notify()
+        return request.future
+
+    def projected_completion(self, request: TranslationRequest, now: Optional[float] = None) -> float:
+        """
+        Estimate when a request would complete if queued now.
+
+        The estimate counts the queued requests served before it (earlier
+        deadline or higher priority), groups them into full batches and
+        adds the measured latency of each batch to the time the current
+        batch is expected to finish.
+
+        Args:
+            request: Request to place
+            now: Current monotonic time
+
+        Returns:
+            Projected completion time (monotonic seconds)
+        """
+        now = time.monotonic() if now is None else now
+        ahead = [queued for queued in self._queue if queued < request]
+        batch_size = self.config.max_batch_size
+        full_requests = len([queued for queued in ahead if not queued.downgraded])
+        cheap_requests = len(ahead) - full_requests
+        wait = (
+            -(-full_requests // batch_size) * self._batch_seconds[False]
+            + -(-cheap_requests // batch_size) * self._batch_seconds[True]
+        )
+        return max(now, self._busy_until) + wait + self._batch_seconds[request.downgraded]
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get queue depth, shed counts and latency estimates.
+
+        Returns:
+            Dictionary of scheduler statistics
+        """
+        with self._condition:
+            stats = dict(self._counters)
+            stats["queue_depth"] = len(self._queue)
+            stats["shed"] = self._counters["rejected"] + self._counters["expired"]
+            stats["batch_seconds"] = round(self._batch_seconds[False], 4)
+            stats["downgraded_batch_seconds"] = round(self._batch_seconds[True], 4)
+        return stats
+
+    def _claim(self, request: TranslationRequest) -> bool:
+        """Mark a popped request's future as running; False if the caller cancelled it (lock held)."""
+        if request.future.set_running_or_notify_cancel():
+            return True
+        self._counters["cancelled"] += 1
+        return False
+
+    def _shed(self, request: TranslationRequest, reason: str, message: str) -> None:
+        if self._claim(request):
+            self._counters[reason] += 1
+            request.future.set_exception(RequestRejected(message))
+
+    def _next_batch(self) -> List[TranslationRequest]:
+        """Pop the most urgent request and compatible ones, skipping cancelled ones (lock held)."""
+        now = time.monotonic()
+        head = None
+        while self._queue and head is None:
+            request = heapq.heappop(self._queue)
+            if request.deadline < now:
+                self._shed(request, "expired", "Deadline passed while queued.")
+            elif self._claim(request):
+                head = request
+        if head is None:
+            return []
+        batch, remaining = [head], []
+        while self._queue and len(batch) < self.config.max_batch_size:
+            request = heapq.heappop(self._queue)
+            if request.batch_key != head.batch_key:
+                remaining.append(request)
+            elif self._claim(request):
+                batch.append(request)
+        for request in remaining:
+            heapq.heappush(self._queue, request)
+        return batch
+
+    def _run(self) -> None:
+        """Worker loop: serve batches in deadline order."""
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running and not self._queue:
+                    return
+                if self.config.max_wait_ms > 0 and len(self._queue) < self.config.max_batch_size:
+                    # Give concurrent callers a moment to fill the batch
+                    self._condition.wait(self.config.max_wait_ms / 1000)
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                downgraded = batch[0].downgraded
+                self._busy_until = time.monotonic() + self._batch_seconds[downgraded]
+            try:
+                self._serve(batch, downgraded)
+            except Exception as error:
+                # Never let one batch end the worker: later requests would wait forever
+                with self._condition:
+                    self._busy_until = 0.0
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(error)
+
+    def _serve(self, batch: List[TranslationRequest], downgraded: bool) -> None:
+        """Translate one batch outside the lock and resolve its futures."""
+        start = time.perf_counter()
+        try:
+            translations = self.translator.translate_batch(
+                [request.text for request in batch],
+                source_lang=batch[0].source_lang,
+                batch_size=len(batch),
+                num_beams=1 if downgraded else None,
+                max_length=self.config.downgrade_max_length if downgraded else None
+            )
+        except Exception as error:
+            with self._condition:
+                self._counters["failed"] += len(batch)
+                self._busy_until = 0.0
+            for request in batch:
+                request.future.set_exception(error)
+            return
+        elapsed = time.perf_counter() - start
+
+        with self._condition:
+            alpha = self.config.latency_smoothing
+            self._batch_seconds[downgraded] = (1 - alpha) * self._batch_seconds[downgraded] + alpha * elapsed
+            self._counters["completed"] += len(batch)
+            self._busy_until = 0.0
+        for request, translation in zip(batch, translations):
+            request.future.set_result(translation)
@@ -0,0 +1,293 @@
+"""
+Sequence packing module for the French-Wolof Translator.
+Concatenates several short tokenized pairs into one training row so that
+batches carry little padding.
+
+Packed rows keep per-token segment IDs (1, 2, ... for the pairs of a
+row, 0 for padding). At training time they become:
+
+- block-diagonal encoder self-attention (a source token only sees its
+  own pair),
+- block-diagonal causal decoder self-attention,
+- cross-attention from each target segment to its own source segment only,
+- positions restarting at every segment.
+
+NLLB (M2M100) derives positions from the token layout and takes no
+``position_ids``, so packed batches are fed as embeddings whose
+sinusoidal position term is rebased to the segment positions. A packed
+pair therefore gets the same hidden states as it would alone.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import torch
+
+
+# Columns of a packed row
+PACKED_COLUMNS = ("input_ids", "labels", "source_segment_ids", "target_segment_ids")
+
+
+def pack_examples(
+    examples: Iterable[Dict[str, List[int]]],
+    max_source_length: int,
+    max_target_length: int,
+    open_rows: int = 64
+) -> List[Dict[str, List[int]]]:
+    """
+    Pack tokenized pairs into rows with a bounded first-fit search.
+
+    Each pair goes into the first of the ``open_rows`` most recent rows
+    with room for both its source and target; when none fits, the oldest
+    row is closed. Pairs longer than the limits get a row of their own.
+
+    Args:
+        examples: Records with "input_ids" and "labels"
+        max_source_length: Token budget of a packed source row
+        max_target_length: Token budget of a packed target row
+        open_rows: Rows kept open for filling (larger packs tighter but slower)
+
+    Returns:
+        Packed rows with input_ids, labels and per-token segment IDs
+    """
+    packed, rows = [], []
+    for example in examples:
+        source, target = list(example["input_ids"]), list(example["labels"])
+        row = next(
+            (
+                row for row in rows
+                if len(row["input_ids"]) + len(source) <= max_source_length
+                and len(row["labels"]) + len(target) <= max_target_length
+            ),
+            None
+        )
+        if row is None:
+            if len(rows) >= open_rows:
+                packed.append(rows.pop(0))
+            row = {column: [] for column in PACKED_COLUMNS}
+            row["segments"] = 0
+            rows.append(row)
+        row["segments"] += 1
+        row["input_ids"].extend(source)
+        row["labels"].extend(target)
+        row["source_segment_ids"].extend([row["segments"]] * len(source))
+        row["target_segment_ids"].extend([row["segments"]] * len(target))
+    packed.extend(rows)
+    for row in packed:
+        del row["segments"]
+    return packed
+
+
+def packing_report(
+    packed: List[Dict[str, List[int]]],
+    max_source_length: int,
+    max_target_length: int
+) -> Dict[str, float]:
+    """
+    Summarize how well pairs were packed.
+
+    Args:
+        packed: Rows from ``pack_examples``
+        max_source_length: Source token budget per row
+        max_target_length: Target token budget per row
+
+    Returns:
+        Dictionary with pair and row counts, pairs per row and the share
+        of the source/target token budget filled with real tokens
+    """
+    rows = len(packed)
+    pairs = sum(max(row["source_segment_ids"], default=0) for row in packed)
+    source_tokens = sum(len(row["input_ids"]) for row in packed)
+    target_tokens = sum(len(row["labels"]) for row in packed)
+    return {
+        "pairs": pairs,
+        "rows": rows,
+        "pairs_per_row": round(pairs / rows, 3) if rows else 0.0,
+        "source_fill": round(source_tokens / (rows * max_source_length), 4) if rows else 0.0,
+        "target_fill": round(target_tokens / (rows * max_target_length), 4) if rows else 0.0,
+    }
+
+
+class PackedSeq2SeqCollator:
+    """Collates packed rows; unpacked examples go to the wrapped collator."""
+
+    def __init__(self, collator, pad_token_id: int, decoder_start_token_id: int):
+        """
+        Initialize the collator.
+
+        Args:
+            collator: Collator for unpacked examples (e.g. DataCollatorForSeq2Seq)
+            pad_token_id: Padding token
+            decoder_start_token_id: First decoder input token of every segment
+        """
+        self.collator = collator
+        self.pad_token_id = pad_token_id
+        self.decoder_start_token_id = decoder_start_token_id
+
+    def __call__(self, features: List[Dict[str, Any]]) -> Dict[str, torch.Tensor]:
+        if "source_segment_ids" not in features[0]:
+            # Evaluation data is not packed; drop raw text columns
+            return self.collator([
+                {k: v for k, v in feature.items() if k in ("input_ids", "attention_mask", "labels")}
+                for feature in features
+            ])
+        source_length = max(len(feature["input_ids"]) for feature in features)
+        target_length = max(len(feature["labels"]) for feature in features)
+
+        def pad(rows: List[List[int]], length: int, value: int) -> torch.Tensor:
+            return torch.tensor([list(row) + [value] * (length - len(row)) for row in rows], dtype=torch.long)
+
+        input_ids = pad([f["input_ids"] for f in features], source_length, self.pad_token_id)
+        labels = pad([f["labels"] for f in features], target_length, -100)
+        source_segment_ids = pad([f["source_segment_ids"] for f in features], source_length, 0)
+        target_segment_ids = pad([f["target_segment_ids"] for f in features], target_length, 0)
+
+        # Shift labels right within each segment, starting every segment anew
+        decoder_input_ids = torch.full_like(labels, self.pad_token_id)
+        decoder_input_ids[:, 1:] = labels[:, :-1].clamp(min=0)
+        segment_starts = torch.ones_like(target_segment_ids, dtype=torch.bool)
+        segment_starts[:, 1:] = target_segment_ids[:, 1:] != target_segment_ids[:, :-1]
+        decoder_input_ids[segment_starts & (target_segment_ids > 0)] = self.decoder_start_token_id
+        decoder_input_ids[target_segment_ids == 0] = self.pad_token_id
+
+        return {
+            "input_ids": input_ids,
+            "attention_mask": (source_segment_ids > 0).long(),
+            "labels": labels,
+            "decoder_input_ids": decoder_input_ids,
+            "source_segment_ids": source_segment_ids,
+            "target_segment_ids": target_segment_ids,
+        }
+
+
+def segment_positions(segment_ids: torch.Tensor, padding_idx: int) -> torch.Tensor:
+    """
+    Compute NLLB position IDs restarting at every segment.
+
+    Args:
+        segment_ids: (batch, length) segment IDs, 0 for padding
+        padding_idx: Position used for padding (real positions start after it)
+
+    Returns:
+        (batch, length) position IDs
+    """
+    length = segment_ids.shape[1]
+    index = torch.arange(length, device=segment_ids.device).expand_as(segment_ids)
+    starts = torch.ones_like(segment_ids, dtype=torch.bool)
+    starts[:, 1:] = segment_ids[:, 1:] != segment_ids[:, :-1]
+    # Index of the first token of each token's segment
+    first = torch.cummax(torch.where(starts, index, torch.zeros_like(index)), dim=1).values
+    positions = index - first + padding_idx + 1
+    return torch.where(segment_ids > 0, positions, torch.full_like(positions, padding_idx))
+
+
+def attention_bias(allowed: torch.Tensor, dtype: torch.dtype, implementation: Optional[str]) -> torch.Tensor:
+    """
+    Turn a boolean (batch, query, key) mask into the 4D mask the model expects.
+
+    Args:
+        allowed: True where attention is allowed
+        dtype: Dtype of an additive mask
+        implementation: Attention implementation of the model config
+
+    Returns:
+        (batch, 1, query, key) boolean mask (SDPA) or additive float mask (eager)
+    """
+    allowed = allowed[:, None, :, :]
+    if implementation == "sdpa":
+        return allowed
+    bias = torch.zeros(allowed.shape, dtype=dtype, device=allowed.device)
+    return bias.masked_fill(~allowed, torch.finfo(dtype).min)
+
+
+def _rebased_embeddings(embed_tokens, embed_positions, input_ids, segment_ids) -> torch.Tensor:
+    """Token embeddings whose added sequential positions become segment positions."""
+    embeddings = embed_tokens(input_ids)
+    sequential = embed_positions(None, embeddings).to(embeddings.device)
+    weights = embed_positions.weights.to(embeddings.device)
+    positions = segment_positions(segment_ids, embed_positions.padding_idx)
+    packed = weights.index_select(0, positions.view(-1)).view_as(sequential)
+    return embeddings + (packed - sequential).to(embeddings.dtype)
+
+
+def packed_model_inputs(model, inputs: Dict[str, torch.Tensor]) -> Dict[str, Any]:
+    """
+    Build model arguments for a packed batch.
+
+    The encoder runs here with block-diagonal self-attention; the returned
+    arguments run the decoder with block-diagonal causal self-attention
+    and segment-restricted cross-attention. Labels are not included (the
+    model would shift them into decoder inputs); use ``packed_loss``.
+
+    Args:
+        model: NLLB/M2M100 seq2seq model
+        inputs: Output of PackedSeq2SeqCollator
+
+    Returns:
+        Keyword arguments for ``model(**kwargs)``
+    """
+    source_segments = inputs["source_segment_ids"]
+    target_segments = inputs["target_segment_ids"]
+    implementation = getattr(model.config, "_attn_implementation", None)
+    encoder, decoder = model.get_encoder(), model.get_decoder()
+
+    source_embeds = _rebased_embeddings(
+        encoder.embed_tokens, encoder.embed_positions, inputs["input_ids"], source_segments
+    )
+    target_embeds = _rebased_embeddings(
+        decoder.embed_tokens, decoder.embed_positions, inputs["decoder_input_ids"], target_segments
+    )
+    dtype = source_embeds.dtype
+
+    # Padding tokens attend to themselves (a fully masked row would give NaNs)
+    source_eye = torch.eye(source_segments.shape[1], dtype=torch.bool, device=source_segments.device)
+    target_eye = torch.eye(target_segments.shape[1], dtype=torch.bool, device=target_segments.device)
+    same_source = (source_segments[:, :, None] == source_segments[:, None, :]) & (source_segments[:, None, :] > 0)
+    same_target = (target_segments[:, :, None] == target_segments[:, None, :]) & (target_segments[:, None, :] > 0)
+    causal = torch.tril(torch.ones_like(target_eye))
+    cross = (target_segments[:, :, None] == source_segments[:, None, :]) & (source_segments[:, None, :] > 0)
+    # Target padding attends to the first source token
+    cross[:, :, 0] |= target_segments == 0
+
+    encoder_outputs = encoder(
+        inputs_embeds=source_embeds,
+        attention_mask=attention_bias(same_source | source_eye, dtype, implementation),
+    )
+    return {
+        "encoder_outputs": encoder_outputs,
+        # With encoder_outputs given, attention_mask only masks cross-attention
+        "attention_mask": attention_bias(cross, dtype, implementation),
+        "decoder_inputs_embeds": target_embeds,
+        "decoder_attention_mask": attention_bias((same_target & causal) | target_eye, dtype, implementation),
+        "use_cache": False,
+    }
+
+
+def packed_loss(
+    logits: torch.Tensor,
+    labels: torch.Tensor,
+    num_items_in_batch: Optional[Union[int, torch.Tensor]] = None
+) -> torch.Tensor:
+    """
+    Compute the token cross-entropy of a packed batch.
+
+    Args:
+        logits: (batch, length, vocab) decoder logits
+        labels: (batch, length) labels, -100 where ignored
+        num_items_in_batch: Labelled tokens of the whole optimizer step (all
+            accumulated batches), as passed by the Trainer; None for the mean
+            over this batch
+
+    Returns:
+        Scalar loss (same reduction as the model's own loss)
+    """
+    loss = torch.nn.functional.cross_entropy(
+        logits.reshape(-1, logits.shape[-1]).float(),
+        labels.to(logits.device).reshape(-1),
+        ignore_index=-100,
+        reduction="mean" if num_items_in_batch is None else "sum"
+    )
+    if num_items_in_batch is None:
+        return loss
+    # Each token weighs the same, however the step's tokens are split into batches
+    if torch.is_tensor(num_items_in_batch):
+        num_items_in_batch = num_items_in_batch.to(loss.device)
+    return loss / num_items_in_batch
@@ -38,6 +38,10 @@ setup(
         "console_scripts": [
             "french-wolof-translate=main:main",
             "french-wolof-train=train:main",
+            "french-wolof-back-translate=back_translation:main",
+            "french-wolof-build-tm=translation_memory:main",
+            "french-wolof-prune-decoder=decoder_pruning:main",
+            "french-wolof-train-langid=language_id:main",
         ],
     },
 )
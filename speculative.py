@@ -0,0 +1,143 @@
+"""
+Speculative decoding support for the French-Wolof Translator.
+A small draft model proposes several tokens that the main model verifies
+in a single forward pass (HF assisted generation); greedy outputs are
+identical to plain greedy decoding of the main model.
+"""
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import torch
+
+
+@dataclass
+class SpeculativeStats:
+    """Counters accumulated over speculatively decoded sequences."""
+    sequences: int = 0
+    new_tokens: int = 0
+    target_forward_passes: int = 0
+    draft_forward_passes: int = 0
+
+    @property
+    def accepted_tokens(self) -> int:
+        """Draft tokens accepted by the main model.
+
+        Every verification pass of the main model emits its accepted draft
+        tokens plus exactly one token of its own.
+        """
+        return self.new_tokens - self.target_forward_passes
+
+    @property
+    def acceptance_rate(self) -> float:
+        """Share of proposed draft tokens accepted by the main model."""
+        if not self.draft_forward_passes:
+            return 0.0
+        return self.accepted_tokens / self.draft_forward_passes
+
+    @property
+    def tokens_per_target_pass(self) -> float:
+        """Tokens emitted per main-model forward pass (1.0 without a draft)."""
+        if not self.target_forward_passes:
+            return 0.0
+        return self.new_tokens / self.target_forward_passes
+
+    def to_dict(self) -> Dict[str, float]:
+        """
+        Convert the counters and derived rates to a dictionary.
+
+        Returns:
+            Dictionary of statistics
+        """
+        return {
+            "sequences": self.sequences,
+            "new_tokens": self.new_tokens,
+            "target_forward_passes": self.target_forward_passes,
+            "draft_forward_passes": self.draft_forward_passes,
+            "acceptance_rate": round(self.acceptance_rate, 4),
+            "tokens_per_target_pass": round(self.tokens_per_target_pass, 4),
+        }
+
+
+class ForwardCounter:
+    """Counts forward calls of a module while active."""
+
+    def __init__(self, module: torch.nn.Module):
+        """
+        Initialize the counter.
+
+        Args:
+            module: Module whose forward calls are counted
+        """
+        self.module = module
+        self.count = 0
+        self._handle = None
+
+    def _hook(self, module, args, output):
+        self.count += 1
+
+    def __enter__(self) -> "ForwardCounter":
+        self._handle = self.module.register_forward_hook(self._hook)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._handle.remove()
+
+
+def benchmark_speculative(
+    translator,
+    texts: List[str],
+    source_lang: str = "fr",
+    max_length: Optional[int] = None
+) -> Dict[str, float]:
+    """
+    Compare speculative decoding against plain greedy decoding.
+
+    Both runs translate the same texts one at a time (assisted generation
+    works on a single sequence), so the speedup reflects per-request
+    latency.
+
+    Args:
+        translator: FrenchWolofTranslator loaded with a draft model
+        texts: Texts to translate
+        source_lang: Source language code
+        max_length: Maximum generation length (uses config default if None)
+
+    Returns:
+        Dictionary with timings, speedup, acceptance statistics and whether
+        the outputs matched plain greedy decoding exactly
+
+    Raises:
+        ValueError: If the translator has no draft model
+    """
+    if translator.draft_model is None:
+        raise ValueError("The translator was loaded without a draft model.")
+
+    draft_model = translator.draft_model
+    translator.draft_model = None
+    try:
+        start = time.perf_counter()
+        greedy = [
+            translator.translate(text, source_lang=source_lang, max_length=max_length, num_beams=1)
+            for text in texts
+        ]
+        greedy_time = time.perf_counter() - start
+    finally:
+        translator.draft_model = draft_model
+
+    translator.speculative_stats = SpeculativeStats()
+    start = time.perf_counter()
+    speculative = [
+        translator.translate(text, source_lang=source_lang, max_length=max_length)
+        for text in texts
+    ]
+    speculative_time = time.perf_counter() - start
+
+    results = translator.speculative_stats.to_dict()
+    results.update({
+        "greedy_seconds": round(greedy_time, 4),
+        "speculative_seconds": round(speculative_time, 4),
+        "speedup": round(greedy_time / speculative_time, 4) if speculative_time else 0.0,
+        "identical_outputs": greedy == speculative,
+    })
+    return results
@@ -0,0 +1,227 @@
+"""
+Streaming module for the French-Wolof Translator.
+Yields a translation incrementally while it is being generated.
+
+Generation runs in a background thread and hands each new token to a
+streamer that re-decodes the tokens so far and releases only complete
+words: SentencePiece marks the start of a word on its first piece, so the
+last word (and the space before it) is held back until the next word
+begins or generation ends. Streaming decodes greedily, so concatenating
+the chunks gives the same text as ``translate(..., num_beams=1)``, which
+differs from ``translate`` when the configured beam size is above 1.
+
+A stream can be cancelled (explicitly, by leaving its ``with`` block or
+by closing its iterator, e.g. when a server client disconnects); the
+generation thread then stops after the current decoding step.
+"""
+import asyncio
+import json
+import queue
+import threading
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+import torch
+from transformers import StoppingCriteria
+from transformers.generation.streamers import BaseStreamer
+
+
+# Queue marker for the end of a stream
+_END = object()
+
+
+class CancellationCriteria(StoppingCriteria):
+    """Stops generation once a cancellation event is set."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids: torch.Tensor, scores: torch.Tensor, **kwargs) -> torch.Tensor:
+        return torch.full(
+            (input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device
+        )
+
+
+class WordStreamer(BaseStreamer):
+    """Turns generated token IDs into word-aligned text chunks."""
+
+    def __init__(self, tokenizer, on_text: Callable[[str], None], on_end: Callable[[], None]):
+        """
+        Initialize the streamer.
+
+        Args:
+            tokenizer: Tokenizer used to decode the tokens
+            on_text: Called with each new text chunk
+            on_end: Called once generation has finished
+        """
+        self.tokenizer = tokenizer
+        self.on_text = on_text
+        self.on_end = on_end
+        self.token_ids: List[int] = []
+        self.emitted = ""
+
+    def put(self, value: torch.Tensor) -> None:
+        """
+        Receive new token IDs (the prompt on the first call).
+
+        Only the first row is streamed; extra rows come from batch padding
+        in compiled mode.
+        """
+        if value.dim() > 1:
+            value = value[0]
+        self.token_ids.extend(value.tolist())
+        text = self._decode()
+        # Incomplete multi-byte character from byte-fallback pieces
+        if text.endswith("�"):
+            return
+        self._emit(text[:text.rfind(" ")] if " " in text else "")
+
+    def end(self) -> None:
+        """Release the held-back last word."""
+        self._emit(self._decode())
+        self.on_end()
+
+    def _decode(self) -> str:
+        return self.tokenizer.decode(self.token_ids, skip_special_tokens=True)
+
+    def _emit(self, text: str) -> None:
+        if len(text) > len(self.emitted) and text.startswith(self.emitted):
+            self.on_text(text[len(self.emitted):])
+            self.emitted = text
+
+
+class TranslationStream:
+    """Iterator over the text chunks of one translation being generated."""
+
+    def __init__(self, generate: Callable[..., None], tokenizer):
+        """
+        Start generating in a background thread.
+
+        Args:
+            generate: Callable running generation with the given
+                ``streamer`` and ``stopping_criteria`` keyword arguments
+            tokenizer: Tokenizer used to decode the tokens
+        """
+        self._queue: "queue.Queue" = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._streamer = WordStreamer(
+            tokenizer,
+            on_text=self._queue.put,
+            on_end=lambda: self._queue.put(_END)
+        )
+        self._thread = threading.Thread(
+            target=self._run, args=(generate,), name="translation-stream", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def from_text(cls, text: str) -> "TranslationStream":
+        """
+        Create a finished stream holding a known translation.
+
+        Args:
+            text: Complete translation (e.g. from the translation memory)
+
+        Returns:
+            TranslationStream yielding the text as one chunk
+        """
+        stream = cls.__new__(cls)
+        stream._queue = queue.Queue()
+        stream._cancel_event = threading.Event()
+        stream._streamer = None
+        stream._thread = None
+        if text:
+            stream._queue.put(text)
+        stream._queue.put(_END)
+        return stream
+
+    def _run(self, generate: Callable[..., None]) -> None:
+        try:
+            with torch.no_grad():
+                generate(
+                    streamer=self._streamer,
+                    stopping_criteria=[CancellationCriteria(self._cancel_event)]
+                )
+        except Exception as error:
+            self._queue.put(error)
+            self._queue.put(_END)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the stream was cancelled."""
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """Stop generation after the current decoding step."""
+        self._cancel_event.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the generation thread to finish.
+
+        Args:
+            timeout: Seconds to wait at most (no limit if None)
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _next(self):
+        """Return the next chunk, _END, or raise a generation error."""
+        item = self._queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            while True:
+                chunk = self._next()
+                if chunk is _END:
+                    return
+                yield chunk
+        finally:
+            self.cancel()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, self._next)
+                if chunk is _END:
+                    return
+                yield chunk
+        finally:
+            self.cancel()
+
+    def __enter__(self) -> "TranslationStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cancel()
+
+    def text(self) -> str:
+        """
+        Consume the stream and return the complete translation.
+
+        Returns:
+            Concatenated chunks
+        """
+        return "".join(self)
+
+
+def sse_events(stream: TranslationStream) -> Iterator[str]:
+    """
+    Format a stream as Server-Sent Events.
+
+    Each chunk is sent as a ``data:`` event with a JSON string payload and
+    the stream ends with a ``done`` event. Closing the generator (e.g. on
+    client disconnect) cancels generation.
+
+    Args:
+        stream: Translation stream
+
+    Returns:
+        Iterator of SSE frames, ready for a chunked HTTP response
+    """
+    for chunk in stream:
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+    yield "event: done\ndata: {}\n\n"
@@ -0,0 +1,126 @@
+"""
+Shared fixtures for the French-Wolof Translator tests.
+Builds a tiny NLLB tokenizer and randomly initialized M2M100 models
+locally, so the tests run offline on a CPU in seconds.
+"""
+import json
+import os
+import sys
+
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, trainers
+from transformers import M2M100Config, M2M100ForConditionalGeneration, NllbTokenizer
+
+# The modules under test live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "bonjour le enfant mange du riz ce soir nous allons au marché merci "
+    "nanga def xale bi dafa lekk ceeb tey dinanu dem marse jërëjëf waaw baax"
+).split()
+
+# Sources of different lengths, so batches are padded
+TEXTS = [
+    "bonjour",
+    "le enfant mange du riz ce soir",
+    "xale bi dafa lekk ceeb tey",
+    "waaw",
+    "nous allons au marché ce soir merci",
+    "ceeb",
+    "bonjour xale",
+    "dinanu dem marse tey",
+]
+
+
+def build_tokenizer() -> NllbTokenizer:
+    """Train a small BPE vocabulary and wrap it as an NLLB tokenizer (language codes included)."""
+    bpe = Tokenizer(models.BPE(unk_token="<unk>"))
+    bpe.pre_tokenizer = pre_tokenizers.Metaspace(replacement="▁", prepend_scheme="always", split=True)
+    bpe.train_from_iterator(
+        [" ".join(WORDS)] * 10,
+        trainers.BpeTrainer(vocab_size=120, special_tokens=["<s>", "<pad>", "</s>", "<unk>"])
+    )
+    model = json.loads(bpe.to_str())["model"]
+    return NllbTokenizer(
+        vocab=model["vocab"],
+        merges=[tuple(merge) for merge in model["merges"]],
+        src_lang="fra_Latn"
+    )
+
+
+def build_model(tokenizer: NllbTokenizer, decoder_layers: int = 2, seed: int = 0) -> M2M100ForConditionalGeneration:
+    """
+    Build a tiny random model whose translations end at different lengths.
+
+    Weights are drawn large enough for outputs to depend on the source, and
+    the end-of-sentence token takes over from a token the model generates
+    at different steps for different sources, so some sentences stop early
+    and others run to the maximum length.
+
+    Args:
+        tokenizer: Tokenizer setting the vocabulary and special tokens
+        decoder_layers: Number of decoder layers
+        seed: Seed of the random weights
+
+    Returns:
+        Model in eval mode
+    """
+    torch.manual_seed(seed)
+    config = M2M100Config(
+        vocab_size=len(tokenizer),
+        d_model=32,
+        encoder_layers=2,
+        decoder_layers=decoder_layers,
+        encoder_attention_heads=4,
+        decoder_attention_heads=4,
+        encoder_ffn_dim=64,
+        decoder_ffn_dim=64,
+        activation_function="relu",
+        scale_embedding=True,
+        max_position_embeddings=128,
+        tie_word_embeddings=False,
+        pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.eos_token_id,
+    )
+    model = M2M100ForConditionalGeneration(config).eval()
+    inputs = tokenizer(TEXTS, return_tensors="pt", padding=True)
+    with torch.no_grad():
+        for name, parameter in model.named_parameters():
+            if parameter.dim() == 2 and "embed_positions" not in name:
+                parameter.normal_(0, 0.3)
+        outputs = model.generate(
+            **inputs, forced_bos_token_id=tokenizer.convert_tokens_to_ids("wol_Latn"), max_length=24
+        )
+        # Greedy decoding then stops where this token first appeared: pick
+        # the token whose first occurrences are spread over the most steps
+        generated = outputs[:, 2:].tolist()
+        def first_steps(token):
+            return {row.index(token) if token in row else None for row in generated}
+        candidates = {token for row in generated for token in row} - set(tokenizer.all_special_ids)
+        stop_token = max(sorted(candidates), key=lambda token: len(first_steps(token)))
+        model.lm_head.weight[tokenizer.eos_token_id] = model.lm_head.weight[stop_token] * 1.05
+    return model
+
+
+@pytest.fixture(scope="session")
+def tokenizer() -> NllbTokenizer:
+    """Tiny NLLB tokenizer."""
+    return build_tokenizer()
+
+
+@pytest.fixture(scope="session")
+def model(tokenizer) -> M2M100ForConditionalGeneration:
+    """Tiny M2M100 model."""
+    return build_model(tokenizer, seed=2)
+
+
+@pytest.fixture(scope="session")
+def checkpoint(tmp_path_factory, tokenizer, model) -> str:
+    """Directory holding the tiny model and its tokenizer."""
+    path = str(tmp_path_factory.mktemp("tiny-nllb"))
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
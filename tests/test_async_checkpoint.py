@@ -0,0 +1,130 @@
+"""
+Tests for asynchronous checkpointing: checkpoints are written complete,
+rotated, uploaded with retries and flushed before training returns.
+"""
+import os
+
+import pytest
+import torch
+from datasets import Dataset
+from transformers import AutoModelForSeq2SeqLM, DataCollatorForSeq2Seq, Seq2SeqTrainingArguments
+
+from async_checkpoint import AsyncCheckpointer, LocalHub
+from checkpoint_utils import list_checkpoints
+from conftest import TEXTS, build_model
+from trainer import CachingSeq2SeqTrainer
+
+REPO_ID = "tiny-nllb"
+
+
+def train_with_checkpointer(tokenizer, output_dir: str, checkpointer: AsyncCheckpointer, max_steps: int = 6):
+    """Train a fresh tiny model for a few steps, saving every 2 steps through the checkpointer."""
+    pairs = [{"source": text, "target": " ".join(reversed(text.split()))} for text in TEXTS]
+    tokenized = Dataset.from_list(pairs).map(
+        lambda pair: tokenizer(pair["source"], text_target=pair["target"]),
+        remove_columns=["source", "target"]
+    )
+    model = build_model(tokenizer, seed=2)
+    trainer = CachingSeq2SeqTrainer(
+        model=model,
+        args=Seq2SeqTrainingArguments(
+            output_dir=output_dir,
+            max_steps=max_steps,
+            per_device_train_batch_size=4,
+            save_strategy="steps",
+            save_steps=2,
+            eval_strategy="no",
+            report_to=[],
+            use_cpu=True,
+        ),
+        train_dataset=tokenized,
+        processing_class=tokenizer,
+        data_collator=DataCollatorForSeq2Seq(tokenizer, model=model),
+        callbacks=[checkpointer],
+        checkpointer=checkpointer,
+    )
+    trainer.train()
+    return trainer
+
+
+def test_checkpoints_are_written_rotated_and_uploaded(tmp_path, tokenizer):
+    output_dir = str(tmp_path / "run")
+    hub = LocalHub(str(tmp_path / "hub"), fail_uploads=2)
+    checkpointer = AsyncCheckpointer(api=hub, repo_id=REPO_ID, save_total_limit=2, retry_seconds=0.01)
+    try:
+        trainer = train_with_checkpointer(tokenizer, output_dir, checkpointer)
+        # Training only returns once everything is on disk and uploaded
+        report = checkpointer.flush(timeout=0)
+    finally:
+        checkpointer.close()
+
+    assert report["saves"] == 3
+    assert report["written"] == 3
+    assert report["upload_retries"] == 2
+    assert not report["failed_writes"] and not report["failed_uploads"]
+
+    # Old checkpoints are rotated away and no staging directory is left behind
+    assert [os.path.basename(path) for path in list_checkpoints(output_dir)] == ["checkpoint-4", "checkpoint-6"]
+    assert not [name for name in os.listdir(output_dir) if name.endswith(".tmp")]
+    last = os.path.join(output_dir, "checkpoint-6")
+    for name in ("model.safetensors", "optimizer.pt", "scheduler.pt", "trainer_state.json", "training_args.bin"):
+        assert os.path.exists(os.path.join(last, name))
+
+    # The written weights are those the training loop ended with
+    saved = AutoModelForSeq2SeqLM.from_pretrained(last).state_dict()
+    for name, tensor in trainer.model.state_dict().items():
+        assert torch.equal(saved[name], tensor.cpu()), name
+
+    # The newest checkpoint is on the Hub, without the training-only files
+    commits = hub.commits(REPO_ID)
+    assert commits[-1]["message"] == "Training in progress, step 6"
+    assert "model.safetensors" in commits[-1]["files"]
+    assert "optimizer.pt" not in commits[-1]["files"]
+    assert report["uploads"] + report["uploads_skipped"] == 3
+    assert os.path.exists(os.path.join(hub.repo_path(REPO_ID), "model.safetensors"))
+
+
+def test_failed_uploads_are_reported_without_stopping_training(tmp_path, tokenizer):
+    hub = LocalHub(str(tmp_path / "hub"), fail_uploads=100)
+    checkpointer = AsyncCheckpointer(api=hub, repo_id=REPO_ID, max_retries=1, retry_seconds=0.01)
+    try:
+        train_with_checkpointer(tokenizer, str(tmp_path / "run"), checkpointer, max_steps=2)
+        report = checkpointer.flush()
+    finally:
+        checkpointer.close()
+    assert report["written"] == 1
+    assert report["upload_retries"] == 1
+    assert len(report["failed_uploads"]) == 1
+    assert hub.commits(REPO_ID) == []
+
+
+def test_rotation_keeps_the_best_and_pending_checkpoints(tmp_path):
+    run_dir = str(tmp_path)
+    for step in (2, 4, 6, 8, 10):
+        os.makedirs(os.path.join(run_dir, f"checkpoint-{step}"))
+    checkpointer = AsyncCheckpointer(save_total_limit=2)
+    try:
+        checkpointer.best_model_checkpoint = os.path.join(run_dir, "checkpoint-2")
+        # Still waiting for its upload
+        checkpointer._pending_dirs.add(os.path.join(run_dir, "checkpoint-4"))
+        checkpointer._rotate(run_dir)
+    finally:
+        checkpointer._pending_dirs.clear()
+        checkpointer.close()
+    remaining = [os.path.basename(path) for path in list_checkpoints(run_dir)]
+    # Protected checkpoints count towards the limit, as in the Trainer
+    assert remaining == ["checkpoint-2", "checkpoint-4", "checkpoint-10"]
+
+
+def test_flush_times_out_while_a_write_is_pending(tmp_path):
+    checkpointer = AsyncCheckpointer()
+    try:
+        with checkpointer._condition:
+            checkpointer._writing = str(tmp_path / "checkpoint-2")
+        with pytest.raises(RuntimeError):
+            checkpointer.flush(timeout=0.01)
+    finally:
+        with checkpointer._condition:
+            checkpointer._writing = None
+            checkpointer._condition.notify_all()
+        checkpointer.close()
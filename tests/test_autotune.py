@@ -0,0 +1,22 @@
+"""
+Tests for autotuning: the translator gets single-process settings.
+"""
+from autotune import select_settings
+
+
+def result(intra_op_threads, num_workers, batch_size, sentences_per_second):
+    return {
+        "intra_op_threads": intra_op_threads,
+        "inter_op_threads": 1,
+        "num_workers": num_workers,
+        "batch_size": batch_size,
+        "sentences_per_second": sentences_per_second,
+    }
+
+
+def test_thread_counts_come_from_the_fastest_single_worker_result():
+    measured = [result(4, 1, 16, 30.0), result(1, 1, 8, 10.0), result(1, 4, 32, 50.0)]
+    settings = select_settings(measured)
+    # The 4-worker result is fastest, but 1 intra-op thread would starve a single translator
+    assert (settings["intra_op_threads"], settings["batch_size"], settings["sentences_per_second"]) == (4, 16, 30.0)
+    assert (settings["num_workers"], settings["workers_sentences_per_second"]) == (4, 50.0)
@@ -0,0 +1,40 @@
+"""
+Tests for back-translation jobs: each shard gets its own output file.
+"""
+import pytest
+
+from back_translation import BackTranslationJob
+from config import BackTranslationConfig
+
+
+def write_shard(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_shards_with_the_same_name_are_rejected(tmp_path):
+    write_shard(tmp_path / "news" / "part-0.txt", ["Nanga def ?"])
+    write_shard(tmp_path / "radio" / "part-0.txt", ["Jërëjëf."])
+    job = BackTranslationJob(BackTranslationConfig(
+        input_files=[str(tmp_path / "*" / "part-*.txt")],
+        output_dir=str(tmp_path / "out"),
+        model_checkpoint="unused",
+        num_workers=1,
+    ))
+    with pytest.raises(ValueError, match="part-0.bt.jsonl"):
+        job.run()
+    # Nothing was written to the shared output
+    assert not (tmp_path / "out" / "part-0.bt.jsonl").exists()
+
+
+def test_distinct_shards_get_distinct_outputs(tmp_path):
+    write_shard(tmp_path / "news" / "part-0.txt", ["Nanga def ?"])
+    write_shard(tmp_path / "radio" / "part-1.txt", ["Jërëjëf."])
+    # The same shard matched twice, through different spellings of its path
+    job = BackTranslationJob(BackTranslationConfig(
+        input_files=[str(tmp_path / "*" / "part-*.txt"), str(tmp_path / "news" / "." / "part-0.txt")],
+        output_dir=str(tmp_path / "out"),
+        model_checkpoint="unused",
+        num_workers=1,
+    ))
+    assert len({job.output_path(shard) for shard in job.shards()}) == 2
@@ -0,0 +1,82 @@
+"""
+Tests for checkpoint rotation and averaging: the checkpoints ending at the
+best one must survive rotation, also when early stopping ends training
+several evaluations after the best.
+"""
+import os
+
+import pytest
+from datasets import Dataset
+
+import trainer as trainer_module
+from checkpoint_utils import list_checkpoints, rotate_checkpoints
+from config import TrainingConfig
+from conftest import TEXTS
+from trainer import ModelTrainer
+
+# Dev BLEU per evaluation (one per step): best at step 5, then a plateau
+SCRIPTED_BLEU = [1.0, 2.0, 3.0, 4.0, 5.0, 1.0, 1.0, 1.0, 1.0, 1.0]
+
+
+class ScriptedEvaluator:
+    """Evaluator returning fixed scores, so the best step is known in advance."""
+
+    def __init__(self, tokenizer):
+        self.calls = 0
+
+    def compute_metrics(self, eval_preds):
+        score = SCRIPTED_BLEU[min(self.calls, len(SCRIPTED_BLEU) - 1)]
+        self.calls += 1
+        return {"bleu": score, "chrf": score}
+
+
+def names(paths):
+    return [os.path.basename(path) for path in paths]
+
+
+@pytest.mark.parametrize("async_checkpointing", [False, True])
+def test_early_stopping_keeps_the_checkpoints_to_average(tmp_path, monkeypatch, checkpoint, tokenizer, async_checkpointing):
+    monkeypatch.setattr(trainer_module, "Evaluator", ScriptedEvaluator)
+    pairs = [{"source": text, "target": " ".join(reversed(text.split()))} for text in TEXTS]
+    tokenized = Dataset.from_list(pairs).map(
+        lambda pair: tokenizer(pair["source"], text_target=pair["target"]),
+        remove_columns=["source", "target"]
+    )
+    config = TrainingConfig(
+        output_dir=str(tmp_path / "run"),
+        per_device_train_batch_size=4,
+        per_device_eval_batch_size=8,
+        save_total_limit=1,
+        max_steps=len(SCRIPTED_BLEU),
+        fp16=False,
+        eval_steps=1,
+        eval_max_length=8,
+        early_stopping_patience=2,
+        average_last_checkpoints=3,
+        async_checkpointing=async_checkpointing,
+    )
+    model_trainer = ModelTrainer(checkpoint, config)
+    metrics = model_trainer.train(tokenized, tokenized)
+
+    # Stopped 2 evaluations after the best step, and averaged the 3 checkpoints ending at it
+    assert names(list_checkpoints(config.output_dir))[-1] == "checkpoint-7"
+    assert metrics["averaged_checkpoints"] == 3
+    assert {"checkpoint-3", "checkpoint-4", "checkpoint-5"} <= set(names(list_checkpoints(config.output_dir)))
+
+
+def test_rotation_keeps_the_window_before_the_best_and_the_newest(tmp_path):
+    for step in range(1, 11):
+        os.makedirs(tmp_path / f"checkpoint-{step}")
+    rotate_checkpoints(str(tmp_path), 2, best_model_checkpoint=str(tmp_path / "checkpoint-5"), window=3)
+    # 3 ending at the best one, and the 3 newest (any of them may become the best)
+    assert names(list_checkpoints(str(tmp_path))) == [
+        "checkpoint-3", "checkpoint-4", "checkpoint-5", "checkpoint-8", "checkpoint-9", "checkpoint-10"
+    ]
+
+
+def test_rotation_without_averaging_matches_the_trainer(tmp_path):
+    for step in range(1, 6):
+        os.makedirs(tmp_path / f"checkpoint-{step}")
+    rotate_checkpoints(str(tmp_path), 1, best_model_checkpoint=str(tmp_path / "checkpoint-2"))
+    # Like the Trainer with a limit of 1: the best and the newest
+    assert names(list_checkpoints(str(tmp_path))) == ["checkpoint-2", "checkpoint-5"]
@@ -0,0 +1,15 @@
+"""
+Tests for near-duplicate detection: every signature sharing a band is a candidate.
+"""
+import numpy as np
+
+from corpus_filter import MinHashLSH
+
+
+def test_query_checks_every_entry_of_a_bucket():
+    lsh = MinHashLSH(num_perm=4, bands=2, threshold=0.75)
+    lsh.insert(np.array([1, 2, 3, 4], dtype=np.uint64))
+    # Same first band, but only this one is similar to the query
+    lsh.insert(np.array([1, 2, 9, 9], dtype=np.uint64))
+    assert lsh.query(np.array([1, 2, 9, 8], dtype=np.uint64))
+    assert not lsh.query(np.array([1, 2, 7, 7], dtype=np.uint64))
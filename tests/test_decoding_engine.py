@@ -0,0 +1,75 @@
+"""
+Tests for the decoding engine: its outputs must be the token IDs ``generate`` produces.
+"""
+import threading
+
+import pytest
+import torch
+
+from conftest import TEXTS
+from decoding_engine import DecodingEngine
+
+MAX_LENGTH = 24
+
+
+def reference_and_engine(model, tokenizer, engine, texts, num_beams):
+    """Decode a padded batch with ``generate`` and with the engine."""
+    inputs = tokenizer(texts, return_tensors="pt", padding=True)
+    settings = {
+        "forced_bos_token_id": tokenizer.convert_tokens_to_ids("wol_Latn"),
+        "max_length": MAX_LENGTH,
+        "num_beams": num_beams,
+        "early_stopping": num_beams > 1,
+    }
+    with torch.no_grad():
+        expected = model.generate(**inputs, **settings)
+        actual = engine.generate(inputs["input_ids"], inputs["attention_mask"], **settings)
+    return expected, actual
+
+
+@pytest.mark.parametrize("num_beams", [1, 3, 5])
+def test_engine_matches_generate(model, tokenizer, num_beams):
+    engine = DecodingEngine(model)
+    expected, actual = reference_and_engine(model, tokenizer, engine, TEXTS, num_beams)
+    assert torch.equal(actual, expected)
+
+
+def test_sentences_finish_at_different_steps(model, tokenizer):
+    # Otherwise the batch never shrinks and the test above proves little
+    engine = DecodingEngine(model)
+    expected, _ = reference_and_engine(model, tokenizer, engine, TEXTS, num_beams=1)
+    lengths = (expected != tokenizer.pad_token_id).sum(dim=1)
+    assert lengths.min() < MAX_LENGTH
+    assert len(set(lengths.tolist())) > 2
+
+
+@pytest.mark.parametrize("num_beams", [1, 3, 5])
+def test_engine_reuses_its_cache_across_batches(model, tokenizer, num_beams):
+    engine = DecodingEngine(model)
+    for texts in (TEXTS, TEXTS[:3], TEXTS[2:]):
+        expected, actual = reference_and_engine(model, tokenizer, engine, texts, num_beams)
+        assert torch.equal(actual, expected)
+
+
+def test_concurrent_calls_do_not_share_the_cache(model, tokenizer):
+    # One engine serving overlapping calls (e.g. a hot reload canary next to live traffic)
+    engine = DecodingEngine(model)
+    jobs = [(TEXTS, 1), (TEXTS[:5], 3), (TEXTS[3:], 5), (TEXTS[::2], 1)]
+    expected = [reference_and_engine(model, tokenizer, engine, texts, num_beams)[0] for texts, num_beams in jobs]
+    barrier = threading.Barrier(len(jobs))
+    mismatches = []
+
+    def run(job: int) -> None:
+        texts, num_beams = jobs[job]
+        barrier.wait()
+        for _ in range(5):
+            _, actual = reference_and_engine(model, tokenizer, engine, texts, num_beams)
+            if not torch.equal(actual, expected[job]):
+                mismatches.append(job)
+
+    threads = [threading.Thread(target=run, args=(job,)) for job in range(len(jobs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatches == []
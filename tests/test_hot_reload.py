@@ -0,0 +1,40 @@
+"""
+Tests for hot reloading: a swap keeps the serving settings and frees the old weights.
+"""
+import gc
+import weakref
+
+from config import HotReloadConfig, ModelConfig
+from conftest import TEXTS, build_model
+from hot_reload import HotReloader
+from translator import FrenchWolofTranslator
+
+
+def test_reload_frees_the_old_weights_and_keeps_the_draft_model(tmp_path, checkpoint, tokenizer):
+    draft_checkpoint = str(tmp_path / "draft")
+    build_model(tokenizer, decoder_layers=1, seed=1).save_pretrained(draft_checkpoint)
+    translator = FrenchWolofTranslator(
+        checkpoint,
+        device="cpu",
+        model_config=ModelConfig(checkpoint=checkpoint, max_generation_length=24),
+        draft_model_checkpoint=draft_checkpoint,
+    )
+    # The tiny model translates some texts to nothing, which fails a canary
+    outputs = translator.translate_batch(TEXTS, source_lang="fr", use_memory=False)
+    canary = [{"french": text, "wolof": output} for text, output in zip(TEXTS, outputs) if output.strip()]
+    reloader = HotReloader(translator, config=HotReloadConfig(max_chrf_drop=None), canary=canary)
+    del translator
+    old_model = weakref.ref(reloader.translator.model)
+    # Whether the old weights were still referenced when the reloader released memory
+    alive_at_free = []
+    reloader._free = lambda: (gc.collect(), alive_at_free.append(old_model() is not None))
+    try:
+        report = reloader.reload(checkpoint).result(timeout=60)
+    finally:
+        reloader.close()
+
+    assert report["swapped"]
+    assert alive_at_free == [False]
+    # The draft model was passed explicitly, not through the model config
+    assert reloader.translator.draft_model_checkpoint == draft_checkpoint
+    assert reloader.translator.draft_model is not None
@@ -0,0 +1,37 @@
+"""
+Tests for n-best translation: scores must not depend on the rest of the batch.
+"""
+import pytest
+
+from config import ModelConfig
+from conftest import TEXTS
+from translator import FrenchWolofTranslator
+
+
+@pytest.fixture(scope="module")
+def translator(checkpoint) -> FrenchWolofTranslator:
+    """Translator on the tiny model."""
+    return FrenchWolofTranslator(
+        checkpoint,
+        device="cpu",
+        model_config=ModelConfig(checkpoint=checkpoint, max_generation_length=24),
+    )
+
+
+@pytest.mark.parametrize("num_beams", [1, 3])
+def test_batched_scores_equal_single_text_scores(translator, num_beams):
+    n = 1 if num_beams == 1 else 2
+    batched = translator.translate_batch_nbest(TEXTS, n=n, num_beams=num_beams, return_token_scores=True)
+    for text, hypotheses in zip(TEXTS, batched):
+        alone = translator.translate_nbest(text, n=n, num_beams=num_beams, return_token_scores=True)
+        assert [h.text for h in hypotheses] == [h.text for h in alone]
+        for batched_hypothesis, single_hypothesis in zip(hypotheses, alone):
+            assert batched_hypothesis.score == pytest.approx(single_hypothesis.score, abs=1e-4)
+            assert batched_hypothesis.token_scores == pytest.approx(single_hypothesis.token_scores, abs=1e-4)
+
+
+def test_greedy_score_is_the_mean_token_log_probability(translator):
+    for hypotheses in translator.translate_batch_nbest(TEXTS, n=1, num_beams=1, return_token_scores=True):
+        hypothesis = hypotheses[0]
+        expected = sum(hypothesis.token_scores) / len(hypothesis.token_scores)
+        assert hypothesis.score == pytest.approx(expected, abs=1e-5)
@@ -0,0 +1,25 @@
+"""
+Tests for the packed-batch loss: every token of an optimizer step weighs the same.
+"""
+import pytest
+import torch
+
+from sequence_packing import packed_loss
+
+
+def test_accumulated_losses_equal_the_mean_over_the_step():
+    torch.manual_seed(0)
+    logits = torch.randn(3, 5, 11)
+    labels = torch.randint(0, 11, (3, 5))
+    labels[0, 2:] = -100
+    labels[2, 4:] = -100
+    # Two accumulated batches with different numbers of labelled tokens
+    num_items_in_batch = torch.tensor(int((labels != -100).sum()))
+    accumulated = packed_loss(logits[:1], labels[:1], num_items_in_batch) + packed_loss(
+        logits[1:], labels[1:], num_items_in_batch
+    )
+    assert accumulated.item() == pytest.approx(packed_loss(logits, labels).item(), rel=1e-6)
+    # Without a token count: the mean over the batch
+    assert packed_loss(logits[1:], labels[1:]).item() == pytest.approx(
+        torch.nn.functional.cross_entropy(logits[1:].reshape(-1, 11), labels[1:].reshape(-1)).item(), rel=1e-6
+    )
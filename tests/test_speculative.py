@@ -0,0 +1,59 @@
+"""
+Tests for speculative decoding: outputs must equal greedy decoding of the main model.
+"""
+import pytest
+import torch
+
+from config import ModelConfig
+from conftest import TEXTS, build_model
+from speculative import benchmark_speculative
+from translator import FrenchWolofTranslator
+
+MAX_LENGTH = 24
+
+
+@pytest.fixture(scope="module")
+def draft_checkpoint(tmp_path_factory, tokenizer) -> str:
+    """Directory holding a smaller, independently initialized draft model."""
+    path = str(tmp_path_factory.mktemp("tiny-draft"))
+    build_model(tokenizer, decoder_layers=1, seed=1).save_pretrained(path)
+    return path
+
+
+def load_translator(checkpoint: str, draft_checkpoint: str) -> FrenchWolofTranslator:
+    """Load the tiny model with a draft model."""
+    return FrenchWolofTranslator(
+        checkpoint,
+        device="cpu",
+        model_config=ModelConfig(checkpoint=checkpoint, max_generation_length=MAX_LENGTH),
+        draft_model_checkpoint=draft_checkpoint,
+    )
+
+
+@pytest.mark.parametrize("draft", ["independent", "same"])
+def test_speculative_matches_greedy_tokens(checkpoint, draft_checkpoint, draft):
+    # An independent draft has most proposals rejected, the model itself has all accepted
+    translator = load_translator(checkpoint, draft_checkpoint if draft == "independent" else checkpoint)
+    forced_bos_token_id = translator.tokenizer.convert_tokens_to_ids("wol_Latn")
+    for text in TEXTS:
+        inputs = translator.tokenizer(text, return_tensors="pt")
+        with torch.no_grad():
+            expected = translator.model.generate(
+                **inputs, forced_bos_token_id=forced_bos_token_id, max_length=MAX_LENGTH, num_beams=1, do_sample=False
+            )
+            actual = translator._generate_speculative(inputs, forced_bos_token_id, MAX_LENGTH)
+        assert torch.equal(actual, expected)
+    stats = translator.speculative_stats
+    assert stats.sequences == len(TEXTS)
+    assert stats.draft_forward_passes > 0
+    if draft == "same":
+        assert stats.accepted_tokens > 0
+
+
+def test_benchmark_reports_identical_outputs(checkpoint, draft_checkpoint):
+    translator = load_translator(checkpoint, draft_checkpoint)
+    results = benchmark_speculative(translator, TEXTS)
+    assert results["identical_outputs"]
+    assert results["sequences"] == len(TEXTS)
+    # The draft model is restored after the greedy run
+    assert translator.draft_model is not None
@@ -0,0 +1,29 @@
+"""
+Tests for the translation memory: exact keys and fuzzy suggestions.
+"""
+from config import TranslationMemoryConfig
+from translation_memory import TranslationMemory
+
+
+def test_questions_and_statements_are_different_exact_matches(tmp_path):
+    memory = TranslationMemory(TranslationMemoryConfig())
+    memory.add("Tu viens ?", "Ndax dinga ñëw ?")
+    memory.add("Tu viens.", "Dinga ñëw.")
+    assert len(memory) == 2
+    assert memory.lookup("tu viens?").translation == "Ndax dinga ñëw ?"
+    assert memory.lookup("Tu  viens .").translation == "Dinga ñëw."
+    assert memory.lookup("Tu viens !") is None
+
+    # Keys are rebuilt the same way when a saved memory is loaded
+    memory.save(str(tmp_path))
+    loaded = TranslationMemory.load(str(tmp_path))
+    assert loaded.lookup("Tu viens ?").translation == "Ndax dinga ñëw ?"
+
+
+def test_similar_sentences_are_suggested_by_default():
+    memory = TranslationMemory(TranslationMemoryConfig())
+    memory.add("Le enfant mange du riz ce soir.", "Xale bi dafay lekk ceeb tey ci ngoon.")
+    assert memory.lookup("Le enfant mange du riz ce matin.") is None
+    match = memory.lookup_fuzzy("Le enfant mange du riz ce matin.")
+    assert match is not None and not match.exact
+    assert match.differing_tokens == ["matin"]
@@ -6,12 +6,14 @@ Configuration is loaded from environment variables (see .env.example).
 Create a .env file with your settings before running.
 """
 from transformers import AutoTokenizer
+from datasets import IterableDataset
 from data_processor import DataProcessor
 from trainer import ModelTrainer
 from config import (
     ModelConfig,
     TrainingConfig,
     DatasetConfig,
+    CorpusFilterConfig,
     WandbConfig
 )
 from env_config import EnvConfig
@@ -29,6 +31,7 @@ def main():
         push_to_hub=EnvConfig.get_hub_model_id() is not None
     )
     dataset_config = DatasetConfig()
+    filter_config = CorpusFilterConfig()
     
     # Weights & Biases configuration (from environment variables)
     wandb_config = WandbConfig()
@@ -36,14 +39,23 @@ def main():
     # Display configuration
     print("\nConfiguration:")
     print(f"  Model checkpoint: {model_config.checkpoint}")
-    print(f"  Dataset: {dataset_config.dataset_name}")
+    if dataset_config.streaming:
+        print(f"  Dataset: streaming from {', '.join(dataset_config.data_files or [])}")
+    else:
+        print(f"  Dataset: {dataset_config.dataset_name}")
+    print(f"  Corpus filtering: {filter_config.enabled}")
     print(f"  Output directory: {training_config.output_dir}")
     print(f"  Push to hub: {training_config.push_to_hub}")
+    if training_config.hub_local_dir:
+        print(f"  Local hub directory: {training_config.hub_local_dir}")
+    print(f"  Async checkpointing: {training_config.async_checkpointing}")
+    print(f"  External evaluation: {training_config.external_evaluation}")
     if training_config.push_to_hub:
         print(f"  Hub model ID: {training_config.hub_model_id}")
     print(f"  Wandb enabled: {wandb_config.enabled}")
     
-    if training_config.push_to_hub and not training_config.hub_token:
+    # A local Hub directory needs no token
+    if training_config.push_to_hub and not training_config.hub_token and not training_config.hub_local_dir:
         print("\n⚠️  WARNING: push_to_hub is enabled but HF_TOKEN is not set!")
         print("   Set HF_TOKEN in your .env file to push models to HuggingFace Hub.")
         try:
@@ -67,18 +79,27 @@ def main():
     data_processor = DataProcessor(
         tokenizer=tokenizer,
         dataset_config=dataset_config,
-        model_config=model_config
+        model_config=model_config,
+        filter_config=filter_config
     )
     dataset_dict = data_processor.prepare_dataset()
-    print(f"Dataset prepared: {len(dataset_dict['train'])} train samples, "
-          f"{len(dataset_dict['test'])} test samples")
+    if data_processor.corpus_filter and not dataset_config.streaming:
+        print("Corpus filtering report:")
+        print(data_processor.corpus_filter.report.summary())
+    if isinstance(dataset_dict["train"], IterableDataset):
+        print(f"Streaming dataset prepared from {len(dataset_config.data_files)} "
+              f"data file pattern(s), training for {training_config.max_steps} steps")
+    else:
+        print(f"Dataset prepared: {len(dataset_dict['train'])} train samples, "
+              f"{len(dataset_dict['test'])} test samples")
     
     # Initialize trainer
     print("\nInitializing trainer...")
     trainer = ModelTrainer(
         model_config_checkpoint=model_config.checkpoint,
         training_config=training_config,
-        wandb_config=wandb_config if wandb_config.enabled else None
+        wandb_config=wandb_config if wandb_config.enabled else None,
+        dataset_config=dataset_config
     )
     
     # Train model
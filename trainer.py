@@ -7,14 +7,184 @@ from transformers import (
     AutoTokenizer,
     Seq2SeqTrainingArguments,
     Seq2SeqTrainer,
-    DataCollatorForSeq2Seq
+    DataCollatorForSeq2Seq,
+    EarlyStoppingCallback
 )
-from datasets import DatasetDict
-from typing import Optional
+from datasets import Dataset, DatasetDict, IterableDataset
+from torch.utils.data import Subset
+from typing import List, Optional, Tuple
+import copy
+import functools
+import os
+import time
+import numpy as np
+import torch
 import wandb
 
-from config import TrainingConfig, WandbConfig
+from async_checkpoint import AsyncCheckpointer, LocalHub
+from config import DatasetConfig, TrainingConfig, WandbConfig
+from eval_worker import ExternalEvaluationCallback, clear_training_done, mark_training_done, read_result
 from evaluator import Evaluator
+from checkpoint_utils import average_checkpoints, list_checkpoints, load_checkpoint_state_dict, rotate_checkpoints
+from prediction_store import PredictionStore, generation_fingerprint, segment_key, weights_fingerprint
+from training_profiler import TimedCollator, TrainingProfilerCallback
+from sequence_packing import PackedSeq2SeqCollator, packed_loss, packed_model_inputs
+
+
+class CachingSeq2SeqTrainer(Seq2SeqTrainer):
+    """Seq2SeqTrainer that reuses predictions cached in a PredictionStore, trains on packed batches and can checkpoint asynchronously."""
+    
+    def __init__(
+        self,
+        *args,
+        prediction_store: Optional[PredictionStore] = None,
+        checkpointer: Optional[AsyncCheckpointer] = None,
+        average_last_checkpoints: int = 1,
+        **kwargs
+    ):
+        """
+        Initialize the trainer.
+        
+        Args:
+            *args: Seq2SeqTrainer arguments
+            prediction_store: Store of generated predictions (no caching if None)
+            checkpointer: Background checkpoint writer/uploader (checkpoints
+                are saved synchronously if None)
+            average_last_checkpoints: Checkpoints averaged at the end of
+                training; rotation keeps that many ending at the best one
+            **kwargs: Seq2SeqTrainer keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+        self.prediction_store = prediction_store
+        self.checkpointer = checkpointer
+        self.average_last_checkpoints = average_last_checkpoints
+        # The Trainer's rotation would delete the checkpoints before the best
+        # one, which averaging needs: rotate here instead
+        self.save_total_limit = None
+        if average_last_checkpoints > 1:
+            self.save_total_limit, self.args.save_total_limit = self.args.save_total_limit, None
+        self._weights_hash = None
+    
+    def _save_checkpoint(self, model, trial):
+        # Sharded setups save through their own engines: keep the synchronous path
+        if self.checkpointer is None or self.is_deepspeed_enabled or self.is_fsdp_enabled:
+            super()._save_checkpoint(model, trial)
+            if self.save_total_limit and self.args.should_save:
+                rotate_checkpoints(
+                    self._get_output_dir(trial=trial),
+                    self.save_total_limit,
+                    best_model_checkpoint=self.state.best_model_checkpoint,
+                    window=self.average_last_checkpoints
+                )
+            return
+        if self.hp_search_backend is None and trial is None:
+            self.store_flos()
+        if self.args.should_save:
+            self.checkpointer.save(self, self._get_output_dir(trial=trial))
+    
+    def _load_best_model(self):
+        # The best checkpoint may still be queued for writing
+        if self.checkpointer is not None:
+            self.checkpointer.flush()
+        super()._load_best_model()
+    
+    def compute_loss(self, model, inputs, return_outputs=False, num_items_in_batch=None):
+        if "source_segment_ids" not in inputs:
+            return super().compute_loss(
+                model, inputs, return_outputs=return_outputs, num_items_in_batch=num_items_in_batch
+            )
+        # Packed batch: segment-aware masks and positions, loss computed here
+        outputs = model(**packed_model_inputs(self.accelerator.unwrap_model(model), inputs))
+        loss = packed_loss(outputs.logits, inputs["labels"], num_items_in_batch)
+        if self.args.average_tokens_across_devices and num_items_in_batch is not None:
+            # As in Trainer.compute_loss: num_items_in_batch counts the tokens of every process
+            loss_scale = self.accelerator.num_processes // self.get_tp_size()
+            loss *= loss_scale if self.args.n_gpu <= 1 else self.args.n_gpu
+        return (loss, outputs) if return_outputs else loss
+    
+    def evaluation_loop(self, *args, **kwargs):
+        # Weights change between evaluations during training: hash them once per loop
+        if self.prediction_store is not None:
+            self._weights_hash = weights_fingerprint(self.model)
+        try:
+            return super().evaluation_loop(*args, **kwargs)
+        finally:
+            self._weights_hash = None
+    
+    def prediction_step(self, model, inputs, prediction_loss_only, ignore_keys=None, **gen_kwargs):
+        if self._weights_hash is None or prediction_loss_only or not self.args.predict_with_generate:
+            return super().prediction_step(
+                model, inputs, prediction_loss_only, ignore_keys=ignore_keys, **gen_kwargs
+            )
+        # Route the parent's generate call through the store
+        self.model.generate = functools.partial(self._cached_generate, self.model.generate)
+        try:
+            return super().prediction_step(
+                model, inputs, prediction_loss_only, ignore_keys=ignore_keys, **gen_kwargs
+            )
+        finally:
+            del self.model.generate
+    
+    def generation_settings(self, **gen_kwargs) -> dict:
+        """
+        Resolve the effective generation settings of a generate call.
+        
+        Args:
+            **gen_kwargs: Non-tensor arguments passed to ``generate``
+            
+        Returns:
+            Dictionary of generation settings with defaults filled in
+        """
+        config = copy.deepcopy(self.model.generation_config)
+        config.update(**{k: v for k, v in gen_kwargs.items() if k != "synced_gpus"})
+        if hasattr(config, "_get_default_generation_params"):
+            config.update(**config._get_default_generation_params(), defaults_only=True)
+        return {
+            k: v for k, v in config.to_dict().items()
+            if not k.startswith("_") and k != "transformers_version"
+        }
+    
+    def _cached_generate(self, generate, input_ids, attention_mask=None, **kwargs) -> torch.Tensor:
+        """Generate only the segments missing from the store."""
+        settings = self.generation_settings(
+            **{k: v for k, v in kwargs.items() if not isinstance(v, torch.Tensor)}
+        )
+        generation_hash = generation_fingerprint(settings)
+        mask = attention_mask if attention_mask is not None else torch.ones_like(input_ids)
+        keys = [segment_key(row[row_mask.bool()].tolist()) for row, row_mask in zip(input_ids, mask)]
+        predictions = self.prediction_store.lookup(self._weights_hash, generation_hash, keys)
+        pad_token_id = self.model.generation_config.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = self.processing_class.pad_token_id
+        
+        missing = [i for i, tokens in enumerate(predictions) if tokens is None]
+        if missing:
+            index = torch.tensor(missing, device=input_ids.device)
+            batch_size = input_ids.shape[0]
+            sub_kwargs = {
+                k: v.index_select(0, index)
+                if isinstance(v, torch.Tensor) and v.dim() > 0 and v.shape[0] == batch_size else v
+                for k, v in kwargs.items()
+            }
+            generated = generate(
+                input_ids=input_ids.index_select(0, index),
+                attention_mask=mask.index_select(0, index),
+                **sub_kwargs
+            )
+            new = {}
+            for i, tokens in zip(missing, generated.tolist()):
+                # Drop the padding added when batching rows of different lengths
+                while len(tokens) > 1 and tokens[-1] == pad_token_id:
+                    tokens.pop()
+                predictions[i] = tokens
+                new[keys[i]] = tokens
+            self.prediction_store.add(self._weights_hash, generation_hash, new, settings)
+        
+        width = max(len(tokens) for tokens in predictions)
+        output = torch.full((len(predictions), width), pad_token_id, dtype=torch.long)
+        for i, tokens in enumerate(predictions):
+            output[i, :len(tokens)] = torch.tensor(tokens, dtype=torch.long)
+        return output.to(input_ids.device)
 
 
 class ModelTrainer:
@@ -24,7 +194,8 @@ class ModelTrainer:
         self,
         model_config_checkpoint: str,
         training_config: TrainingConfig,
-        wandb_config: Optional[WandbConfig] = None
+        wandb_config: Optional[WandbConfig] = None,
+        dataset_config: Optional[DatasetConfig] = None
     ):
         """
         Initialize the trainer.
@@ -33,10 +204,19 @@ class ModelTrainer:
             model_config_checkpoint: Model checkpoint to use
             training_config: Training configuration
             wandb_config: Optional Weights & Biases configuration
+            dataset_config: Dataset configuration the data was prepared
+                with (its seed draws the dev subset)
         """
         self.model_config_checkpoint = model_config_checkpoint
         self.training_config = training_config
         self.wandb_config = wandb_config
+        self.dataset_config = dataset_config or DatasetConfig()
+        self.profiler = None
+        self.external_evaluation = None
+        self.prediction_store = (
+            PredictionStore(training_config.prediction_store_dir)
+            if training_config.prediction_store_dir else None
+        )
         
         # Initialize tokenizer and model
         self.tokenizer = AutoTokenizer.from_pretrained(
@@ -61,26 +241,94 @@ class ModelTrainer:
         """
         Create training arguments from configuration.
         
+        With ``eval_steps`` set, evaluation runs every ``eval_steps`` steps
+        instead of every epoch. Checkpoints follow the evaluation schedule
+        whenever best-model selection needs them to.
+        
+        With ``external_evaluation``, the Trainer does not evaluate:
+        checkpoints are written on the evaluation schedule and scored by
+        ``eval_worker.py``, and ExternalEvaluationCallback rotates them.
+        
         Returns:
             Seq2SeqTrainingArguments object
+            
+        Raises:
+            ValueError: If early stopping is enabled without evaluation
         """
+        config = self.training_config
+        eval_strategy = "steps" if config.eval_steps else config.eval_strategy
+        save_total_limit = max(config.save_total_limit, config.average_last_checkpoints)
+        if config.external_evaluation:
+            save_strategy = "steps" if eval_strategy == "no" else eval_strategy
+            eval_strategy = "no"
+            # Checkpoints are only deleted once the evaluation worker has scored them
+            save_total_limit = None
+        elif config.early_stopping_patience and eval_strategy == "no":
+            raise ValueError("Early stopping needs evaluation: set eval_strategy or eval_steps.")
+        elif config.eval_steps or config.early_stopping_patience:
+            save_strategy = eval_strategy
+        else:
+            save_strategy = "steps"
+        
         training_args = Seq2SeqTrainingArguments(
-            output_dir=self.training_config.output_dir,
-            eval_strategy=self.training_config.eval_strategy,
-            learning_rate=self.training_config.learning_rate,
-            per_device_train_batch_size=self.training_config.per_device_train_batch_size,
-            per_device_eval_batch_size=self.training_config.per_device_eval_batch_size,
-            weight_decay=self.training_config.weight_decay,
-            save_total_limit=self.training_config.save_total_limit,
-            num_train_epochs=self.training_config.num_train_epochs,
+            output_dir=config.output_dir,
+            eval_strategy=eval_strategy,
+            eval_steps=config.eval_steps,
+            save_strategy=save_strategy,
+            save_steps=config.eval_steps or 500,
+            learning_rate=config.learning_rate,
+            per_device_train_batch_size=config.per_device_train_batch_size,
+            per_device_eval_batch_size=config.per_device_eval_batch_size,
+            weight_decay=config.weight_decay,
+            # Keep enough checkpoints around to average the last N of them
+            # (with N > 1, CachingSeq2SeqTrainer rotates them in the Trainer's place)
+            save_total_limit=save_total_limit,
+            num_train_epochs=config.num_train_epochs,
+            max_steps=config.max_steps,
             predict_with_generate=True,
-            fp16=self.training_config.fp16,
-            push_to_hub=self.training_config.push_to_hub,
-            hub_model_id=self.training_config.hub_model_id,
-            hub_token=self.training_config.hub_token,
+            generation_num_beams=config.eval_num_beams,
+            generation_max_length=config.eval_max_length,
+            load_best_model_at_end=config.early_stopping_patience is not None and not config.external_evaluation,
+            metric_for_best_model=config.metric_for_best_model,
+            greater_is_better=True,
+            fp16=config.fp16,
+            bf16=config.bf16,
+            # Without a GPU, bf16 mixed precision has to be requested on the CPU explicitly
+            use_cpu=config.bf16 and not torch.cuda.is_available(),
+            gradient_checkpointing=config.gradient_checkpointing,
+            # Uploads to a local Hub stand-in go through the async checkpointer only
+            push_to_hub=config.push_to_hub and not config.hub_local_dir,
+            hub_model_id=config.hub_model_id,
+            hub_token=config.hub_token,
         )
         return training_args
     
+    def create_dev_subset(self, eval_dataset):
+        """
+        Select the fixed dev subset evaluated during training.
+        
+        The subset is drawn with the seed of ``self.dataset_config``, so
+        scores from successive evaluations are comparable.
+        
+        Args:
+            eval_dataset: Full evaluation dataset
+            
+        Returns:
+            Dataset with at most ``eval_subset_size`` examples
+        """
+        size = self.training_config.eval_subset_size
+        if not size:
+            return eval_dataset
+        if isinstance(eval_dataset, IterableDataset):
+            return eval_dataset.take(size)
+        if len(eval_dataset) <= size:
+            return eval_dataset
+        seed = self.dataset_config.seed
+        if isinstance(eval_dataset, Dataset):
+            return eval_dataset.shuffle(seed=seed).select(range(size))
+        indices = np.random.RandomState(seed).permutation(len(eval_dataset))[:size]
+        return Subset(eval_dataset, indices.tolist())
+    
     def create_data_collator(self) -> DataCollatorForSeq2Seq:
         """
         Create data collator for batching.
@@ -94,25 +342,113 @@ class ModelTrainer:
         )
         return data_collator
     
+    def create_checkpointer(self) -> Optional[AsyncCheckpointer]:
+        """
+        Create the background checkpoint writer/uploader.
+        
+        Uploads go to ``hub_local_dir`` when set, to the Hub with
+        ``push_to_hub``, and nowhere otherwise.
+        
+        Returns:
+            AsyncCheckpointer, or None when ``async_checkpointing`` is off
+        """
+        config = self.training_config
+        if not config.async_checkpointing:
+            return None
+        api = None
+        if config.hub_local_dir:
+            api = LocalHub(config.hub_local_dir)
+        elif config.push_to_hub:
+            from huggingface_hub import HfApi
+            api = HfApi(token=config.hub_token)
+        return AsyncCheckpointer(
+            api=api,
+            repo_id=config.hub_model_id or os.path.basename(os.path.normpath(config.output_dir)),
+            # With external evaluation, ExternalEvaluationCallback rotates checkpoints
+            save_total_limit=None if config.external_evaluation else max(config.save_total_limit, config.average_last_checkpoints),
+            average_last_checkpoints=config.average_last_checkpoints,
+            max_retries=config.upload_max_retries,
+            retry_seconds=config.upload_retry_seconds
+        )
+    
     def create_trainer(
         self,
         train_dataset: DatasetDict,
-        eval_dataset: DatasetDict
+        eval_dataset: DatasetDict,
+        for_training: bool = True
     ) -> Seq2SeqTrainer:
         """
         Create the trainer instance.
         
+        A packed training set (see ``DataProcessor.pack_dataset``) is
+        collated with PackedSeq2SeqCollator and trained with segment-aware
+        attention masks.
+        
+        With ``profile_training`` enabled, a TrainingProfilerCallback
+        records step time breakdowns, token throughput, memory and stalls
+        (``self.profiler``) and writes ``training_profile.json`` at the end
+        of training.
+        
+        With ``async_checkpointing`` enabled, checkpoints are written and
+        uploaded in background threads (``trainer.checkpointer``); training
+        waits for them only at the end.
+        
+        With ``external_evaluation`` enabled, an ExternalEvaluationCallback
+        (``self.external_evaluation``) reads the scores written by
+        ``eval_worker.py`` and applies early stopping to them.
+        
         Args:
             train_dataset: Training dataset
             eval_dataset: Evaluation dataset
+            for_training: False for trainers that never run ``train()``
+                (evaluation, prediction): no checkpointer threads, external
+                evaluation or early stopping are set up
             
         Returns:
             Seq2SeqTrainer instance
         """
         training_args = self.create_training_arguments()
         data_collator = self.create_data_collator()
+        if "source_segment_ids" in (getattr(train_dataset, "column_names", None) or []):
+            data_collator = PackedSeq2SeqCollator(
+                data_collator,
+                pad_token_id=self.tokenizer.pad_token_id,
+                decoder_start_token_id=self.model.config.decoder_start_token_id
+            )
+            # Segment IDs are not model arguments but are needed by the collator
+            training_args.remove_unused_columns = False
+        
+        callbacks = []
+        if self.training_config.profile_training:
+            data_collator = TimedCollator(data_collator)
+            self.profiler = TrainingProfilerCallback(
+                collator=data_collator,
+                stall_factor=self.training_config.stall_factor,
+                log_to_wandb=bool(self.wandb_config and self.wandb_config.enabled)
+            )
+            callbacks.append(self.profiler)
+        checkpointer = None
+        if for_training:
+            checkpointer = self.create_checkpointer()
+            if checkpointer is not None:
+                callbacks.append(checkpointer)
+            if self.training_config.external_evaluation:
+                self.external_evaluation = ExternalEvaluationCallback(
+                    metric=self.training_config.metric_for_best_model,
+                    save_total_limit=max(self.training_config.save_total_limit, self.training_config.average_last_checkpoints),
+                    average_last_checkpoints=self.training_config.average_last_checkpoints,
+                    early_stopping_patience=self.training_config.early_stopping_patience,
+                    early_stopping_threshold=self.training_config.early_stopping_threshold,
+                    in_use=checkpointer.in_use if checkpointer is not None else None
+                )
+                callbacks.append(self.external_evaluation)
+            elif self.training_config.early_stopping_patience:
+                callbacks.append(EarlyStoppingCallback(
+                    early_stopping_patience=self.training_config.early_stopping_patience,
+                    early_stopping_threshold=self.training_config.early_stopping_threshold
+                ))
         
-        trainer = Seq2SeqTrainer(
+        trainer = CachingSeq2SeqTrainer(
             model=self.model,
             args=training_args,
             train_dataset=train_dataset,
@@ -120,7 +456,14 @@ class ModelTrainer:
             processing_class=self.tokenizer,
             data_collator=data_collator,
             compute_metrics=self.evaluator.compute_metrics,
+            callbacks=callbacks,
+            prediction_store=self.prediction_store,
+            checkpointer=checkpointer,
+            average_last_checkpoints=self.training_config.average_last_checkpoints,
         )
+        if checkpointer is not None and training_args.push_to_hub:
+            # Repository name as resolved by the Trainer (namespace included)
+            checkpointer.repo_id = getattr(trainer, "hub_model_id", checkpointer.repo_id)
         return trainer
     
     def train(
@@ -131,28 +474,169 @@ class ModelTrainer:
         """
         Train the model.
         
+        Evaluation during training uses the fixed dev subset when
+        ``eval_subset_size`` is set. With ``average_last_checkpoints`` > 1,
+        the final model is the average of the last checkpoints (ending at
+        the best one when it was loaded) and is saved to the output
+        directory. With ``external_evaluation``, the
+        best checkpoint scored by ``eval_worker.py`` is loaded first (after
+        waiting up to ``external_eval_wait_seconds`` for checkpoints still
+        being evaluated). With ``async_checkpointing``, the
+        time training spent blocked on checkpoints is reported next to the
+        background write time.
+        
         Args:
             train_dataset: Training dataset
             eval_dataset: Evaluation dataset
             
         Returns:
             Dictionary containing training metrics
+            
+        Raises:
+            ValueError: If training on a streaming dataset without max_steps
         """
-        trainer = self.create_trainer(train_dataset, eval_dataset)
+        if isinstance(train_dataset, IterableDataset) and self.training_config.max_steps <= 0:
+            raise ValueError(
+                "Streaming datasets have no length: set TrainingConfig.max_steps "
+                "(or the MAX_STEPS env var) to a positive number of steps."
+            )
+        trainer = self.create_trainer(train_dataset, self.create_dev_subset(eval_dataset))
+        if self.external_evaluation is not None:
+            clear_training_done(self.training_config.output_dir)
         train_result = trainer.train()
-        return train_result.metrics
+        metrics = train_result.metrics
+        
+        if self.external_evaluation is not None:
+            mark_training_done(self.training_config.output_dir, trainer.state.global_step)
+            best = self.load_externally_evaluated_best(trainer)
+            if best is not None:
+                metric = self.training_config.metric_for_best_model
+                metrics["best_checkpoint"] = best["checkpoint"]
+                metrics[f"external_eval_{metric}"] = best[metric]
+        
+        num_average = self.training_config.average_last_checkpoints
+        if num_average > 1:
+            checkpoints = self.checkpoints_to_average(trainer)
+            if len(checkpoints) > 1:
+                self.average_checkpoints(checkpoints)
+                trainer.save_model()
+                metrics["averaged_checkpoints"] = len(checkpoints)
+            else:
+                print(f"Not averaging: only {len(checkpoints)} checkpoint(s) available up to the final model")
+        if trainer.checkpointer is not None:
+            trainer.checkpointer.close()
+            stats = trainer.checkpointer.stats
+            metrics["checkpoint_blocked_seconds"] = round(stats["blocked_seconds"], 3)
+            metrics["checkpoint_write_seconds"] = round(stats["write_seconds"], 3)
+            metrics["checkpoint_uploads"] = stats["uploads"]
+        return metrics
+    
+    def checkpoints_to_average(self, trainer: Seq2SeqTrainer) -> List[str]:
+        """
+        Select the checkpoints averaged into the final model.
+        
+        When the best checkpoint was loaded (``load_best_model_at_end`` or
+        external evaluation), these are the last ``average_last_checkpoints``
+        checkpoints ending at the best one, not the ones written after it
+        (e.g. past the plateau that triggered early stopping).
+        
+        Args:
+            trainer: Trainer that has finished training
+            
+        Returns:
+            Checkpoint directories, oldest first
+        """
+        checkpoints = list_checkpoints(self.training_config.output_dir)
+        best_dir = trainer.state.best_model_checkpoint
+        if best_dir and (trainer.args.load_best_model_at_end or self.external_evaluation is not None):
+            names = [os.path.basename(path) for path in checkpoints]
+            best_name = os.path.basename(os.path.normpath(best_dir))
+            if best_name in names:
+                checkpoints = checkpoints[:names.index(best_name) + 1]
+        return checkpoints[-self.training_config.average_last_checkpoints:]
+    
+    def load_externally_evaluated_best(self, trainer: Seq2SeqTrainer) -> Optional[dict]:
+        """
+        Load the best checkpoint scored by the evaluation worker.
+        
+        Waits up to ``external_eval_wait_seconds`` for the worker to score
+        the remaining checkpoints; the best among those scored is used.
+        
+        Args:
+            trainer: Trainer that has finished training
+            
+        Returns:
+            Result of the loaded checkpoint, or None if none was scored
+        """
+        output_dir = self.training_config.output_dir
+        deadline = time.monotonic() + self.training_config.external_eval_wait_seconds
+        unscored = [path for path in list_checkpoints(output_dir) if read_result(path) is None]
+        while unscored and time.monotonic() < deadline:
+            time.sleep(1.0)
+            unscored = [path for path in unscored if os.path.isdir(path) and read_result(path) is None]
+        if unscored:
+            print(f"Warning: {len(unscored)} checkpoint(s) not evaluated yet, "
+                  f"selecting the best among the others (is eval_worker.py running?)")
+        
+        self.external_evaluation.collect(trainer.args, trainer.state)
+        self.external_evaluation.rotate(trainer.args, trainer.state)
+        best_dir = trainer.state.best_model_checkpoint
+        if best_dir is None or not os.path.isdir(best_dir):
+            return None
+        self.model.load_state_dict(load_checkpoint_state_dict(best_dir), strict=False)
+        self.model.tie_weights()
+        return read_result(best_dir)
+    
+    def average_checkpoints(self, checkpoint_dirs: list) -> None:
+        """
+        Replace the model weights with the average of several checkpoints.
+        
+        Args:
+            checkpoint_dirs: Checkpoint directories to average
+        """
+        state_dict = average_checkpoints(checkpoint_dirs)
+        self.model.load_state_dict(state_dict, strict=False)
+        self.model.tie_weights()
     
     def evaluate(self, eval_dataset: DatasetDict) -> dict:
         """
         Evaluate the model.
         
+        With ``prediction_store_dir`` set, predictions of an unchanged
+        checkpoint and decoding setup are read from the store and only
+        new segments are generated.
+        
         Args:
             eval_dataset: Evaluation dataset
             
         Returns:
             Dictionary containing evaluation metrics
         """
-        trainer = self.create_trainer(eval_dataset, eval_dataset)
+        trainer = self.create_trainer(eval_dataset, eval_dataset, for_training=False)
         metrics = trainer.evaluate()
         return metrics
+    
+    def predict_texts(self, eval_dataset: DatasetDict) -> Tuple[List[str], List[str]]:
+        """
+        Translate an evaluation dataset and decode predictions and references.
+        
+        With a prediction store configured, cached segments are read back
+        instead of generated, so re-scoring the same checkpoint (e.g. with
+        ``Evaluator.compute_text_metrics`` or per-segment analysis) is cheap.
+        
+        Args:
+            eval_dataset: Tokenized evaluation dataset
+            
+        Returns:
+            Tuple of (decoded predictions, decoded references), aligned
+        """
+        trainer = self.create_trainer(eval_dataset, eval_dataset, for_training=False)
+        output = trainer.predict(eval_dataset)
+        pad_token_id = self.tokenizer.pad_token_id
+        predictions = np.where(output.predictions != -100, output.predictions, pad_token_id)
+        labels = np.where(output.label_ids != -100, output.label_ids, pad_token_id)
+        return (
+            self.tokenizer.batch_decode(predictions, skip_special_tokens=True),
+            self.tokenizer.batch_decode(labels, skip_special_tokens=True),
+        )
 
@@ -0,0 +1,542 @@
+"""
+Training benchmark module for the French-Wolof Translator.
+Times the data and optimization path of training: ``DataProcessor``
+preprocessing, batch collation and ``ModelTrainer`` forward/backward and
+optimizer steps.
+
+Usage:
+    python training_benchmark.py --output bench.json
+    python training_benchmark.py --output new.json --baseline bench.json
+    python training_benchmark.py --compare bench.json new.json
+
+Steps run on a tiny NLLB-shaped model (M2M100 architecture and the NLLB
+tokenizer, with a few small layers) built locally, so the benchmark needs
+no download beyond the tokenizer and runs in minutes on a CPU. Step timings
+cover every combination of batch size, sequence length, precision and
+gradient checkpointing. Results are written as JSON; comparing two result
+files flags every measurement that got slower than the regression
+threshold (exit status 1).
+"""
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import torch
+import transformers
+from datasets import Dataset, DatasetDict
+from transformers import AutoTokenizer, M2M100Config, M2M100ForConditionalGeneration
+
+from config import BenchmarkConfig, DatasetConfig, ModelConfig, TrainingConfig
+from data_processor import DataProcessor
+from trainer import ModelTrainer
+
+
+# Metric compared across runs for each benchmark, and whether higher is better
+PRIMARY_METRICS = {
+    "preprocess": ("pairs_per_second", True),
+    "collate": ("examples_per_second", True),
+    "train_step": ("step_ms", False),
+}
+
+# Parameters identifying a measurement across runs
+KEY_FIELDS = ("max_length", "batch_size", "seq_len", "precision", "gradient_checkpointing")
+
+FRENCH_WORDS = (
+    "le", "la", "les", "un", "une", "enfant", "maison", "eau", "marché", "village",
+    "nous", "vous", "ils", "mange", "parle", "travaille", "aujourd'hui", "demain",
+    "beaucoup", "très", "bien", "avec", "dans", "pour", "famille", "ami", "route",
+)
+WOLOF_WORDS = (
+    "xale", "bi", "yi", "kër", "ndox", "ma", "nga", "mu", "dafa", "dinaa", "lekk",
+    "wax", "liggéey", "tey", "ëllëg", "lool", "bu", "ak", "ci", "ngir", "njaboot",
+    "xarit", "yoon", "jërëjëf", "waaw", "déedéet", "baax",
+)
+
+
+def tiny_nllb_config(tokenizer, config: BenchmarkConfig, max_length: int) -> M2M100Config:
+    """
+    Build a small model configuration with the NLLB architecture.
+
+    Args:
+        tokenizer: NLLB tokenizer (sets the vocabulary and special tokens)
+        config: Benchmark configuration (model dimensions)
+        max_length: Longest sequence the model sees
+
+    Returns:
+        M2M100Config shaped like NLLB (scaled embeddings, pre-norm layers,
+        ReLU feed-forward) with ``config.layers`` encoder and decoder layers
+    """
+    return M2M100Config(
+        vocab_size=len(tokenizer),
+        d_model=config.d_model,
+        encoder_layers=config.layers,
+        decoder_layers=config.layers,
+        encoder_attention_heads=config.attention_heads,
+        decoder_attention_heads=config.attention_heads,
+        encoder_ffn_dim=config.ffn_dim,
+        decoder_ffn_dim=config.ffn_dim,
+        activation_function="relu",
+        scale_embedding=True,
+        max_position_embeddings=max(max_length + 2, 128),
+        pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.eos_token_id,
+    )
+
+
+def synthetic_pairs(count: int, max_words: int, seed: int = 42) -> List[Dict[str, str]]:
+    """
+    Generate French/Wolof sentence pairs of varied length.
+
+    Args:
+        count: Number of pairs
+        max_words: Longest sentence in words
+        seed: Random seed
+
+    Returns:
+        Records with "french" and "wolof" fields
+    """
+    rng = random.Random(seed)
+
+    def sentence(words) -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(3, max(3, max_words))))
+
+    return [{"french": sentence(FRENCH_WORDS), "wolof": sentence(WOLOF_WORDS)} for _ in range(count)]
+
+
+def synthetic_examples(
+    count: int,
+    seq_len: int,
+    vocab_size: int,
+    eos_token_id: int,
+    seed: int = 42
+) -> List[Dict[str, List[int]]]:
+    """
+    Generate tokenized examples between half and full ``seq_len`` tokens.
+
+    Args:
+        count: Number of examples
+        seq_len: Longest source/target length
+        vocab_size: Token IDs are drawn below this
+        eos_token_id: Token closing every sequence
+        seed: Random seed
+
+    Returns:
+        Records with "input_ids" and "labels"
+    """
+    rng = random.Random(seed)
+
+    def sequence() -> List[int]:
+        length = rng.randint(max(2, seq_len // 2), seq_len)
+        return [rng.randrange(4, vocab_size) for _ in range(length - 1)] + [eos_token_id]
+
+    return [{"input_ids": sequence(), "labels": sequence()} for _ in range(count)]
+
+
+def _synchronize() -> None:
+    if torch.cuda.is_available() and torch.cuda.is_initialized():
+        torch.cuda.synchronize()
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    """Wall time of one call in seconds (waiting for CUDA kernels)."""
+    _synchronize()
+    start = time.perf_counter()
+    fn()
+    _synchronize()
+    return time.perf_counter() - start
+
+
+def environment() -> Dict[str, Any]:
+    """
+    Describe the machine and library versions a run was measured on.
+
+    Returns:
+        Dictionary of platform, versions, device and thread count
+    """
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+        "device": torch.cuda.get_device_name(0) if torch.cuda.is_available() else "cpu",
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+class TrainingBenchmark:
+    """Benchmarks preprocessing, collation and training steps."""
+
+    def __init__(self, config: BenchmarkConfig):
+        """
+        Initialize the benchmark.
+
+        Args:
+            config: Benchmark configuration
+        """
+        self.config = config
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            config.tokenizer or ModelConfig().checkpoint,
+            src_lang="fra_Latn",
+            tgt_lang="wol_Latn"
+        )
+        self.workdir = tempfile.mkdtemp(prefix="training_benchmark_")
+        self.checkpoint = os.path.join(self.workdir, "tiny-nllb")
+        torch.manual_seed(config.seed)
+        model = M2M100ForConditionalGeneration(
+            tiny_nllb_config(self.tokenizer, config, max(config.seq_lengths))
+        )
+        model.save_pretrained(self.checkpoint)
+        self.tokenizer.save_pretrained(self.checkpoint)
+
+    def close(self) -> None:
+        """Remove the temporary checkpoint."""
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def benchmark_preprocessing(self, max_length: int) -> Dict[str, Any]:
+        """
+        Time ``DataProcessor.preprocess_dataset`` on synthetic pairs.
+
+        Args:
+            max_length: Truncation length of sources and targets
+
+        Returns:
+            Result with pairs and tokens per second
+        """
+        model_config = ModelConfig()
+        model_config.max_length = max_length
+        processor = DataProcessor(self.tokenizer, DatasetConfig(), model_config)
+        # Roughly two tokens per word, so the longest pairs reach the truncation length
+        pairs = synthetic_pairs(self.config.preprocess_pairs, max_length // 2, self.config.seed)
+        dataset_dict = DatasetDict({"train": Dataset.from_list(pairs)})
+        processed = {}
+        seconds = _time(lambda: processed.update(processor.preprocess_dataset(dataset_dict)))
+        tokens = sum(
+            len(source) + len(target)
+            for source, target in zip(processed["train"]["input_ids"], processed["train"]["labels"])
+        )
+        return {
+            "benchmark": "preprocess",
+            "max_length": max_length,
+            "pairs": len(pairs),
+            "seconds": round(seconds, 4),
+            "pairs_per_second": round(len(pairs) / seconds, 1),
+            "tokens_per_second": round(tokens / seconds, 1),
+        }
+
+    def _model_trainer(
+        self,
+        batch_size: int,
+        precision: str = "fp32",
+        gradient_checkpointing: bool = False
+    ) -> ModelTrainer:
+        """Create a ModelTrainer on the tiny checkpoint."""
+        training_config = TrainingConfig(
+            eval_strategy="no",
+            per_device_train_batch_size=batch_size,
+            fp16=precision == "fp16",
+            bf16=precision == "bf16",
+            gradient_checkpointing=gradient_checkpointing,
+        )
+        training_config.output_dir = os.path.join(self.workdir, "output")
+        training_config.profile_training = False
+        training_config.prediction_store_dir = None
+        return ModelTrainer(self.checkpoint, training_config)
+
+    def benchmark_collation(self, batch_size: int, seq_len: int) -> Dict[str, Any]:
+        """
+        Time the ModelTrainer data collator.
+
+        Args:
+            batch_size: Examples per batch
+            seq_len: Longest example length
+
+        Returns:
+            Result with batches and examples per second
+        """
+        collator = self._model_trainer(batch_size).create_data_collator()
+        examples = synthetic_examples(
+            batch_size * self.config.collate_batches, seq_len,
+            len(self.tokenizer), self.tokenizer.eos_token_id, self.config.seed
+        )
+        batches = [examples[i:i + batch_size] for i in range(0, len(examples), batch_size)]
+        collator(batches[0])  # Warm up
+        seconds = _time(lambda: [collator(batch) for batch in batches])
+        return {
+            "benchmark": "collate",
+            "batch_size": batch_size,
+            "seq_len": seq_len,
+            "batches_per_second": round(len(batches) / seconds, 1),
+            "examples_per_second": round(len(examples) / seconds, 1),
+        }
+
+    def benchmark_train_step(
+        self,
+        batch_size: int,
+        seq_len: int,
+        precision: str,
+        gradient_checkpointing: bool
+    ) -> Dict[str, Any]:
+        """
+        Time ModelTrainer forward/backward and optimizer steps.
+
+        The trainer's own ``training_step`` (loss, mixed precision and
+        backward) and optimizer are used on batches from its collator.
+
+        Args:
+            batch_size: Examples per batch
+            seq_len: Longest example length
+            precision: "fp32", "bf16" or "fp16"
+            gradient_checkpointing: Recompute activations in backward
+
+        Returns:
+            Result with median step times and token throughput, or a
+            "skipped" reason when the precision is not supported here
+        """
+        result = {
+            "benchmark": "train_step",
+            "batch_size": batch_size,
+            "seq_len": seq_len,
+            "precision": precision,
+            "gradient_checkpointing": gradient_checkpointing,
+        }
+        if precision == "fp16" and not torch.cuda.is_available():
+            return {**result, "skipped": "fp16 needs CUDA"}
+        if precision == "bf16" and torch.cuda.is_available() and not torch.cuda.is_bf16_supported():
+            return {**result, "skipped": "bf16 not supported by this GPU"}
+
+        torch.manual_seed(self.config.seed)
+        steps = self.config.warmup_steps + self.config.measure_steps
+        examples = synthetic_examples(
+            batch_size * steps, seq_len, len(self.tokenizer), self.tokenizer.eos_token_id, self.config.seed
+        )
+        model_trainer = self._model_trainer(batch_size, precision, gradient_checkpointing)
+        trainer = model_trainer.create_trainer(Dataset.from_list(examples), None, for_training=False)
+        if gradient_checkpointing:
+            trainer.model.gradient_checkpointing_enable(
+                gradient_checkpointing_kwargs=trainer.args.gradient_checkpointing_kwargs
+            )
+        trainer.create_optimizer()
+        # Prepared as in training: applies autocast and gradient scaling
+        model, optimizer = trainer.accelerator.prepare(trainer.model, trainer.optimizer)
+        model.train()
+        # Normally set by the training loop, read by training_step
+        trainer.current_gradient_accumulation_steps = trainer.args.gradient_accumulation_steps
+        collator = trainer.data_collator
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+
+        forward_backward, optimizer_step, tokens = [], [], []
+        for step in range(steps):
+            batch = trainer._prepare_inputs(collator(examples[step * batch_size:(step + 1) * batch_size]))
+            fb_seconds = _time(lambda: trainer.training_step(model, batch))
+
+            def update():
+                optimizer.step()
+                model.zero_grad(set_to_none=True)
+
+            opt_seconds = _time(update)
+            if step >= self.config.warmup_steps:
+                forward_backward.append(fb_seconds)
+                optimizer_step.append(opt_seconds)
+                tokens.append(int(batch["attention_mask"].sum()) + int((batch["labels"] != -100).sum()))
+
+        step_seconds = [fb + opt for fb, opt in zip(forward_backward, optimizer_step)]
+        result.update({
+            "forward_backward_ms": round(1000 * statistics.median(forward_backward), 3),
+            "optimizer_ms": round(1000 * statistics.median(optimizer_step), 3),
+            "step_ms": round(1000 * statistics.median(step_seconds), 3),
+            "tokens_per_second": round(sum(tokens) / sum(step_seconds), 1),
+        })
+        if torch.cuda.is_available():
+            result["peak_cuda_mb"] = round(torch.cuda.max_memory_allocated() / 2**20, 1)
+        return result
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every benchmark.
+
+        Returns:
+            Report with the environment, configuration and results
+        """
+        config = self.config
+        results = []
+        for seq_len in config.seq_lengths:
+            results.append(self.benchmark_preprocessing(seq_len))
+            print(_format_result(results[-1]))
+        for batch_size in config.batch_sizes:
+            for seq_len in config.seq_lengths:
+                results.append(self.benchmark_collation(batch_size, seq_len))
+                print(_format_result(results[-1]))
+        for batch_size in config.batch_sizes:
+            for seq_len in config.seq_lengths:
+                for precision in config.precisions:
+                    for gradient_checkpointing in config.gradient_checkpointing:
+                        results.append(self.benchmark_train_step(
+                            batch_size, seq_len, precision, gradient_checkpointing
+                        ))
+                        print(_format_result(results[-1]))
+        return {
+            "environment": environment(),
+            "config": dataclasses.asdict(config),
+            "results": results,
+        }
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    """
+    Identify a measurement across runs.
+
+    Args:
+        result: One benchmark result
+
+    Returns:
+        Benchmark name with its parameters, e.g.
+        "train_step batch_size=8 seq_len=32 precision=fp32 gradient_checkpointing=False"
+    """
+    parts = [result["benchmark"]] + [f"{k}={result[k]}" for k in KEY_FIELDS if k in result]
+    return " ".join(parts)
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    if "skipped" in result:
+        return f"{result_key(result)}: skipped ({result['skipped']})"
+    metric, _ = PRIMARY_METRICS[result["benchmark"]]
+    return f"{result_key(result)}: {metric}={result[metric]}"
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Compare two benchmark reports measurement by measurement.
+
+    Args:
+        baseline: Earlier report
+        current: New report
+        threshold: Relative slowdown counted as a regression (0.1 = 10%)
+
+    Returns:
+        One entry per measurement present in both reports, with the
+        baseline and current value of its primary metric, the relative
+        slowdown (negative when faster) and a regression flag
+    """
+    baseline_results = {
+        result_key(result): result for result in baseline["results"] if "skipped" not in result
+    }
+    comparisons = []
+    for result in current["results"]:
+        key = result_key(result)
+        if "skipped" in result or key not in baseline_results:
+            continue
+        metric, higher_is_better = PRIMARY_METRICS[result["benchmark"]]
+        before, after = baseline_results[key][metric], result[metric]
+        if not before or not after:
+            continue
+        slowdown = before / after - 1 if higher_is_better else after / before - 1
+        comparisons.append({
+            "key": key,
+            "metric": metric,
+            "baseline": before,
+            "current": after,
+            "slowdown": round(slowdown, 4),
+            "regression": slowdown > threshold,
+        })
+    return comparisons
+
+
+def print_comparison(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float
+) -> bool:
+    """
+    Print a comparison of two reports.
+
+    Args:
+        baseline: Earlier report
+        current: New report
+        threshold: Relative slowdown counted as a regression
+
+    Returns:
+        True if any measurement regressed
+    """
+    if baseline.get("environment") != current.get("environment"):
+        print("Note: the runs were measured in different environments")
+    comparisons = compare_reports(baseline, current, threshold)
+    for entry in comparisons:
+        flag = "REGRESSION" if entry["regression"] else ""
+        print(f"{entry['key']:<80} {entry['metric']:>20} {entry['baseline']:>10} -> "
+              f"{entry['current']:<10} {entry['slowdown']:+8.1%} {flag}")
+    regressions = sum(entry["regression"] for entry in comparisons)
+    print(f"{regressions} regression(s) beyond {threshold:.0%} in {len(comparisons)} measurements")
+    return regressions > 0
+
+
+def _load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    """Command-line entry point."""
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing, collation and training steps.")
+    parser.add_argument("--output", default="training_benchmark.json", help="Result file")
+    parser.add_argument("--baseline", default=None, help="Earlier result file to compare the run against")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Only compare two result files")
+    parser.add_argument("--tokenizer", default=None, help="Tokenizer checkpoint (defaults to MODEL_CHECKPOINT)")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, defaults.batch_sizes)))
+    parser.add_argument("--seq-lengths", default=",".join(map(str, defaults.seq_lengths)))
+    parser.add_argument("--precisions", default=",".join(defaults.precisions), help="fp32, bf16 and/or fp16")
+    parser.add_argument("--gradient-checkpointing", default="off,on", help="off, on or off,on")
+    parser.add_argument("--preprocess-pairs", type=int, default=defaults.preprocess_pairs)
+    parser.add_argument("--measure-steps", type=int, default=defaults.measure_steps)
+    parser.add_argument("--threshold", type=float, default=defaults.regression_threshold,
+                        help="Relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressed = print_comparison(_load_report(args.compare[0]), _load_report(args.compare[1]), args.threshold)
+        sys.exit(1 if regressed else 0)
+
+    config = BenchmarkConfig(
+        tokenizer=args.tokenizer,
+        batch_sizes=[int(size) for size in args.batch_sizes.split(",")],
+        seq_lengths=[int(length) for length in args.seq_lengths.split(",")],
+        precisions=args.precisions.split(","),
+        gradient_checkpointing=[value == "on" for value in args.gradient_checkpointing.split(",")],
+        preprocess_pairs=args.preprocess_pairs,
+        measure_steps=args.measure_steps,
+        regression_threshold=args.threshold,
+    )
+    benchmark = TrainingBenchmark(config)
+    try:
+        report = benchmark.run()
+    finally:
+        benchmark.close()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        regressed = print_comparison(_load_report(args.baseline), report, args.threshold)
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Training profiler module for the French-Wolof Translator.
+Breaks each training step into data loading, forward/backward and
+optimizer time, measures real versus padded token throughput and memory
+per phase, and flags stalled steps.
+
+Each optimizer step is timed from trainer callback events:
+
+    on_step_end ... [log / evaluate / save] ... [data: fetch + collate]
+    on_step_begin  [forward + backward]  on_pre_optimizer_step
+    [optimizer + scheduler]  on_step_end
+
+Token counts and collation time come from ``TimedCollator``, which wraps
+the data collator (collation runs in the main process unless dataloader
+workers are used).
+"""
+import json
+import os
+import resource
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+from transformers import TrainerCallback
+
+
+PHASES = ("data", "forward_backward", "optimizer", "evaluate", "save")
+
+
+def current_rss_mb() -> float:
+    """
+    Get the resident set size of the process.
+
+    Returns:
+        Current RSS in MB (the process peak where /proc is unavailable)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """
+    Get the peak resident set size of the process so far.
+
+    Returns:
+        Peak RSS in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2**20 if os.uname().sysname == "Darwin" else peak / 2**10
+
+
+class TimedCollator:
+    """Data collator wrapper recording collation time and token counts."""
+
+    def __init__(self, collator: Callable[[List[Dict[str, Any]]], Dict[str, Any]]):
+        """
+        Wrap a collator.
+
+        Args:
+            collator: Collator producing input_ids/attention_mask/labels batches
+        """
+        self.collator = collator
+        self.pending: List[Dict[str, float]] = []
+
+    def __call__(self, features: List[Dict[str, Any]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        batch = self.collator(features)
+        record = {"collate_seconds": time.perf_counter() - start}
+        if "attention_mask" in batch:
+            record["source_tokens"] = int(batch["attention_mask"].sum())
+            record["source_padded"] = int(batch["attention_mask"].numel())
+        if "labels" in batch:
+            labels = batch["labels"]
+            record["target_tokens"] = int((labels != -100).sum())
+            record["target_padded"] = int(labels.numel())
+        self.pending.append(record)
+        return batch
+
+    def drain(self) -> List[Dict[str, float]]:
+        """
+        Take the records of the batches collated since the last call.
+
+        Returns:
+            Per-batch records
+        """
+        records, self.pending = self.pending, []
+        return records
+
+
+class TrainingProfilerCallback(TrainerCallback):
+    """Records per-step time breakdowns, throughput, memory and stalls."""
+
+    def __init__(
+        self,
+        collator: Optional[TimedCollator] = None,
+        output_path: Optional[str] = None,
+        stall_factor: float = 3.0,
+        stall_window: int = 50,
+        log_to_wandb: bool = False
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            collator: Wrapped training collator (token counts are not
+                reported without it)
+            output_path: JSON summary file (``<output_dir>/training_profile.json``
+                if None)
+            stall_factor: A step is a stall when it takes this many times
+                the median of recent steps
+            stall_window: Number of recent steps the median is taken over
+            log_to_wandb: Also log the summary to the active wandb run
+        """
+        self.collator = collator
+        self.output_path = output_path
+        self.stall_factor = stall_factor
+        self.stall_window = stall_window
+        self.log_to_wandb = log_to_wandb
+        self.steps: List[Dict[str, float]] = []
+        self.stalls: List[Dict[str, Any]] = []
+        self.phase_seconds = {phase: 0.0 for phase in PHASES}
+        self.phase_peak_rss_mb = {phase: 0.0 for phase in PHASES}
+        self.phase_peak_cuda_mb = {phase: 0.0 for phase in PHASES}
+        self.eval_tokens = 0
+        self.summary: Dict[str, Any] = {}
+        self._marks: Dict[str, float] = {}
+        self._train_start = 0.0
+
+    def _now(self) -> float:
+        # CUDA kernels run asynchronously; wait for them so time lands in the right phase
+        if torch.cuda.is_available() and torch.cuda.is_initialized():
+            torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def _end_phase(self, phase: str) -> None:
+        """Record memory peaks of a phase that just ended."""
+        self.phase_peak_rss_mb[phase] = max(self.phase_peak_rss_mb[phase], current_rss_mb())
+        if torch.cuda.is_available() and torch.cuda.is_initialized():
+            peak = torch.cuda.max_memory_allocated() / 2**20
+            self.phase_peak_cuda_mb[phase] = max(self.phase_peak_cuda_mb[phase], peak)
+            torch.cuda.reset_peak_memory_stats()
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._train_start = self._now()
+        self._marks = {"idle": self._train_start}
+        if self.collator is not None:
+            self.collator.drain()
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        now = self._now()
+        self._end_phase("data")
+        self._marks["step_begin"] = now
+        self._marks["data"] = now - self._marks.get("idle", now)
+
+    def on_pre_optimizer_step(self, args, state, control, **kwargs):
+        now = self._now()
+        self._end_phase("forward_backward")
+        self._marks["pre_optimizer"] = now
+
+    def on_step_end(self, args, state, control, **kwargs):
+        now = self._now()
+        self._end_phase("optimizer")
+        begin = self._marks.get("step_begin", now)
+        pre_optimizer = self._marks.get("pre_optimizer", now)
+        step = {
+            "step": state.global_step,
+            "data": self._marks.get("data", 0.0),
+            "forward_backward": pre_optimizer - begin,
+            "optimizer": now - pre_optimizer,
+        }
+        if self.collator is not None:
+            records = self.collator.drain()
+            step["collate"] = sum(r["collate_seconds"] for r in records)
+            for key in ("source_tokens", "source_padded", "target_tokens", "target_padded"):
+                step[key] = sum(r.get(key, 0) for r in records)
+        step["total"] = step["data"] + step["forward_backward"] + step["optimizer"]
+        for phase in ("data", "forward_backward", "optimizer"):
+            self.phase_seconds[phase] += step[phase]
+        self._check_stall(step)
+        self.steps.append(step)
+        self._marks["idle"] = now
+
+    def on_evaluate(self, args, state, control, metrics=None, **kwargs):
+        now = self._now()
+        self._end_phase("evaluate")
+        seconds = (metrics or {}).get("eval_runtime")
+        if seconds is None:
+            seconds = now - self._marks.get("idle", now)
+        self.phase_seconds["evaluate"] += seconds
+        if self.collator is not None:
+            # Evaluation batches go through the same collator
+            self.eval_tokens += sum(
+                r.get("source_tokens", 0) + r.get("target_tokens", 0) for r in self.collator.drain()
+            )
+        self._marks["idle"] = now
+
+    def on_save(self, args, state, control, **kwargs):
+        now = self._now()
+        self._end_phase("save")
+        self.phase_seconds["save"] += now - self._marks.get("idle", now)
+        self._marks["idle"] = now
+
+    def _check_stall(self, step: Dict[str, float]) -> None:
+        """Flag a step much slower than the recent median."""
+        recent = [s["total"] for s in self.steps[-self.stall_window:]]
+        if len(recent) < 5:
+            return
+        median = statistics.median(recent)
+        if median > 0 and step["total"] > self.stall_factor * median:
+            cause = max(("data", "forward_backward", "optimizer"), key=lambda phase: step[phase])
+            stall = {
+                "step": step["step"],
+                "seconds": round(step["total"], 4),
+                "median_seconds": round(median, 4),
+                "cause": cause,
+            }
+            self.stalls.append(stall)
+            print(
+                f"Stall at step {stall['step']}: {stall['seconds']:.3f}s "
+                f"({stall['median_seconds']:.3f}s median), mostly {cause}"
+            )
+
+    def on_train_end(self, args, state, control, **kwargs):
+        self.summary = self.summarize(self._now() - self._train_start)
+        output_path = self.output_path or os.path.join(args.output_dir, "training_profile.json")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary, f, indent=2)
+        print(f"Training profile written to {output_path}")
+        if self.log_to_wandb:
+            import wandb
+            if wandb.run is not None:
+                wandb.run.summary.update({
+                    f"profile/{key}": value
+                    for key, value in self.summary.items() if isinstance(value, (int, float))
+                })
+
+    def summarize(self, wall_seconds: float) -> Dict[str, Any]:
+        """
+        Build the profile summary.
+
+        Args:
+            wall_seconds: Total training wall time
+
+        Returns:
+            Dictionary of timings, throughput, memory and stalls
+        """
+        summary: Dict[str, Any] = {
+            "steps": len(self.steps),
+            "wall_seconds": round(wall_seconds, 4),
+            "stalls": len(self.stalls),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        for phase in PHASES:
+            summary[f"{phase}_seconds"] = round(self.phase_seconds[phase], 4)
+            summary[f"{phase}_share"] = round(self.phase_seconds[phase] / wall_seconds, 4) if wall_seconds else 0.0
+        for phase in ("data", "forward_backward", "optimizer", "total"):
+            values = sorted(step[phase] for step in self.steps)
+            if values:
+                summary[f"{phase}_p50_ms"] = round(1000 * values[len(values) // 2], 3)
+                summary[f"{phase}_p95_ms"] = round(1000 * values[min(len(values) - 1, int(0.95 * len(values)))], 3)
+        if self.steps and "source_tokens" in self.steps[0]:
+            step_seconds = sum(step["total"] for step in self.steps)
+            real = sum(step["source_tokens"] + step["target_tokens"] for step in self.steps)
+            padded = sum(step["source_padded"] + step["target_padded"] for step in self.steps)
+            summary["collate_seconds"] = round(sum(step["collate"] for step in self.steps), 4)
+            summary["real_tokens_per_second"] = round(real / step_seconds, 1) if step_seconds else 0.0
+            summary["padded_tokens_per_second"] = round(padded / step_seconds, 1) if step_seconds else 0.0
+            summary["padding_efficiency"] = round(real / padded, 4) if padded else 0.0
+            summary["eval_tokens"] = self.eval_tokens
+        summary["phase_peak_rss_mb"] = {k: round(v, 1) for k, v in self.phase_peak_rss_mb.items()}
+        if any(self.phase_peak_cuda_mb.values()):
+            summary["phase_peak_cuda_mb"] = {k: round(v, 1) for k, v in self.phase_peak_cuda_mb.items()}
+        summary["stalled_steps"] = self.stalls[:100]
+        return summary
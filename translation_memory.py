@@ -0,0 +1,423 @@
+"""
+Translation memory module for the French-Wolof Translator.
+Returns stored translations for known sentences before running the model.
+Only exact matches are used as translations; similar sentences are
+available as suggestions (``lookup_fuzzy``).
+
+Usage:
+    python translation_memory.py --output translation_memory
+
+Lookups go through two indexes per direction:
+    exact   hash of the normalized text and its question and
+            exclamation marks -> entry
+    fuzzy   inverted index of hashed character n-grams; the cosine
+            similarity against every entry is computed in one vectorized
+            pass (numpy bincount over the posting lists)
+
+On-disk layout (one directory per memory):
+    meta.json          n-gram size and entry counts
+    <lang>.jsonl       source/target pairs translated from <lang>
+    <lang>.npz         compiled fuzzy index for <lang>
+"""
+import argparse
+import json
+import os
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import DatasetConfig, ModelConfig, TranslationMemoryConfig
+from corpus_filter import COLUMN_LANGUAGES, normalize_text, text_key
+
+
+META_FILE = "meta.json"
+
+FORMAT_VERSION = 1
+
+# Punctuation kept in exact-match keys: it turns a statement into a
+# question or an exclamation, which may translate differently
+SENTENCE_MARKS = "?!"
+
+
+def exact_key(text: str, normalized: str) -> bytes:
+    """
+    Compute the exact-match key of a sentence.
+
+    Normalization drops punctuation, so the question and exclamation marks
+    of the raw text are added back: "Tu viens ?" and "Tu viens." get
+    different keys, while "Tu viens?" and "tu viens ?" share one.
+
+    Args:
+        text: Raw text
+        normalized: Its normalized form
+
+    Returns:
+        8-byte digest
+    """
+    marks = sorted(set(unicodedata.normalize("NFKC", text)) & set(SENTENCE_MARKS))
+    return text_key(f"{normalized} {''.join(marks)}")
+
+
+def char_ngram_features(text: str, ngram_size: int) -> np.ndarray:
+    """
+    Hash the character n-grams of a normalized text.
+
+    Args:
+        text: Normalized text
+        ngram_size: Characters per n-gram
+
+    Returns:
+        Sorted array of unique uint32 n-gram hashes
+    """
+    padded = f" {text} "
+    if len(padded) < ngram_size:
+        grams = [padded]
+    else:
+        grams = [padded[i:i + ngram_size] for i in range(len(padded) - ngram_size + 1)]
+    return np.unique(np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) for gram in grams),
+        dtype=np.uint32,
+        count=len(grams)
+    ))
+
+
+@dataclass
+class MemoryMatch:
+    """A translation memory hit."""
+    translation: str
+    source: str
+    score: float  # 1.0 for exact matches, cosine similarity otherwise
+    exact: bool
+    # Words of the query missing from the matched source (numbers, names, negations...)
+    differing_tokens: List[str] = field(default_factory=list)
+
+
+class _DirectionIndex:
+    """Exact and fuzzy indexes over the pairs of one translation direction."""
+
+    def __init__(self, ngram_size: int):
+        self.ngram_size = ngram_size
+        self.sources: List[str] = []
+        self.targets: List[str] = []
+        self.exact: Dict[bytes, int] = {}
+        # Compiled posting lists: features sorted, with their entry ids
+        self._features = np.empty(0, dtype=np.uint32)
+        self._entries = np.empty(0, dtype=np.int64)
+        self._lengths = np.empty(0, dtype=np.float32)
+        # Postings of entries added since the last compilation
+        self._pending: List[Tuple[int, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def add(self, source: str, target: str) -> bool:
+        normalized = normalize_text(source)
+        if not normalized:
+            return False
+        key = exact_key(source, normalized)
+        index = self.exact.get(key)
+        if index is not None:
+            # Same normalized source and marks: the newest translation wins
+            self.targets[index] = target
+            return False
+        index = len(self.sources)
+        self.exact[key] = index
+        self.sources.append(source)
+        self.targets.append(target)
+        self._pending.append((index, char_ngram_features(normalized, self.ngram_size)))
+        return True
+
+    def _compile(self) -> None:
+        if not self._pending:
+            return
+        features = [self._features] + [grams for _, grams in self._pending]
+        entries = [self._entries] + [
+            np.full(len(grams), index, dtype=np.int64) for index, grams in self._pending
+        ]
+        lengths = np.array([len(grams) for _, grams in self._pending], dtype=np.float32)
+        features = np.concatenate(features)
+        entries = np.concatenate(entries)
+        order = np.argsort(features, kind="stable")
+        self._features = features[order]
+        self._entries = entries[order]
+        self._lengths = np.concatenate([self._lengths, lengths])
+        self._pending = []
+
+    def lookup_exact(self, text: str, normalized: str) -> Optional[int]:
+        return self.exact.get(exact_key(text, normalized))
+
+    def lookup_fuzzy(self, normalized: str) -> Tuple[Optional[int], float]:
+        self._compile()
+        if not len(self._lengths):
+            return None, 0.0
+        query = char_ngram_features(normalized, self.ngram_size)
+        starts = np.searchsorted(self._features, query, side="left")
+        ends = np.searchsorted(self._features, query, side="right")
+        hits = ends > starts
+        if not hits.any():
+            return None, 0.0
+        postings = np.concatenate([
+            self._entries[start:end] for start, end in zip(starts[hits], ends[hits])
+        ])
+        overlap = np.bincount(postings, minlength=len(self._lengths))
+        scores = overlap / np.sqrt(self._lengths * len(query))
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def save(self, path: str, lang: str) -> None:
+        self._compile()
+        with open(os.path.join(path, f"{lang}.jsonl"), "w", encoding="utf-8") as f:
+            for source, target in zip(self.sources, self.targets):
+                f.write(json.dumps({"source": source, "target": target}, ensure_ascii=False) + "\n")
+        np.savez(
+            os.path.join(path, f"{lang}.npz"),
+            features=self._features,
+            entries=self._entries,
+            lengths=self._lengths
+        )
+
+    def load(self, path: str, lang: str) -> None:
+        with open(os.path.join(path, f"{lang}.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                source = record["source"]
+                self.exact[exact_key(source, normalize_text(source))] = len(self.sources)
+                self.sources.append(record["source"])
+                self.targets.append(record["target"])
+        arrays = np.load(os.path.join(path, f"{lang}.npz"))
+        self._features = arrays["features"]
+        self._entries = arrays["entries"]
+        self._lengths = arrays["lengths"]
+
+
+class TranslationMemory:
+    """Exact lookup of previously translated sentences, with fuzzy suggestions."""
+
+    def __init__(self, config: Optional[TranslationMemoryConfig] = None):
+        """
+        Initialize an empty translation memory.
+
+        Args:
+            config: Translation memory configuration
+        """
+        self.config = config or TranslationMemoryConfig()
+        self._indexes = {
+            lang: _DirectionIndex(self.config.ngram_size) for lang in COLUMN_LANGUAGES.values()
+        }
+        self.stats = {"exact_hits": 0, "fuzzy_hits": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
+
+    def _index(self, source_lang: str) -> _DirectionIndex:
+        if source_lang not in self._indexes:
+            raise ValueError(
+                f"Invalid language code: {source_lang}. "
+                "Use 'fr' for French or 'wo' for Wolof."
+            )
+        return self._indexes[source_lang]
+
+    def add(self, source: str, target: str, source_lang: str = "fr") -> bool:
+        """
+        Add (or update) a translation.
+
+        Args:
+            source: Source sentence
+            target: Its translation
+            source_lang: Source language code ('fr' or 'wo')
+
+        Returns:
+            True if a new entry was created, False if an existing entry was
+            updated or the source is empty after normalization
+
+        Raises:
+            ValueError: If source_lang is not 'fr' or 'wo'
+        """
+        return self._index(source_lang).add(source, target)
+
+    def add_pairs(self, pairs: Iterable[Dict[str, str]], both_directions: bool = True) -> int:
+        """
+        Add parallel pairs (records with "french" and "wolof" fields).
+
+        Args:
+            pairs: Parallel records, e.g. a dataset split
+            both_directions: Also index Wolof -> French
+
+        Returns:
+            Number of new entries
+        """
+        added = 0
+        for pair in pairs:
+            french, wolof = pair.get("french"), pair.get("wolof")
+            if not french or not wolof:
+                continue
+            added += self.add(french, wolof, source_lang="fr")
+            if both_directions:
+                added += self.add(wolof, french, source_lang="wo")
+        return added
+
+    def lookup(self, text: str, source_lang: str = "fr") -> Optional[MemoryMatch]:
+        """
+        Look up a sentence (exact match on the normalized text and its ? and ! marks).
+
+        Only exact matches can stand in for a translation: a similar
+        sentence may differ in a number, a name or a negation.
+
+        Args:
+            text: Source sentence
+            source_lang: Source language code ('fr' or 'wo')
+
+        Returns:
+            The match, or None
+
+        Raises:
+            ValueError: If source_lang is not 'fr' or 'wo'
+        """
+        index = self._index(source_lang)
+        normalized = normalize_text(text)
+        exact = index.lookup_exact(text, normalized) if normalized else None
+        if exact is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["exact_hits"] += 1
+        return MemoryMatch(index.targets[exact], index.sources[exact], 1.0, True)
+
+    def lookup_fuzzy(
+        self,
+        text: str,
+        source_lang: str = "fr",
+        threshold: Optional[float] = None
+    ) -> Optional[MemoryMatch]:
+        """
+        Find the most similar stored sentence, as a suggestion for review.
+
+        The translation of a fuzzy match belongs to a different sentence:
+        it is never returned by the translator. ``differing_tokens`` lists
+        the words of ``text`` that the matched source lacks, which the
+        stored translation therefore does not cover.
+
+        Args:
+            text: Source sentence
+            source_lang: Source language code ('fr' or 'wo')
+            threshold: Minimum similarity (defaults to ``config.fuzzy_threshold``)
+
+        Returns:
+            The exact match if any, else the most similar entry reaching
+            the threshold, or None
+
+        Raises:
+            ValueError: If source_lang is not 'fr' or 'wo'
+        """
+        index = self._index(source_lang)
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        exact = index.lookup_exact(text, normalized)
+        if exact is not None:
+            return MemoryMatch(index.targets[exact], index.sources[exact], 1.0, True)
+
+        threshold = self.config.fuzzy_threshold if threshold is None else threshold
+        best, score = index.lookup_fuzzy(normalized)
+        if best is None or score < threshold:
+            return None
+        self.stats["fuzzy_hits"] += 1
+        source_words = set(normalize_text(index.sources[best]).split())
+        differing = [word for word in normalized.split() if word not in source_words]
+        return MemoryMatch(index.targets[best], index.sources[best], score, False, differing)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Persist the memory to a directory.
+
+        Args:
+            path: Output directory (defaults to ``config.path``)
+
+        Raises:
+            ValueError: If no path is given or configured
+        """
+        path = path or self.config.path
+        if not path:
+            raise ValueError("No translation memory path given or configured.")
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for lang, index in self._indexes.items():
+            index.save(path, lang)
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "ngram_size": self.config.ngram_size,
+            "entries": {lang: len(index) for lang, index in self._indexes.items()},
+        }
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, config: Optional[TranslationMemoryConfig] = None) -> "TranslationMemory":
+        """
+        Load a memory saved with ``save``.
+
+        Args:
+            path: Memory directory
+            config: Configuration (lookup threshold); the n-gram size is
+                taken from the saved memory
+
+        Returns:
+            TranslationMemory
+
+        Raises:
+            FileNotFoundError: If the directory holds no saved memory
+            ValueError: If the memory was saved with an unknown format version
+        """
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No translation memory found in {path} (missing {META_FILE}).")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported translation memory format version: {meta.get('format_version')}."
+            )
+        config = config or TranslationMemoryConfig()
+        config.path = path
+        config.ngram_size = meta["ngram_size"]
+        memory = cls(config)
+        for lang, index in memory._indexes.items():
+            index.load(path, lang)
+        return memory
+
+
+def main():
+    """Command-line entry point: build a memory from the training pairs."""
+    parser = argparse.ArgumentParser(description="Build a translation memory from the parallel corpus.")
+    parser.add_argument("--output", default=None, help="Memory directory (defaults to TRANSLATION_MEMORY_PATH)")
+    parser.add_argument("--split", default="train", help="Dataset split to index")
+    args = parser.parse_args()
+
+    from transformers import AutoTokenizer
+    from data_processor import DataProcessor
+
+    config = TranslationMemoryConfig()
+    output = args.output or config.path or "translation_memory"
+    model_config = ModelConfig()
+    tokenizer = AutoTokenizer.from_pretrained(model_config.checkpoint, src_lang="fra_Latn")
+    data_processor = DataProcessor(
+        tokenizer=tokenizer,
+        dataset_config=DatasetConfig(),
+        model_config=model_config
+    )
+
+    if os.path.exists(os.path.join(output, META_FILE)):
+        memory = TranslationMemory.load(output, config)
+    else:
+        memory = TranslationMemory(config)
+    added = memory.add_pairs(data_processor.load_dataset()[args.split])
+    memory.save(output)
+    print(f"Added {added} entries; {len(memory)} entries saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
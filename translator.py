@@ -2,10 +2,27 @@
 Translation module for the French-Wolof Translator.
 Provides the main translation interface for end users.
 """
+import os
 import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-from typing import Optional
-from config import ModelConfig, DatasetConfig
+from dataclasses import dataclass
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, PreTrainedTokenizerBase
+from typing import Callable, List, Optional
+from compiled_inference import CompiledInference
+from decoding_engine import DecodingEngine
+from config import ModelConfig, DatasetConfig, InferenceConfig, TranslationMemoryConfig
+from language_id import CharNgramLanguageClassifier
+from speculative import ForwardCounter, SpeculativeStats
+from streaming import TranslationStream
+from translation_memory import TranslationMemory
+
+
+@dataclass
+class Hypothesis:
+    """One translation hypothesis and its model scores."""
+    text: str
+    score: float  # Length-normalized log-probability (exp(score): per-token probability)
+    tokens: Optional[List[str]] = None  # Generated tokens, if requested
+    token_scores: Optional[List[float]] = None  # Log-probability of each token, if requested
 
 
 class FrenchWolofTranslator:
@@ -22,7 +39,12 @@ class FrenchWolofTranslator:
         model_checkpoint: str,
         device: Optional[str] = None,
         model_config: Optional[ModelConfig] = None,
-        dataset_config: Optional[DatasetConfig] = None
+        dataset_config: Optional[DatasetConfig] = None,
+        draft_model_checkpoint: Optional[str] = None,
+        translation_memory: Optional[TranslationMemory] = None,
+        language_classifier: Optional[CharNgramLanguageClassifier] = None,
+        tokenizer: Optional[PreTrainedTokenizerBase] = None,
+        inference_config: Optional[InferenceConfig] = None
     ):
         """
         Initialize the translator.
@@ -32,10 +54,26 @@ class FrenchWolofTranslator:
             device: Device to run inference on ('cuda', 'cpu', or None for auto)
             model_config: Optional model configuration
             dataset_config: Optional dataset configuration
+            draft_model_checkpoint: Optional small model sharing the tokenizer;
+                enables speculative decoding (defaults to
+                ``model_config.draft_checkpoint``)
+            translation_memory: Optional memory consulted before generation
+                (defaults to the memory saved at TRANSLATION_MEMORY_PATH, if any)
+            language_classifier: Classifier used for ``source_lang="auto"``
+                (defaults to ``model_config.language_id_path``, if set)
+            tokenizer: Already loaded tokenizer compatible with the checkpoint
+                (loaded from the checkpoint if None)
+            inference_config: Thread counts and default batch size (defaults
+                to the settings written by autotune.py, if any)
+                
+        Raises:
+            ValueError: If the draft model's vocabulary differs from the main model's
         """
         self.model_checkpoint = model_checkpoint
         self.model_config = model_config or ModelConfig()
         self.dataset_config = dataset_config or DatasetConfig()
+        self.inference_config = inference_config or InferenceConfig()
+        self._apply_thread_settings()
         
         # Setup device
         if device is None:
@@ -47,38 +85,176 @@ class FrenchWolofTranslator:
         
         # Load tokenizer and model
         # NLLB models require language codes to be set
-        self.tokenizer = AutoTokenizer.from_pretrained(model_checkpoint, src_lang="fra_Latn")
+        self.tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_checkpoint, src_lang="fra_Latn")
         self.model = AutoModelForSeq2SeqLM.from_pretrained(model_checkpoint)
         self.model.to(self.device)
         self.model.eval()
         
+        # Optional draft model for speculative decoding
+        self.draft_model = None
+        self.speculative_stats = SpeculativeStats()
+        draft_model_checkpoint = draft_model_checkpoint or self.model_config.draft_checkpoint
+        self.draft_model_checkpoint = draft_model_checkpoint
+        if draft_model_checkpoint:
+            self.draft_model = AutoModelForSeq2SeqLM.from_pretrained(draft_model_checkpoint)
+            if self.draft_model.config.vocab_size != self.model.config.vocab_size:
+                raise ValueError(
+                    f"Draft model {draft_model_checkpoint} does not share the vocabulary "
+                    f"of {model_checkpoint}."
+                )
+            self.draft_model.to(self.device)
+            self.draft_model.eval()
+        
+        # Translation memory for known sentences
+        if translation_memory is None:
+            memory_config = TranslationMemoryConfig()
+            if memory_config.path and os.path.isdir(memory_config.path):
+                translation_memory = TranslationMemory.load(memory_config.path, memory_config)
+        self.translation_memory = translation_memory
+        
+        # Source language detection for source_lang="auto"
+        if language_classifier is None and self.model_config.language_id_path:
+            language_classifier = CharNgramLanguageClassifier.load(self.model_config.language_id_path)
+        self.language_classifier = language_classifier
+        
         # Cache language token IDs for faster translation
         self._lang_token_ids = {}
         for lang_code, bcp47_code in self.LANGUAGE_CODES.items():
             self._lang_token_ids[lang_code] = self.tokenizer.convert_tokens_to_ids(bcp47_code)
+        
+        # Optional compiled mode: pre-compile every shape bucket at startup
+        self.compiled = None
+        if self.model_config.compile:
+            max_length = self.model_config.max_length
+            length_buckets = [
+                bucket for bucket in self.model_config.length_buckets if bucket < max_length
+            ] + [max_length]
+            self.compiled = CompiledInference(
+                self.model,
+                length_buckets=length_buckets,
+                batch_buckets=self.model_config.batch_buckets,
+                pad_token_id=self.tokenizer.pad_token_id
+            )
+            num_beams = self.model_config.num_beams
+            self.compiled.warm_up(
+                forced_bos_token_id=self._lang_token_ids["wo"],
+                max_length=self.model_config.max_generation_length,
+                num_beams=num_beams,
+                early_stopping=num_beams > 1
+            )
+        
+        # Optional decoding loop that drops finished sentences from the batch
+        self.decoding_engine = None
+        if self.model_config.decoding_engine and self.compiled is None:
+            self.decoding_engine = DecodingEngine(self.model)
+    
+    def _apply_thread_settings(self) -> None:
+        """Set torch thread counts from the inference config (before any inference runs)."""
+        if self.inference_config.intra_op_threads:
+            torch.set_num_threads(self.inference_config.intra_op_threads)
+        inter_op_threads = self.inference_config.inter_op_threads
+        if inter_op_threads and inter_op_threads != torch.get_num_interop_threads():
+            try:
+                torch.set_num_interop_threads(inter_op_threads)
+            except RuntimeError:
+                # Only settable once per process, before inter-op parallel work starts
+                print(
+                    f"Could not set {inter_op_threads} inter-op threads "
+                    f"(keeping {torch.get_num_interop_threads()}): set them before other torch work"
+                )
     
     def translate(
         self,
         text: str,
         source_lang: str = "fr",
-        max_length: Optional[int] = None
+        max_length: Optional[int] = None,
+        num_beams: Optional[int] = None
     ) -> str:
         """
         Translate text from French to Wolof or Wolof to French.
         
         Args:
             text: Text to translate
-            source_lang: Source language code ('fr' for French, 'wo' for Wolof)
+            source_lang: Source language code ('fr' for French, 'wo' for Wolof,
+                'auto' to detect it)
             max_length: Maximum generation length (uses config default if None)
+            num_beams: Beam size (config default if None; greedy speculative
+                decoding when a draft model is loaded)
             
         Returns:
             Translated text
             
         Raises:
-            ValueError: If source_lang is not 'fr' or 'wo'
+            ValueError: If source_lang is not 'fr', 'wo' or 'auto' (or 'auto'
+                without a language classifier)
+        """
+        return self.translate_batch(
+            [text],
+            source_lang=source_lang,
+            max_length=max_length,
+            num_beams=num_beams
+        )[0]
+    
+    def translate_batch(
+        self,
+        texts: List[str],
+        source_lang: str = "fr",
+        max_length: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        num_beams: Optional[int] = None,
+        use_memory: bool = True
+    ) -> List[str]:
+        """
+        Translate many texts in the same direction with batched generation.
+        
+        Texts are sorted by length before batching so that each batch holds
+        similarly sized inputs and wastes little compute on padding; results
+        are returned in the original order.
+        
+        With a draft model loaded and greedy decoding, texts are decoded one
+        at a time with speculative decoding (its outputs are identical to
+        greedy decoding of the main model).
+        
+        With the decoding engine enabled (``model_config.decoding_engine``),
+        sentences leave the batch as soon as they are finished; outputs are
+        the same as ``generate``'s.
+        
+        Texts found in the translation memory (exact match) are
+        returned from it without running the model, unless ``use_memory``
+        is False (to score the model itself).
+        
+        With ``source_lang="auto"``, each text's language is detected and
+        the batch is split by direction.
+        
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code ('fr' for French, 'wo' for Wolof)
+            max_length: Maximum generation length (uses config default if None)
+            batch_size: Number of texts per generate call (tuned
+                ``inference_config.batch_size`` if None, else 16)
+            num_beams: Beam size (config default if None; greedy speculative
+                decoding when a draft model is loaded)
+            use_memory: Return translation memory matches instead of decoding them
+            
+        Returns:
+            Translated texts, aligned with the inputs
+            
+        Raises:
+            ValueError: If source_lang is not 'fr', 'wo' or 'auto' (or 'auto'
+                without a language classifier)
         """
         source_lang = source_lang.lower()
         
+        if source_lang == "auto":
+            return self._translate_auto(
+                texts,
+                self.translate_batch,
+                max_length=max_length,
+                batch_size=batch_size,
+                num_beams=num_beams,
+                use_memory=use_memory
+            )
+        
         if source_lang not in self.LANGUAGE_CODES:
             raise ValueError(
                 f"Invalid language code: {source_lang}. "
@@ -88,44 +264,403 @@ class FrenchWolofTranslator:
         # Determine target language
         target_lang = "wo" if source_lang == "fr" else "fr"
         
-        # Get language codes
-        src_bcp47 = self.LANGUAGE_CODES[source_lang]
-        tgt_bcp47 = self.LANGUAGE_CODES[target_lang]
-        
         # Set source language in tokenizer
-        self.tokenizer.src_lang = src_bcp47
+        self.tokenizer.src_lang = self.LANGUAGE_CODES[source_lang]
         
-        # Prepare input
+        # Get target language token ID for forced BOS token
+        forced_bos_token_id = self._lang_token_ids[target_lang]
+        max_gen_length = (
+            max_length or self.model_config.max_generation_length
+        )
+        if num_beams is None:
+            num_beams = 1 if self.draft_model is not None else self.model_config.num_beams
+        batch_size = batch_size or self.inference_config.batch_size or 16
+        speculative = self.draft_model is not None and num_beams == 1
+        if speculative:
+            batch_size = 1
+        elif self.compiled is not None:
+            batch_size = min(batch_size, self.compiled.max_batch_size)
+        
+        translations = [""] * len(texts)
+        pending = range(len(texts))
+        if self.translation_memory is not None and use_memory:
+            pending = []
+            for i, text in enumerate(texts):
+                match = self.translation_memory.lookup(text, source_lang=source_lang)
+                if match is None:
+                    pending.append(i)
+                else:
+                    translations[i] = match.translation
+        
+        # Bucket by length: longest first, so memory peaks on the first batch
+        order = sorted(pending, key=lambda i: len(texts[i]), reverse=True)
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in batch_indices],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=self.model_config.max_length
+            ).to(self.device)
+            
+            with torch.no_grad():
+                if speculative:
+                    translated_tokens = self._generate_speculative(
+                        inputs, forced_bos_token_id, max_gen_length
+                    )
+                elif self.compiled is not None:
+                    translated_tokens = self.compiled.generate(
+                        inputs,
+                        forced_bos_token_id=forced_bos_token_id,
+                        max_length=max_gen_length,
+                        num_beams=num_beams,
+                        early_stopping=num_beams > 1
+                    )
+                elif self.decoding_engine is not None:
+                    translated_tokens = self.decoding_engine.generate(
+                        inputs["input_ids"],
+                        inputs["attention_mask"],
+                        forced_bos_token_id=forced_bos_token_id,
+                        max_length=max_gen_length,
+                        num_beams=num_beams,
+                        early_stopping=num_beams > 1
+                    )
+                else:
+                    translated_tokens = self.model.generate(
+                        **inputs,
+                        forced_bos_token_id=forced_bos_token_id,
+                        max_length=max_gen_length,
+                        num_beams=num_beams,
+                        early_stopping=num_beams > 1
+                    )
+            
+            # Decode (skip the language token)
+            decoded = self.tokenizer.batch_decode(
+                translated_tokens,
+                skip_special_tokens=True
+            )
+            for i, translated_text in zip(batch_indices, decoded):
+                translations[i] = translated_text
+        
+        return translations
+    
+    def translate_nbest(
+        self,
+        text: str,
+        source_lang: str = "fr",
+        n: int = 5,
+        max_length: Optional[int] = None,
+        num_beams: Optional[int] = None,
+        return_token_scores: bool = False
+    ) -> List[Hypothesis]:
+        """
+        Translate text and return the best hypotheses with their scores.
+        
+        Args:
+            text: Text to translate
+            source_lang: Source language code ('fr', 'wo' or 'auto')
+            n: Number of hypotheses to return
+            max_length: Maximum generation length (uses config default if None)
+            num_beams: Beam size (at least n; config default if None)
+            return_token_scores: Also return tokens and per-token log-probabilities
+            
+        Returns:
+            Hypotheses, best first
+            
+        Raises:
+            ValueError: If source_lang is invalid or num_beams < n
+        """
+        return self.translate_batch_nbest(
+            [text],
+            source_lang=source_lang,
+            n=n,
+            max_length=max_length,
+            num_beams=num_beams,
+            return_token_scores=return_token_scores
+        )[0]
+    
+    def translate_batch_nbest(
+        self,
+        texts: List[str],
+        source_lang: str = "fr",
+        n: int = 5,
+        max_length: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        num_beams: Optional[int] = None,
+        return_token_scores: bool = False
+    ) -> List[List[Hypothesis]]:
+        """
+        Translate many texts and return the n best hypotheses of each.
+        
+        Hypotheses and scores come from the same beam search that
+        ``translate_batch`` runs: the top hypothesis equals its output.
+        Scores are length-normalized log-probabilities, so they are
+        comparable across inputs (e.g. for confidence thresholds). The
+        translation memory and draft model are not used here, since the
+        scores must come from the main model.
+        
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code ('fr', 'wo' or 'auto')
+            n: Number of hypotheses per text
+            max_length: Maximum generation length (uses config default if None)
+            batch_size: Number of texts per generate call (tuned
+                ``inference_config.batch_size`` if None, else 16)
+            num_beams: Beam size (at least n; config default if None)
+            return_token_scores: Also return tokens and per-token log-probabilities
+            
+        Returns:
+            Hypotheses per text (best first), aligned with the inputs
+            
+        Raises:
+            ValueError: If source_lang is invalid or num_beams < n
+        """
+        source_lang = source_lang.lower()
+        if source_lang == "auto":
+            return self._translate_auto(
+                texts,
+                self.translate_batch_nbest,
+                n=n,
+                max_length=max_length,
+                batch_size=batch_size,
+                num_beams=num_beams,
+                return_token_scores=return_token_scores
+            )
+        if source_lang not in self.LANGUAGE_CODES:
+            raise ValueError(
+                f"Invalid language code: {source_lang}. "
+                "Use 'fr' for French or 'wo' for Wolof."
+            )
+        if num_beams is None:
+            num_beams = max(n, self.model_config.num_beams)
+        if num_beams < n:
+            raise ValueError(f"num_beams ({num_beams}) must be at least n ({n}).")
+        
+        target_lang = "wo" if source_lang == "fr" else "fr"
+        self.tokenizer.src_lang = self.LANGUAGE_CODES[source_lang]
+        generate_kwargs = {
+            "forced_bos_token_id": self._lang_token_ids[target_lang],
+            "max_length": max_length or self.model_config.max_generation_length,
+            "num_beams": num_beams,
+            "early_stopping": num_beams > 1,
+            "num_return_sequences": n,
+            "output_scores": True,
+            "return_dict_in_generate": True,
+        }
+        batch_size = batch_size or self.inference_config.batch_size or 16
+        if self.compiled is not None:
+            batch_size = min(batch_size, self.compiled.max_batch_size)
+        
+        results = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in batch_indices],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=self.model_config.max_length
+            ).to(self.device)
+            with torch.no_grad():
+                if self.compiled is not None:
+                    outputs = self.compiled.generate(inputs, **generate_kwargs)
+                else:
+                    outputs = self.model.generate(**inputs, **generate_kwargs)
+            hypotheses = self._hypotheses(outputs, num_beams, return_token_scores)
+            for k, i in enumerate(batch_indices):
+                results[i] = hypotheses[k * n:(k + 1) * n]
+        return results
+    
+    def _hypotheses(self, outputs, num_beams: int, return_token_scores: bool) -> List[Hypothesis]:
+        """
+        Turn generate outputs (with scores) into hypotheses.
+        
+        Args:
+            outputs: ``generate`` output with sequences and scores
+            num_beams: Beam size used
+            return_token_scores: Whether to fill tokens and token_scores
+            
+        Returns:
+            One Hypothesis per returned sequence
+        """
+        sequences = outputs.sequences
+        # The first position is the decoder start token, not a generated one
+        generated = sequences[:, 1:]
+        padding = generated == self.tokenizer.pad_token_id
+        lengths = (~padding).sum(dim=1).clamp(min=1)
+        token_scores = None
+        if num_beams == 1 or return_token_scores:
+            # One log-probability per generated token; greedy search scores the
+            # padding after an early end of sequence too (log P(pad)), so zero it
+            token_scores = self.model.compute_transition_scores(
+                sequences,
+                outputs.scores,
+                getattr(outputs, "beam_indices", None),
+                normalize_logits=num_beams == 1
+            ).masked_fill(padding, 0.0)
+        if num_beams > 1:
+            scores = outputs.sequences_scores
+        else:
+            length_penalty = self.model.generation_config.length_penalty or 1.0
+            scores = token_scores.sum(dim=1) / lengths.float() ** length_penalty
+        
+        texts = self.tokenizer.batch_decode(sequences, skip_special_tokens=True)
+        hypotheses = []
+        for row, text in enumerate(texts):
+            hypothesis = Hypothesis(text=text, score=float(scores[row]))
+            if return_token_scores:
+                length = int(lengths[row])
+                hypothesis.tokens = self.tokenizer.convert_ids_to_tokens(generated[row, :length].tolist())
+                hypothesis.token_scores = token_scores[row, :length].tolist()
+            hypotheses.append(hypothesis)
+        return hypotheses
+    
+    def translate_stream(
+        self,
+        text: str,
+        source_lang: str = "fr",
+        max_length: Optional[int] = None
+    ) -> TranslationStream:
+        """
+        Translate text, yielding the output word by word as it is generated.
+
+        Streaming decodes greedily (beam search only knows its output at
+        the end); a loaded draft model is still used to propose tokens.
+
+        Args:
+            text: Text to translate
+            source_lang: Source language code ('fr', 'wo' or 'auto')
+            max_length: Maximum generation length (uses config default if None)
+
+        Returns:
+            TranslationStream: iterate it (or ``async for``) to get text
+            chunks; use it as a context manager, or call ``cancel()``, to stop
+            generation early
+
+        Raises:
+            ValueError: If source_lang is not 'fr', 'wo' or 'auto' (or 'auto'
+                without a language classifier)
+        """
+        source_lang = source_lang.lower()
+        if source_lang == "auto":
+            source_lang = self.detect_language([text])[0]
+        if source_lang not in self.LANGUAGE_CODES:
+            raise ValueError(
+                f"Invalid language code: {source_lang}. "
+                "Use 'fr' for French or 'wo' for Wolof."
+            )
+
+        if self.translation_memory is not None:
+            match = self.translation_memory.lookup(text, source_lang=source_lang)
+            if match is not None:
+                return TranslationStream.from_text(match.translation)
+
+        target_lang = "wo" if source_lang == "fr" else "fr"
+        self.tokenizer.src_lang = self.LANGUAGE_CODES[source_lang]
         inputs = self.tokenizer(
-            text,
+            [text],
             return_tensors="pt",
-            padding=True,
             truncation=True,
             max_length=self.model_config.max_length
         ).to(self.device)
+        generate_kwargs = {
+            "forced_bos_token_id": self._lang_token_ids[target_lang],
+            "max_length": max_length or self.model_config.max_generation_length,
+            "num_beams": 1,
+        }
+        if self.draft_model is not None:
+            generate_kwargs["assistant_model"] = self.draft_model
+
+        def generate(**stream_kwargs):
+            if self.compiled is not None:
+                self.compiled.generate(inputs, **generate_kwargs, **stream_kwargs)
+            else:
+                self.model.generate(**inputs, **generate_kwargs, **stream_kwargs)
+
+        return TranslationStream(generate, self.tokenizer)
+
+    def detect_language(self, texts: List[str]) -> List[str]:
+        """
+        Detect the language of each text.
         
-        # Get target language token ID for forced BOS token
-        forced_bos_token_id = self.tokenizer.convert_tokens_to_ids(tgt_bcp47)
+        Args:
+            texts: Texts in French or Wolof
+            
+        Returns:
+            Language codes ('fr' or 'wo'), aligned with texts
+            
+        Raises:
+            ValueError: If no language classifier is loaded
+        """
+        if self.language_classifier is None:
+            raise ValueError(
+                "source_lang='auto' needs a language classifier: train one with "
+                "language_id.py and set LANGUAGE_ID_MODEL."
+            )
+        return self.language_classifier.predict(texts)
+    
+    def _translate_auto(self, texts: List[str], translate: Callable[..., list], **kwargs) -> list:
+        """
+        Translate texts of mixed languages, one direction at a time.
         
-        # Generate translation
-        max_gen_length = (
-            max_length or self.model_config.max_generation_length
-        )
-        translated_tokens = self.model.generate(
-            **inputs,
-            forced_bos_token_id=forced_bos_token_id,
-            max_length=max_gen_length,
-            num_beams=5,
-            early_stopping=True
-        )
+        Args:
+            texts: Texts in French or Wolof
+            translate: Batch method called per detected language
+                (``translate_batch`` or ``translate_batch_nbest``)
+            **kwargs: Arguments forwarded to ``translate``
+            
+        Returns:
+            Results of ``translate``, aligned with the inputs
+        """
+        detected = self.detect_language(texts)
+        translations = [None] * len(texts)
+        for lang in self.LANGUAGE_CODES:
+            indices = [i for i, text_lang in enumerate(detected) if text_lang == lang]
+            if not indices:
+                continue
+            results = translate([texts[i] for i in indices], source_lang=lang, **kwargs)
+            for i, result in zip(indices, results):
+                translations[i] = result
+        return translations
+    
+    def _generate_speculative(
+        self,
+        inputs,
+        forced_bos_token_id: int,
+        max_length: int
+    ) -> torch.Tensor:
+        """
+        Generate one sequence with the draft model proposing tokens.
         
-        # Decode and return (skip the language token)
-        translated_text = self.tokenizer.batch_decode(
-            translated_tokens,
-            skip_special_tokens=True
-        )[0]
+        Forward passes of both models are counted into
+        ``self.speculative_stats``.
         
-        return translated_text
+        Args:
+            inputs: Tokenized single-sequence batch
+            forced_bos_token_id: Target language token ID
+            max_length: Maximum generation length
+            
+        Returns:
+            Generated token IDs
+        """
+        with ForwardCounter(self.model) as target, ForwardCounter(self.draft_model) as draft:
+            translated_tokens = self.model.generate(
+                **inputs,
+                forced_bos_token_id=forced_bos_token_id,
+                max_length=max_length,
+                num_beams=1,
+                do_sample=False,
+                assistant_model=self.draft_model
+            )
+        stats = self.speculative_stats
+        stats.sequences += 1
+        # The first position is the decoder start token, not a generated one
+        stats.new_tokens += translated_tokens.shape[1] - 1
+        stats.target_forward_passes += target.count
+        stats.draft_forward_passes += draft.count
+        return translated_tokens
     
     def translate_french_to_wolof(self, text: str) -> str:
         """